@@ -6,6 +6,8 @@ from sqlalchemy import pool
 from alembic import context
 from config import settings
 from db.database import Base
+from db.partitions import PARTITION_NAME
+import db.models  # noqa: F401  регистрирует модели в Base.metadata
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -30,6 +32,30 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Исключает из сравнения месячные секции твитов и лайков.
+
+    Секции создаются командами обслуживания и не входят в метаданные
+    моделей, поэтому без фильтра autogenerate предлагал бы удалить их,
+    их индексы и внешние ключи лайков, ссылающиеся на секции твитов.
+    """
+    if not reflected:
+        return True
+    if type_ == "table":
+        table_name = name
+    elif type_ == "foreign_key_constraint":
+        if PARTITION_NAME.match(object.referred_table.name):
+            return False
+        table_name = object.table.name
+    elif type_ in ("index", "unique_constraint"):
+        table_name = object.table.name
+    else:
+        return True
+    return not PARTITION_NAME.match(table_name)
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -52,6 +78,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -75,7 +102,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
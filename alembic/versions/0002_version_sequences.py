@@ -0,0 +1,28 @@
+"""Счетчики изменений ленты и подписок для ETag
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence("feed_version_seq")))
+    op.execute(sa.schema.CreateSequence(sa.Sequence("follows_version_seq")))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence("follows_version_seq")))
+    op.execute(sa.schema.DropSequence(sa.Sequence("feed_version_seq")))
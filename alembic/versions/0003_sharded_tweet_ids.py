@@ -0,0 +1,67 @@
+"""Идентификаторы твитов для шардирования
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 15:40:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TWEET_ID_COLUMNS = (
+    ("tweets", "id"),
+    ("likes", "tweet_id"),
+    ("tweet_tags", "tweet_id"),
+    ("tweet_mentions", "tweet_id"),
+)
+
+
+def upgrade() -> None:
+    # Индексы хэштегов и упоминаний остаются в основной базе, а твиты
+    # могут находиться на других шардах
+    op.drop_constraint("tweet_tags_tweet_id_fkey", "tweet_tags", type_="foreignkey")
+    op.drop_constraint(
+        "tweet_mentions_tweet_id_fkey", "tweet_mentions", type_="foreignkey"
+    )
+    for table, column in TWEET_ID_COLUMNS:
+        op.alter_column(
+            table, column, existing_type=sa.Integer(), type_=sa.BigInteger()
+        )
+    # Идентификатор формирует приложение; последовательность tweets_id_seq
+    # остается и дает младшие биты идентификатора
+    op.alter_column("tweets", "id", server_default=None)
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "tweets", "id", server_default=sa.text("nextval('tweets_id_seq'::regclass)")
+    )
+    for table, column in TWEET_ID_COLUMNS:
+        op.alter_column(
+            table, column, existing_type=sa.BigInteger(), type_=sa.Integer()
+        )
+    op.create_foreign_key(
+        "tweet_mentions_tweet_id_fkey",
+        "tweet_mentions",
+        "tweets",
+        ["tweet_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        "tweet_tags_tweet_id_fkey",
+        "tweet_tags",
+        "tweets",
+        ["tweet_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
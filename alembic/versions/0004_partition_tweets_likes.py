@@ -0,0 +1,145 @@
+"""Секционирование твитов и лайков по месяцам
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 18:20:00.000000
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from config import settings
+from db.partitions import add_months, month_start, partition_ddl
+from db.sharding import EPOCH, SEQUENCE_BITS, SHARD_BITS
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Время создания твита из идентификатора (db.sharding.tweet_created_at)
+CREATED_AT = f"to_timestamp({EPOCH} + {{column}} / {1 << (SHARD_BITS + SEQUENCE_BITS)})"
+
+
+def _rename_old(table: str, indexes: Sequence[str]) -> None:
+    # Имена индексов общие для схемы, поэтому старые индексы освобождают
+    # имена для индексов новой таблицы
+    op.rename_table(table, f"{table}_unpartitioned")
+    op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_unpartitioned_pkey")
+    for index in indexes:
+        op.drop_index(index, table_name=f"{table}_unpartitioned")
+
+
+def upgrade() -> None:
+    # Последовательность принадлежит столбцу старой таблицы и удалилась бы
+    # вместе с ней
+    op.execute("ALTER SEQUENCE tweets_id_seq OWNED BY NONE")
+    _rename_old("likes", ("ix_likes_user_id", "ix_likes_tweet_id"))
+    _rename_old("tweets", ("ix_tweets_id", "ix_tweets_user_id"))
+
+    op.create_table(
+        "tweets",
+        sa.Column("id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("tweet_data", sa.String(length=10000), nullable=True),
+        sa.Column("tweet_media_ids", sa.ARRAY(sa.Integer()), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("created_at", "id", name="tweets_pkey"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index("ix_tweets_user_id", "tweets", ["user_id"], unique=False)
+    op.create_table(
+        "likes",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tweet_id", sa.BigInteger(), nullable=False),
+        sa.Column("tweet_created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["tweet_id", "tweet_created_at"], ["tweets.id", "tweets.created_at"]
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "tweet_id", "tweet_created_at"),
+        postgresql_partition_by="RANGE (tweet_created_at)",
+    )
+    op.create_index("ix_likes_user_id", "likes", ["user_id"], unique=False)
+    op.create_index("ix_likes_tweet_id", "likes", ["tweet_id"], unique=False)
+
+    # Секции без пропусков покрывают месяцы от EPOCH, куда попадают твиты
+    # с прежними идентификаторами, до запаса вперед
+    current = month_start(datetime.now(timezone.utc).date())
+    month = month_start(datetime.fromtimestamp(EPOCH, timezone.utc).date())
+    while month <= add_months(current, settings.PARTITION_MONTHS_AHEAD):
+        op.execute(partition_ddl("tweets", month))
+        op.execute(partition_ddl("likes", month))
+        month = add_months(month, 1)
+
+    # Время создания прежних лайков неизвестно и заполняется временем миграции
+    op.execute(
+        "INSERT INTO tweets (id, created_at, tweet_data, tweet_media_ids, user_id) "
+        f"SELECT id, {CREATED_AT.format(column='id')}, tweet_data, tweet_media_ids, "
+        "user_id FROM tweets_unpartitioned"
+    )
+    op.execute(
+        "INSERT INTO likes (user_id, tweet_id, tweet_created_at) "
+        f"SELECT user_id, tweet_id, {CREATED_AT.format(column='tweet_id')} "
+        "FROM likes_unpartitioned"
+    )
+    op.drop_table("likes_unpartitioned")
+    op.drop_table("tweets_unpartitioned")
+
+
+def downgrade() -> None:
+    op.rename_table("likes", "likes_partitioned")
+    op.rename_table("tweets", "tweets_partitioned")
+    for table, indexes in (
+        ("likes", ("ix_likes_user_id", "ix_likes_tweet_id")),
+        ("tweets", ("ix_tweets_user_id",)),
+    ):
+        op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_partitioned_pkey")
+        for index in indexes:
+            op.drop_index(index, table_name=f"{table}_partitioned")
+
+    op.create_table(
+        "tweets",
+        sa.Column("id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("tweet_data", sa.String(length=10000), nullable=True),
+        sa.Column("tweet_media_ids", sa.ARRAY(sa.Integer()), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tweets_id", "tweets", ["id"], unique=False)
+    op.create_index("ix_tweets_user_id", "tweets", ["user_id"], unique=False)
+    op.create_table(
+        "likes",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tweet_id", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["tweet_id"], ["tweets.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "tweet_id"),
+    )
+    op.create_index("ix_likes_tweet_id", "likes", ["tweet_id"], unique=False)
+    op.create_index("ix_likes_user_id", "likes", ["user_id"], unique=False)
+    op.execute(
+        "INSERT INTO tweets (id, tweet_data, tweet_media_ids, user_id) "
+        "SELECT id, tweet_data, tweet_media_ids, user_id FROM tweets_partitioned"
+    )
+    op.execute(
+        "INSERT INTO likes (user_id, tweet_id) "
+        "SELECT user_id, tweet_id FROM likes_partitioned"
+    )
+    # Секции удаляются вместе с секционированными таблицами
+    op.drop_table("likes_partitioned")
+    op.drop_table("tweets_partitioned")
+    op.execute("ALTER SEQUENCE tweets_id_seq OWNED BY tweets.id")
@@ -0,0 +1 @@
+"""Нагрузочное тестирование API: python -m bench --help."""
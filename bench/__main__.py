@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict
+
+import httpx
+
+from .runner import DEFAULT_MIX, OPERATIONS, BenchContext, run_workload
+from .stats import OperationStats
+
+# Адрес, под которым приложение доступно через ASGITransport
+ASGI_BASE_URL = "http://bench"
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Неизвестная операция: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args: argparse.Namespace) -> dict:
+    ctx = BenchContext(args.api_keys, args.upload_size, random.Random(args.seed))
+
+    async def measure(client: httpx.AsyncClient, base_url: str):
+        await ctx.discover(client, base_url)
+        return await run_workload(
+            client,
+            base_url,
+            ctx,
+            args.mix,
+            args.concurrency,
+            args.duration,
+            warmup=args.warmup,
+            max_requests=args.requests,
+        )
+
+    if args.transport == "asgi":
+        # Приложение запускается в этом же процессе через клиент из main.py,
+        # включая события запуска и остановки
+        from main import app, client
+
+        async with app.router.lifespan_context(app):
+            results, elapsed = await measure(client, ASGI_BASE_URL)
+    else:
+        limits = httpx.Limits(
+            max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+        )
+        async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+            results, elapsed = await measure(client, args.base_url.rstrip("/"))
+
+    overall = OperationStats()
+    for stats in results.values():
+        overall.merge(stats)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "transport": args.transport,
+            "base_url": args.base_url if args.transport == "http" else ASGI_BASE_URL,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "mix": args.mix,
+            "seed": args.seed,
+        },
+        "overall": overall.summary(elapsed),
+        "operations": {
+            name: stats.summary(elapsed) for name, stats in sorted(results.items())
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Смешанная нагрузка на API с отчетом о задержках в формате JSON."
+    )
+    parser.add_argument("--transport", choices=("asgi", "http"), default="asgi")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument(
+        "--requests", type=int, default=None, help="ограничение общего числа запросов"
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="веса операций, например feed=50,like=10 (операции: %s)"
+        % ", ".join(OPERATIONS),
+    )
+    parser.add_argument("--api-keys", nargs="+", default=["test", "test_2"])
+    parser.add_argument("--upload-size", type=int, default=16 * 1024)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="файл для результатов (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import json
+import sys
+from typing import Optional
+
+# Метрики, рост которых считается ухудшением
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "queries_per_request")
+
+
+def change(base: Optional[float], new: Optional[float]) -> Optional[float]:
+    if base is None or new is None or base == 0:
+        return None
+    return (new - base) / base * 100
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Сравнивает два отчета python -m bench по операциям."
+    )
+    parser.add_argument("base", help="отчет базовой версии")
+    parser.add_argument("new", help="отчет новой версии")
+    parser.add_argument(
+        "--fail-on",
+        type=float,
+        default=None,
+        help="завершиться с ошибкой при ухудшении p95 или RPS больше чем на N%%",
+    )
+    args = parser.parse_args()
+
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+
+    sections = {"overall": (base["overall"], new["overall"])}
+    for name, stats in new["operations"].items():
+        if name in base["operations"]:
+            sections[name] = (base["operations"][name], stats)
+
+    regressions = []
+    print(f"{'operation':<14}{'metric':<22}{'base':>12}{'new':>12}{'change':>10}")
+    for name, (old_stats, new_stats) in sections.items():
+        for metric in ("rps",) + LOWER_IS_BETTER:
+            delta = change(old_stats.get(metric), new_stats.get(metric))
+            delta_text = f"{delta:+.1f}%" if delta is not None else "-"
+            print(
+                f"{name:<14}{metric:<22}{str(old_stats.get(metric)):>12}"
+                f"{str(new_stats.get(metric)):>12}{delta_text:>10}"
+            )
+            if args.fail_on is None or delta is None:
+                continue
+            worse = -delta if metric == "rps" else delta
+            if metric in ("rps", "p95_ms") and worse > args.fail_on:
+                regressions.append(f"{name} {metric} {delta:+.1f}%")
+
+    if regressions:
+        print("Ухудшения: " + ", ".join(regressions), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from .stats import OperationStats, queries_from_server_timing
+
+# Вес операций в смешанной нагрузке по умолчанию
+DEFAULT_MIX = {
+    "feed": 50,
+    "profile": 15,
+    "media_get": 15,
+    "like": 10,
+    "follow": 5,
+    "media_upload": 5,
+}
+
+
+class BenchContext:
+    """
+    Общие данные сценария: ключи API и идентификаторы существующих объектов.
+
+    Состояние лайков и подписок хранится локально, чтобы операции like и
+    follow чередовали постановку и снятие и не упирались в дубликаты.
+    """
+
+    def __init__(
+        self, api_keys: List[str], upload_size: int, rng: random.Random
+    ) -> None:
+        self.api_keys = api_keys
+        self.upload_size = upload_size
+        self.rng = rng
+        self.user_ids: Dict[str, int] = {}
+        self.tweet_ids: List[int] = []
+        self.media_ids: List[int] = []
+        self.liked: Set[Tuple[str, int]] = set()
+        self.followed: Set[Tuple[str, int]] = set()
+
+    async def discover(self, client: httpx.AsyncClient, base_url: str) -> None:
+        """
+        Загружает идентификаторы пользователей, твитов и медиафайлов.
+
+        Args:
+            client (httpx.AsyncClient): HTTP-клиент.
+            base_url (str): Базовый адрес API.
+        """
+        for api_key in self.api_keys:
+            response = await client.get(
+                f"{base_url}/api/users/me", headers={"api-key": api_key}
+            )
+            user = response.json()["user"]
+            self.user_ids[api_key] = user["id"]
+            for followed in user["following"]:
+                self.followed.add((api_key, followed["id"]))
+
+        response = await client.get(
+            f"{base_url}/api/tweets/", headers={"api-key": self.api_keys[0]}
+        )
+        for tweet in response.json()["tweets"]:
+            self.tweet_ids.append(tweet["id"])
+            for like in tweet["likes"]:
+                for api_key, user_id in self.user_ids.items():
+                    if like["user_id"] == user_id:
+                        self.liked.add((api_key, tweet["id"]))
+            for link in tweet["attachments"]:
+                self.media_ids.append(int(link.rsplit("/", 1)[-1]))
+        if not self.tweet_ids:
+            raise RuntimeError("В базе данных нет твитов для нагрузочного сценария")
+
+    def api_key(self) -> str:
+        return self.rng.choice(self.api_keys)
+
+
+Operation = Callable[
+    [httpx.AsyncClient, str, BenchContext], Awaitable[Tuple[str, httpx.Response]]
+]
+
+
+async def op_feed(client, base_url, ctx):
+    return "feed", await client.get(
+        f"{base_url}/api/tweets/", headers={"api-key": ctx.api_key()}
+    )
+
+
+async def op_profile(client, base_url, ctx):
+    user_id = ctx.rng.choice(list(ctx.user_ids.values()))
+    return "profile", await client.get(f"{base_url}/api/users/{user_id}")
+
+
+async def op_media_get(client, base_url, ctx):
+    if not ctx.media_ids:
+        return await op_feed(client, base_url, ctx)
+    media_id = ctx.rng.choice(ctx.media_ids)
+    return "media_get", await client.get(f"{base_url}/api/media/{media_id}")
+
+
+async def op_like(client, base_url, ctx):
+    api_key = ctx.api_key()
+    tweet_id = ctx.rng.choice(ctx.tweet_ids)
+    url = f"{base_url}/api/tweets/{tweet_id}/likes"
+    if (api_key, tweet_id) in ctx.liked:
+        ctx.liked.discard((api_key, tweet_id))
+        return "unlike", await client.delete(url, headers={"api-key": api_key})
+    ctx.liked.add((api_key, tweet_id))
+    return "like", await client.post(url, headers={"api-key": api_key})
+
+
+async def op_follow(client, base_url, ctx):
+    api_key = ctx.api_key()
+    candidates = [
+        user_id for user_id in ctx.user_ids.values() if user_id != ctx.user_ids[api_key]
+    ]
+    if not candidates:
+        return await op_profile(client, base_url, ctx)
+    user_id = ctx.rng.choice(candidates)
+    url = f"{base_url}/api/users/{user_id}/follow"
+    if (api_key, user_id) in ctx.followed:
+        ctx.followed.discard((api_key, user_id))
+        return "unfollow", await client.delete(url, headers={"api-key": api_key})
+    ctx.followed.add((api_key, user_id))
+    return "follow", await client.post(url, headers={"api-key": api_key})
+
+
+async def op_media_upload(client, base_url, ctx):
+    payload = ctx.rng.randbytes(ctx.upload_size)
+    return "media_upload", await client.post(
+        f"{base_url}/api/medias",
+        headers={"api-key": ctx.api_key()},
+        files={"file": ("bench.bin", payload, "application/octet-stream")},
+    )
+
+
+OPERATIONS: Dict[str, Operation] = {
+    "feed": op_feed,
+    "profile": op_profile,
+    "media_get": op_media_get,
+    "like": op_like,
+    "follow": op_follow,
+    "media_upload": op_media_upload,
+}
+
+
+def is_success(response: httpx.Response) -> bool:
+    # Ошибки приложения возвращаются со статусом 200 и result == "false"
+    if response.status_code >= 400:
+        return False
+    if response.headers.get("content-type", "").startswith("application/json"):
+        body = response.json()
+        return not (isinstance(body, dict) and body.get("result") in (False, "false"))
+    return True
+
+
+async def run_workload(
+    client: httpx.AsyncClient,
+    base_url: str,
+    ctx: BenchContext,
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    warmup: float = 0.0,
+    max_requests: Optional[int] = None,
+) -> Tuple[Dict[str, OperationStats], float]:
+    """
+    Выполняет смешанную нагрузку заданной конкурентности.
+
+    Args:
+        client (httpx.AsyncClient): HTTP-клиент.
+        base_url (str): Базовый адрес API.
+        ctx (BenchContext): Данные сценария.
+        mix (Dict[str, int]): Веса операций.
+        concurrency (int): Количество одновременных клиентов.
+        duration (float): Длительность измерения в секундах.
+        warmup (float): Длительность прогрева, не попадающего в результаты.
+        max_requests (Optional[int]): Ограничение общего числа запросов.
+
+    Returns:
+        Tuple[Dict[str, OperationStats], float]: Статистика по операциям
+        и фактическая длительность измерения.
+    """
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    results: Dict[str, OperationStats] = {}
+    issued = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def worker() -> None:
+        nonlocal issued
+        while time.perf_counter() < deadline:
+            if max_requests is not None and issued >= max_requests:
+                return
+            issued += 1
+            operation = OPERATIONS[ctx.rng.choices(names, weights)[0]]
+            request_started = time.perf_counter()
+            try:
+                name, response = await operation(client, base_url, ctx)
+                ok = is_success(response)
+                queries = queries_from_server_timing(
+                    response.headers.get("server-timing")
+                )
+            except Exception:
+                name, ok, queries = operation.__name__[3:], False, None
+            finished = time.perf_counter()
+            if request_started >= measure_from:
+                stats = results.setdefault(name, OperationStats())
+                stats.record(finished - request_started, ok, queries)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = max(min(time.perf_counter(), deadline) - measure_from, 1e-9)
+    return results, elapsed
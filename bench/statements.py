@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from sqlalchemy import LargeBinary, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy_utils.types.encrypted.encrypted_type import AesEngine, EncryptedType
+
+from config import settings
+from db import db_handlers
+from db.database import DATABASE_URL
+from db.models import Media, Tweet, User, followers, likes_table
+from .stats import percentile
+
+Query = Callable[[AsyncSession], Awaitable[object]]
+
+
+# Запросы в прежнем виде: выражение строится заново при каждом вызове
+
+
+async def rebuilt_user_by_api(db: AsyncSession) -> object:
+    encrypted_api_key = EncryptedType(
+        LargeBinary, settings.SECRET_KEY, AesEngine, "pkcs5"
+    ).process_bind_param("test", None)
+    result = await db.execute(select(User).filter(User.api_key == encrypted_api_key))
+    return result.scalar_one()
+
+
+async def rebuilt_user_by_id(db: AsyncSession) -> object:
+    result = await db.execute(select(User).where(User.id == 1))
+    return result.scalar_one_or_none()
+
+
+async def rebuilt_followers(db: AsyncSession) -> object:
+    result = await db.execute(
+        select(User)
+        .join(followers, User.id == followers.c.follower_id)
+        .where(followers.c.followed_id == 1)
+    )
+    return result.scalars().all()
+
+
+async def rebuilt_likes_for_tweet(db: AsyncSession) -> object:
+    result = await db.execute(
+        select(User.id, User.name)
+        .select_from(likes_table)
+        .join(User, User.id == likes_table.c.user_id)
+        .where(likes_table.c.tweet_id == 1)
+    )
+    return result.all()
+
+
+async def rebuilt_media(db: AsyncSession) -> object:
+    result = await db.execute(select(Media).filter(Media.id == 1))
+    return result.scalar_one_or_none()
+
+
+async def rebuilt_feed(db: AsyncSession) -> object:
+    result = await db.execute(
+        select(Tweet)
+        .options(selectinload(Tweet.user))
+        .order_by(Tweet.id.desc())
+        .limit(20)
+    )
+    tweets = result.scalars().all()
+    if tweets:
+        likes = await db.execute(
+            select(likes_table.c.tweet_id, User.id, User.name)
+            .join(User, User.id == likes_table.c.user_id)
+            .where(likes_table.c.tweet_id.in_([tweet.id for tweet in tweets]))
+        )
+        likes.all()
+    return tweets
+
+
+async def cached_user_by_api(db: AsyncSession) -> object:
+    return await db_handlers.get_user_by_api("test", db)
+
+
+async def cached_user_by_id(db: AsyncSession) -> object:
+    return await db_handlers.get_user_by_id(1, db)
+
+
+async def cached_followers(db: AsyncSession) -> object:
+    return await db_handlers.get_followers(1, db)
+
+
+async def cached_likes_for_tweet(db: AsyncSession) -> object:
+    return await db_handlers.get_likes_for_tweet(db, 1)
+
+
+async def cached_media(db: AsyncSession) -> object:
+    return await db_handlers.get_media_handler(db, 1)
+
+
+async def cached_feed(db: AsyncSession) -> object:
+    return await db_handlers.get_tweet_feed(db, limit=20)
+
+
+QUERIES: Dict[str, Tuple[Query, Query]] = {
+    "user_by_api": (rebuilt_user_by_api, cached_user_by_api),
+    "user_by_id": (rebuilt_user_by_id, cached_user_by_id),
+    "followers": (rebuilt_followers, cached_followers),
+    "likes_for_tweet": (rebuilt_likes_for_tweet, cached_likes_for_tweet),
+    "media": (rebuilt_media, cached_media),
+    "feed": (rebuilt_feed, cached_feed),
+}
+
+# Варианты: прежние запросы без кэша компиляции (так они выполняются, если
+# ключ кэша не строится), прежние запросы с кэшем и текущие запросы
+MODES = {
+    "uncached": (0, 0),
+    "rebuilt": (500, 0),
+    "cached": (500, 1),
+}
+
+
+class StatementTimer:
+    """Время выполнения SQL на стороне драйвера и статистика кэша компиляции."""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.db_time = 0.0
+        self.statements = 0
+        self.cache_hits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self.before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self.after)
+
+    def before(self, conn, cursor, statement, parameters, context, executemany):
+        context.bench_started = time.perf_counter()
+
+    def after(self, conn, cursor, statement, parameters, context, executemany):
+        self.db_time += time.perf_counter() - context.bench_started
+        self.statements += 1
+        if context.cache_hit == context.dialect.CACHE_HIT:
+            self.cache_hits += 1
+
+    def reset(self) -> None:
+        self.db_time = 0.0
+        self.statements = 0
+        self.cache_hits = 0
+
+
+async def measure(
+    engine: AsyncEngine, query: Query, iterations: int, warmup: int
+) -> dict:
+    """
+    Выполняет запрос в одной сессии и разделяет время на Python и базу данных.
+
+    Args:
+        engine (AsyncEngine): Движок с одним соединением.
+        query (Query): Проверяемый запрос.
+        iterations (int): Количество измеряемых вызовов.
+        warmup (int): Количество вызовов до начала измерений.
+
+    Returns:
+        dict: Задержки вызова и накладные расходы Python на вызов в микросекундах.
+    """
+    timer = StatementTimer(engine)
+    latencies: List[float] = []
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        for _ in range(warmup):
+            await query(session)
+            session.expunge_all()
+        timer.reset()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            call_started = time.perf_counter()
+            await query(session)
+            latencies.append(time.perf_counter() - call_started)
+            # Объекты не накапливаются в identity map между вызовами
+            session.expunge_all()
+        elapsed = time.perf_counter() - started
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        dbapi_connection = raw.dbapi_connection
+        assert dbapi_connection is not None
+        # LRU-кэш подготовленных выражений адаптера asyncpg в SQLAlchemy
+        cache = getattr(dbapi_connection, "_prepared_statement_cache", None)
+        prepared = len(cache or ())
+    latencies.sort()
+    return {
+        "p50_us": round(percentile(latencies, 50) * 1e6, 1),
+        "p95_us": round(percentile(latencies, 95) * 1e6, 1),
+        "python_us_per_call": round((elapsed - timer.db_time) / iterations * 1e6, 1),
+        "db_us_per_call": round(timer.db_time / iterations * 1e6, 1),
+        "statements_per_call": timer.statements / iterations,
+        "compiled_cache_hit_ratio": round(
+            timer.cache_hits / max(timer.statements, 1), 3
+        ),
+        "prepared_statements": prepared,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    report: Dict[str, dict] = {}
+    for mode, (query_cache_size, variant) in MODES.items():
+        engine = create_async_engine(
+            DATABASE_URL,
+            pool_size=1,
+            max_overflow=0,
+            query_cache_size=query_cache_size,
+            connect_args={
+                "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+            },
+        )
+        try:
+            for name in args.queries:
+                report.setdefault(name, {})[mode] = await measure(
+                    engine, QUERIES[name][variant], args.iterations, args.warmup
+                )
+        finally:
+            await engine.dispose()
+    return {
+        "meta": {"iterations": args.iterations, "warmup": args.warmup},
+        "queries": report,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Накладные расходы Python на частые запросы до и после "
+        "кэширования выражений."
+    )
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument(
+        "--queries", nargs="+", choices=list(QUERIES), default=list(QUERIES)
+    )
+    parser.add_argument("--output", help="файл для результатов (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import math
+import re
+from typing import Dict, List, Optional, Sequence
+
+_QUERIES_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> float:
+    """
+    Вычисляет перцентиль методом ближайшего ранга.
+
+    Args:
+        sorted_values (Sequence[float]): Значения, отсортированные по возрастанию.
+        percent (float): Перцентиль от 0 до 100.
+
+    Returns:
+        float: Значение перцентиля или 0.0 для пустой выборки.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def queries_from_server_timing(header: Optional[str]) -> Optional[int]:
+    """
+    Извлекает количество SQL-запросов из заголовка Server-Timing.
+
+    Args:
+        header (Optional[str]): Значение заголовка Server-Timing.
+
+    Returns:
+        Optional[int]: Количество запросов или None, если метрики нет.
+    """
+    if not header:
+        return None
+    match = _QUERIES_RE.search(header)
+    return int(match.group(1)) if match else None
+
+
+class OperationStats:
+    """Результаты измерений одной операции нагрузочного сценария."""
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.queries: List[int] = []
+
+    def record(self, latency: float, ok: bool, queries: Optional[int]) -> None:
+        self.latencies.append(latency)
+        if not ok:
+            self.errors += 1
+        if queries is not None:
+            self.queries.append(queries)
+
+    def merge(self, other: "OperationStats") -> None:
+        self.latencies.extend(other.latencies)
+        self.errors += other.errors
+        self.queries.extend(other.queries)
+
+    def summary(self, elapsed: float) -> Dict[str, Optional[float]]:
+        """
+        Формирует сводку измерений.
+
+        Args:
+            elapsed (float): Длительность измерения в секундах.
+
+        Returns:
+            Dict[str, Optional[float]]: Количество запросов, ошибки, RPS,
+            перцентили задержки в миллисекундах и среднее число SQL-запросов
+            на запрос (None, если сервер не сообщал количество запросов).
+        """
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            "queries_per_request": (
+                round(sum(self.queries) / len(self.queries), 2)
+                if self.queries
+                else None
+            ),
+        }
@@ -0,0 +1,116 @@
+import argparse
+import gzip
+import logging
+import os
+from typing import Callable, Dict, Iterator
+
+import brotli
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
+# Сжимаются только текстовые форматы: изображения и шрифты уже сжаты
+EXTENSIONS = (".html", ".css", ".js", ".map", ".json", ".svg", ".txt", ".ico")
+MIN_SIZE = 1024
+
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    # mtime=0 делает результат воспроизводимым между сборками
+    ".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+    ".br": lambda data: brotli.compress(data, quality=11),
+}
+
+
+def source_files(directory: str) -> Iterator[str]:
+    for root, _, filenames in os.walk(directory):
+        for filename in sorted(filenames):
+            if filename.endswith(EXTENSIONS):
+                yield os.path.join(root, filename)
+
+
+def compress_file(path: str, force: bool = False) -> Dict[str, int]:
+    """
+    Создает сжатые копии файла рядом с ним.
+
+    Копия не создается, если она не меньше исходного файла, а устаревшие
+    копии удаляются, чтобы сервер не отдал прежнее содержимое.
+
+    Args:
+        path (str): Путь к исходному файлу.
+        force (bool): Пересоздать копии, даже если они не устарели.
+
+    Returns:
+        Dict[str, int]: Размеры созданных копий по расширениям.
+    """
+    source_stat = os.stat(path)
+    written: Dict[str, int] = {}
+    data = None
+    for extension, compress in COMPRESSORS.items():
+        target = path + extension
+        if (
+            not force
+            and os.path.exists(target)
+            and os.stat(target).st_mtime >= source_stat.st_mtime
+        ):
+            continue
+        if data is None:
+            with open(path, "rb") as file:
+                data = file.read()
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        with open(target, "wb") as file:
+            file.write(compressed)
+        written[extension] = len(compressed)
+    return written
+
+
+def compress_directory(directory: str, force: bool = False) -> None:
+    """
+    Создает сжатые копии всех текстовых файлов каталога.
+
+    Args:
+        directory (str): Каталог статических файлов.
+        force (bool): Пересоздать все копии.
+    """
+    original_total = 0
+    compressed_total = 0
+    for path in source_files(directory):
+        size = os.path.getsize(path)
+        if size < MIN_SIZE:
+            continue
+        written = compress_file(path, force)
+        if written:
+            original_total += size
+            compressed_total += min(written.values())
+            logger.info(
+                "%s: %s -> %s",
+                os.path.relpath(path, directory),
+                size,
+                ", ".join(f"{ext} {length}" for ext, length in written.items()),
+            )
+    if original_total:
+        logger.info(
+            "Сжато %s байт в %s байт (%.0f%%)",
+            original_total,
+            compressed_total,
+            100 * compressed_total / original_total,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Создает .br и .gz копии статических файлов фронтенда."
+    )
+    parser.add_argument("--directory", default=STATIC_DIR)
+    parser.add_argument(
+        "--force", action="store_true", help="пересоздать существующие копии"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    compress_directory(args.directory, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+import argparse
+import asyncio
+from array import array
+import itertools
+import logging
+import os
+import random
+import time
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+import asyncpg
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy_utils.types.encrypted.encrypted_type import AesEngine, EncryptedType
+
+from config import settings
+from db.database import ASYNCPG_DSN, Base
+from db.models import User
+from db.partitions import PARTITIONED_TABLES, add_months, month_start, partition_ddl
+from db.sharding import (
+    EPOCH,
+    SEQUENCE_BITS,
+    make_tweet_id,
+    shards,
+    tweet_created_at,
+    user_shard,
+)
+
+logger = logging.getLogger(__name__)
+
+# Таблицы в порядке загрузки (с учетом внешних ключей)
+TABLES = (
+    "users",
+    "media",
+    "tweets",
+    "tweet_tags",
+    "followers",
+    "likes",
+)
+# Таблицы, которые хранятся на шарде автора твита
+SHARDED_TABLES = ("tweets", "likes")
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "images")
+WORDS = (
+    "hello world tweet day night code python fastapi postgres async coffee news "
+    "music sport travel photo weekend monday friday release bug fix deploy"
+).split()
+TAGS = [f"tag{number}" for number in range(1000)]
+CHUNK_SIZE = 50_000
+
+
+def power_law_weights(count: int, alpha: float) -> List[float]:
+    """
+    Строит накопленные веса распределения Ципфа для выбора по рангу.
+
+    Args:
+        count (int): Количество элементов.
+        alpha (float): Показатель степени распределения.
+
+    Returns:
+        List[float]: Накопленные веса для random.choices(cum_weights=...).
+    """
+    return list(itertools.accumulate(1 / rank**alpha for rank in range(1, count + 1)))
+
+
+def chunked(records: Iterator[tuple], size: int = CHUNK_SIZE) -> Iterator[List[tuple]]:
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class DataGenerator:
+    """
+    Генератор синтетических данных со степенным распределением активности.
+
+    Небольшое число пользователей пишет большую часть твитов и собирает
+    большую часть подписчиков, а лайки концентрируются на популярных твитах.
+    Идентификаторы назначаются генератором, поэтому связи строятся без
+    обращений к базе данных. Твиты равномерно распределены по последним
+    args.days дням: время и логический шард автора входят в идентификатор,
+    поэтому твиты и лайки попадают в разные месячные секции и шарды.
+    """
+
+    def __init__(self, args: argparse.Namespace, end: int) -> None:
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.user_ids = range(1, args.users + 1)
+        # Ранги популярности перемешаны, чтобы популярность не совпадала с id
+        self.user_cum_weights = self._shuffled_weights(args.users)
+        self.tweet_cum_weights = self._shuffled_weights(args.tweets)
+        self.tag_cum_weights = power_law_weights(len(TAGS), args.alpha)
+        # Массивы int64 занимают в несколько раз меньше памяти, чем списки
+        self.tweet_authors = array(
+            "q", self._popular(self.user_ids, self.user_cum_weights, args.tweets)
+        )
+        self.tweet_ids = self._tweet_ids(end)
+
+    def _tweet_ids(self, end: int) -> "array[int]":
+        # Номер твита служит счетчиком: твиты одной секунды различаются им,
+        # пока в секунду приходится не больше 2**SEQUENCE_BITS твитов
+        start = max(end - self.args.days * 86400, EPOCH)
+        step = (end - start) / max(self.args.tweets, 1)
+        return array(
+            "q",
+            (
+                make_tweet_id(
+                    start - EPOCH + int(index * step), user_shard(author), index
+                )
+                for index, author in enumerate(self.tweet_authors)
+            ),
+        )
+
+    def _shuffled_weights(self, count: int) -> List[float]:
+        weights = [1 / rank**self.args.alpha for rank in range(1, count + 1)]
+        self.rng.shuffle(weights)
+        return list(itertools.accumulate(weights))
+
+    def _popular(self, population: Sequence[int], cum_weights, k: int) -> List[int]:
+        return self.rng.choices(population, cum_weights=cum_weights, k=k)
+
+    def users(self) -> Iterator[tuple]:
+        inner = EncryptedType(LargeBinary, settings.SECRET_KEY, AesEngine, "pkcs5")
+        column_type = User.__table__.c.api_key.type
+        dialect = postgresql.dialect()
+        # Первые два пользователя совпадают с начальными данными, чтобы
+        # тесты и пакет bench работали с ключами test и test_2
+        known = {1: ("test", "test"), 2: ("User2", "test_2")}
+        for user_id in self.user_ids:
+            name, api_key = known.get(user_id, (f"user{user_id}", f"user{user_id}"))
+            encrypted = column_type.process_bind_param(
+                inner.process_bind_param(api_key, None), dialect
+            )
+            yield user_id, name, encrypted
+
+    def media(self) -> Iterator[tuple]:
+        samples = []
+        if self.args.media_bytes == 0:
+            for filename in sorted(os.listdir(IMAGES_DIR)):
+                with open(os.path.join(IMAGES_DIR, filename), "rb") as file:
+                    samples.append((filename, file.read()))
+        for media_id in range(1, self.args.media + 1):
+            if samples:
+                filename, data = samples[media_id % len(samples)]
+            else:
+                filename, data = "image.bin", self.rng.randbytes(self.args.media_bytes)
+            yield media_id, filename, data
+
+    def tweets(self) -> Iterator[tuple]:
+        for tweet_id, author in zip(self.tweet_ids, self.tweet_authors):
+            words = self.rng.choices(WORDS, k=self.rng.randint(3, 20))
+            media_ids = None
+            if self.args.media and self.rng.random() < 0.2:
+                media_ids = [self.rng.randint(1, self.args.media)]
+            text = " ".join(words + self._tweet_tags(tweet_id))
+            yield tweet_id, tweet_created_at(tweet_id), text, media_ids, author
+
+    def _tweet_tags(self, tweet_id: int) -> List[str]:
+        # Теги зависят только от id твита, поэтому tweets() и tweet_tags()
+        # согласованы без хранения текста в памяти
+        tag_rng = random.Random(self.args.seed * 1_000_003 + tweet_id)
+        if tag_rng.random() >= 0.3:
+            return []
+        count = tag_rng.randint(1, 3)
+        tags = tag_rng.choices(TAGS, cum_weights=self.tag_cum_weights, k=count)
+        return ["#" + tag for tag in dict.fromkeys(tags)]
+
+    def tweet_tags(self) -> Iterator[tuple]:
+        for tweet_id in self.tweet_ids:
+            for tag in self._tweet_tags(tweet_id):
+                yield tag[1:], tweet_id
+
+    def followers(self) -> Iterator[tuple]:
+        # Число подписок распределено по Парето (среднее paretovariate(1.5) = 3),
+        # а выбор тех, на кого подписываются, пропорционален популярности
+        max_follows = max(self.args.users - 1, 0)
+        for follower_id in self.user_ids:
+            degree = int(self.rng.paretovariate(1.5) * self.args.avg_follows / 3)
+            degree = min(degree, max_follows)
+            if not degree:
+                continue
+            followed = set(
+                self._popular(self.user_ids, self.user_cum_weights, degree * 2)
+            )
+            followed.discard(follower_id)
+            for followed_id in itertools.islice(followed, degree):
+                yield follower_id, followed_id
+
+    def likes(self) -> Iterator[tuple]:
+        # Ожидаемое число лайков твита пропорционально его популярности
+        total_weight = self.tweet_cum_weights[-1] if self.tweet_cum_weights else 0
+        total_likes = self.args.avg_likes * self.args.tweets
+        previous = 0.0
+        for tweet_id, cumulative in zip(self.tweet_ids, self.tweet_cum_weights):
+            expected = total_likes * (cumulative - previous) / total_weight
+            previous = cumulative
+            count = min(int(expected + self.rng.random()), self.args.users)
+            if count:
+                for user_id in self.rng.sample(self.user_ids, count):
+                    yield user_id, tweet_id, tweet_created_at(tweet_id)
+
+
+async def drop_indexes(
+    connection: asyncpg.Connection, tables: Sequence[str] = TABLES
+) -> List:
+    indexes = [
+        index
+        for table_name in tables
+        for index in Base.metadata.tables[table_name].indexes
+    ]
+    for index in indexes:
+        await connection.execute(f'DROP INDEX IF EXISTS "{index.name}"')
+    return indexes
+
+
+async def create_indexes(connection: asyncpg.Connection, indexes: List) -> None:
+    dialect = postgresql.dialect()
+    for index in indexes:
+        started = time.perf_counter()
+        await connection.execute(
+            str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+        )
+        logger.info("Индекс %s: %.1f с", index.name, time.perf_counter() - started)
+
+
+async def create_partitions(
+    connection: asyncpg.Connection, tweet_ids: Sequence[int]
+) -> None:
+    # Время создания твита определяется его идентификатором, поэтому
+    # секции нужны за месяцы от первого до последнего твита
+    if not tweet_ids:
+        return
+    month = month_start(tweet_created_at(min(tweet_ids)).date())
+    while month <= tweet_created_at(max(tweet_ids)).date():
+        for table, _ in PARTITIONED_TABLES:
+            await connection.execute(partition_ddl(table, month))
+        month = add_months(month, 1)
+
+
+async def copy_table(
+    connection: asyncpg.Connection,
+    table: str,
+    columns: Tuple[str, ...],
+    records: Iterator[tuple],
+) -> int:
+    started = time.perf_counter()
+    total = 0
+    for chunk in chunked(records):
+        await connection.copy_records_to_table(table, records=chunk, columns=columns)
+        total += len(chunk)
+    logger.info("%s: %s строк за %.1f с", table, total, time.perf_counter() - started)
+    return total
+
+
+async def copy_sharded(
+    connections: List[asyncpg.Connection],
+    table: str,
+    columns: Tuple[str, ...],
+    records: Iterator[tuple],
+    tweet_id: Callable[[tuple], int],
+) -> int:
+    # Строки твитов и лайков загружаются в базу шарда автора твита
+    started = time.perf_counter()
+    total = 0
+    for chunk in chunked(records):
+        groups: Dict[int, List[tuple]] = {}
+        for record in chunk:
+            groups.setdefault(shards.map.for_tweet(tweet_id(record)), []).append(record)
+        for shard, rows in groups.items():
+            await connections[shard].copy_records_to_table(
+                table, records=rows, columns=columns
+            )
+        total += len(chunk)
+    logger.info("%s: %s строк за %.1f с", table, total, time.perf_counter() - started)
+    return total
+
+
+async def generate(args: argparse.Namespace) -> None:
+    connection = await asyncpg.connect(ASYNCPG_DSN)
+    # Дополнительные шарды получают только твиты и лайки
+    connections = [connection]
+    try:
+        for url in settings.DB_SHARDS:
+            connections.append(
+                await asyncpg.connect(
+                    url.replace("postgresql+asyncpg://", "postgresql://", 1)
+                )
+            )
+        if args.truncate:
+            await connection.execute(
+                "TRUNCATE " + ", ".join(TABLES) + ", tweet_mentions, jobs "
+                "RESTART IDENTITY CASCADE"
+            )
+            for shard_connection in connections[1:]:
+                await shard_connection.execute("TRUNCATE " + ", ".join(SHARDED_TABLES))
+        elif await connection.fetchval("SELECT EXISTS (SELECT 1 FROM users)"):
+            raise SystemExit("База данных не пуста, используйте --truncate")
+
+        generator = DataGenerator(args, end=int(time.time()) - 1)
+        # Индексы строятся после загрузки: так быстрее, чем обновлять их построчно
+        indexes = [await drop_indexes(connection)]
+        for shard_connection in connections[1:]:
+            indexes.append(await drop_indexes(shard_connection, SHARDED_TABLES))
+        for shard_connection in connections:
+            await create_partitions(shard_connection, generator.tweet_ids)
+        await copy_table(
+            connection, "users", ("id", "name", "api_key"), generator.users()
+        )
+        await copy_table(
+            connection, "media", ("id", "filename", "file_data"), generator.media()
+        )
+        await copy_sharded(
+            connections,
+            "tweets",
+            ("id", "created_at", "tweet_data", "tweet_media_ids", "user_id"),
+            generator.tweets(),
+            lambda record: record[0],
+        )
+        await copy_table(
+            connection, "tweet_tags", ("tag", "tweet_id"), generator.tweet_tags()
+        )
+        await copy_table(
+            connection,
+            "followers",
+            ("follower_id", "followed_id"),
+            generator.followers(),
+        )
+        await copy_sharded(
+            connections,
+            "likes",
+            ("user_id", "tweet_id", "tweet_created_at"),
+            generator.likes(),
+            lambda record: record[1],
+        )
+        # Счетчик tweets_id_seq дает только младшие биты новых идентификаторов
+        # и не зависит от загруженных твитов
+        for table in ("users", "media"):
+            await connection.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+            )
+        for shard_connection, shard_indexes in zip(connections, indexes):
+            await create_indexes(shard_connection, shard_indexes)
+            await shard_connection.execute("ANALYZE")
+    finally:
+        for shard_connection in connections:
+            await shard_connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Заполняет базу данных синтетическими данными через COPY."
+    )
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--tweets", type=int, default=1_000_000)
+    parser.add_argument(
+        "--avg-follows", type=float, default=50, help="среднее число подписок"
+    )
+    parser.add_argument(
+        "--avg-likes", type=float, default=5, help="среднее число лайков на твит"
+    )
+    parser.add_argument("--media", type=int, default=10_000)
+    parser.add_argument(
+        "--media-bytes",
+        type=int,
+        default=0,
+        help="размер случайных медиафайлов; 0 - использовать файлы из images/",
+    )
+    parser.add_argument(
+        "--alpha", type=float, default=1.1, help="показатель степенного закона"
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=365,
+        help="за сколько последних дней распределяются твиты",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--truncate", action="store_true", help="очистить таблицы перед загрузкой"
+    )
+    args = parser.parse_args()
+    if args.days < 1:
+        parser.error("--days должно быть положительным")
+    if args.tweets > args.days * 86400 << SEQUENCE_BITS:
+        # Иначе счетчик в идентификаторах твитов одной секунды повторяется
+        parser.error("слишком много твитов для периода --days")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    started = time.perf_counter()
+    asyncio.run(generate(args))
+    logger.info("Готово за %.1f с", time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
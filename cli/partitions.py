@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+
+from config import settings
+from db.partitions import (
+    add_months,
+    archive_partitions,
+    ensure_partitions,
+    list_partitions,
+    lock_partitions,
+    month_start,
+)
+from db.sharding import shards
+
+logger = logging.getLogger(__name__)
+
+
+async def maintain(
+    months_ahead: int, retention_months: int, drop: bool, include_legacy: bool = False
+) -> None:
+    """
+    Обслуживает секции твитов и лайков в основной базе и на всех шардах.
+
+    Создает секции на months_ahead месяцев вперед и, если задан срок
+    хранения, отсоединяет секции старше retention_months месяцев.
+    Повторный запуск ничего не меняет.
+
+    Args:
+        months_ahead (int): Количество месяцев вперед.
+        retention_months (int): Количество хранимых месяцев, 0 - хранить все.
+        drop (bool): Удалять старые секции вместо переноса в схему архива.
+        include_legacy (bool): Отсоединять секции месяца EPOCH, даже если
+            в них остались твиты со старыми идентификаторами.
+    """
+    current = month_start(datetime.now(timezone.utc).date())
+    try:
+        for index, shard_engine in enumerate(shards.engines):
+            async with shard_engine.begin() as connection:
+                await lock_partitions(connection)
+                created = await ensure_partitions(connection, months_ahead, current)
+            logger.info("Шард %s: создано секций: %s", index, created or "нет")
+            if not retention_months:
+                continue
+            # Каждая база обслуживается в своей транзакции, чтобы блокировка
+            # отсоединения не удерживалась на время работы с другими шардами
+            async with shard_engine.begin() as connection:
+                await lock_partitions(connection)
+                archived = await archive_partitions(
+                    connection,
+                    add_months(current, 1 - retention_months),
+                    settings.PARTITION_ARCHIVE_SCHEMA,
+                    drop,
+                    include_legacy,
+                )
+            logger.info("Шард %s: отсоединено секций: %s", index, archived or "нет")
+    finally:
+        await shards.dispose()
+
+
+async def show_partitions() -> None:
+    """Выводит месячные секции каждой базы данных."""
+    report = {}
+    try:
+        for index, shard_engine in enumerate(shards.engines):
+            async with shard_engine.connect() as connection:
+                partitions = await list_partitions(connection)
+            report[index] = [partition.name for partition in partitions]
+    finally:
+        await shards.dispose()
+    print(json.dumps(report, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Обслуживание месячных секций твитов и лайков (настройки "
+        "PARTITION_MONTHS_AHEAD, PARTITION_RETENTION_MONTHS и "
+        "PARTITION_ARCHIVE_SCHEMA)."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    maintain_parser = commands.add_parser(
+        "maintain", help="создать будущие секции и отсоединить старые"
+    )
+    maintain_parser.add_argument(
+        "--ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD
+    )
+    maintain_parser.add_argument(
+        "--retain",
+        type=int,
+        default=settings.PARTITION_RETENTION_MONTHS,
+        help="сколько последних месяцев хранить (0 - все); секции за "
+        "2024-01 с твитами со старыми идентификаторами (id < 2^31) "
+        "сохраняются, пока не задан --include-legacy",
+    )
+    maintain_parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="удалять старые секции вместо переноса в схему архива",
+    )
+    maintain_parser.add_argument(
+        "--include-legacy",
+        action="store_true",
+        help="отсоединять секции за 2024-01 вместе с твитами со старыми "
+        "идентификаторами",
+    )
+    commands.add_parser("list", help="показать секции каждой базы")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "maintain":
+        asyncio.run(maintain(args.ahead, args.retain, args.drop, args.include_legacy))
+    else:
+        asyncio.run(show_partitions())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import os
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy_utils.types.encrypted.encrypted_type import AesEngine, EncryptedType
+
+from config import settings
+from db.database import async_session
+from db.models import Media, Tweet, User, followers, likes_table
+from db.sharding import tweet_created_at
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "images")
+
+
+async def create_initial_data(session: AsyncSession) -> None:
+    """
+     Создает начальные данные в базе данных, включая пользователей, твиты, медиафайлы,
+     подписчиков и лайки для тестирования.
+
+    Эта функция создает начальный набор пользователей, твитов и медиафайлов,
+    если в базе данных еще нет данных. Если данные уже существуют, функция
+    прерывает свою работу.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных для выполнения операций.
+
+    """
+    # Проверка на наличие данных без загрузки и расшифровки строк
+    existing_user = await session.execute(select(User.id).limit(1))
+    if existing_user.first():
+        print("База данных уже содержит данные. Процесс инициализации прерван.")
+        return
+
+        # Создаем пользователей
+    encrypted_api_key1 = EncryptedType(
+        LargeBinary, settings.SECRET_KEY, AesEngine, "pkcs5"
+    ).process_bind_param("test", None)
+    encrypted_api_key2 = EncryptedType(
+        LargeBinary, settings.SECRET_KEY, AesEngine, "pkcs5"
+    ).process_bind_param("test_2", None)
+    user1 = User(name="test", api_key=encrypted_api_key1)
+    user2 = User(name="User2", api_key=encrypted_api_key2)
+    session.add(user1)
+    session.add(user2)
+    await session.commit()
+
+    # Создаем твиты. Идентификаторы из диапазона до перехода на шардирование:
+    # такие твиты всегда хранятся в основной базе (см. db.sharding)
+    tweet1 = Tweet(
+        id=1,
+        created_at=tweet_created_at(1),
+        tweet_data="Hello, World! This is tweet 1",
+        user_id=user1.id,
+    )
+    tweet2 = Tweet(
+        id=2,
+        created_at=tweet_created_at(2),
+        tweet_data="This is tweet 2",
+        user_id=user2.id,
+    )
+    tweet3 = Tweet(
+        id=3,
+        created_at=tweet_created_at(3),
+        tweet_data="Another day, another tweet!",
+        user_id=user1.id,
+    )
+    session.add(tweet1)
+    session.add(tweet2)
+    session.add(tweet3)
+    await session.commit()
+
+    # Читаем и добавляем изображения
+    with open(os.path.join(IMAGES_DIR, "image_1.jpg"), "rb") as file:
+        binary_data_1 = file.read()
+        media1 = Media(filename="image1.jpg", file_data=binary_data_1)
+        session.add(media1)
+
+    with open(os.path.join(IMAGES_DIR, "image_2.jpg"), "rb") as file:
+        binary_data_2 = file.read()
+        media2 = Media(filename="image2.jpg", file_data=binary_data_2)
+        session.add(media2)
+
+    with open(os.path.join(IMAGES_DIR, "image_3.jpg"), "rb") as file:
+        binary_data_3 = file.read()
+        media3 = Media(filename="image3.jpg", file_data=binary_data_3)
+        session.add(media3)
+
+    await session.commit()
+
+    # Обновляем твиты с ID медиа
+    tweet1.tweet_media_ids = [media1.id]
+    tweet2.tweet_media_ids = [media2.id]
+    tweet3.tweet_media_ids = [media3.id]
+    await session.commit()
+
+    # Добавляем подписчиков
+    user1_follow_user2 = followers.insert().values(
+        follower_id=user1.id, followed_id=user2.id
+    )
+    user2_follow_user1 = followers.insert().values(
+        follower_id=user2.id, followed_id=user1.id
+    )
+    # Выполняем запросы на добавление подписчиков
+    await session.execute(user1_follow_user2)
+    await session.execute(user2_follow_user1)
+    await session.commit()
+
+    # Добавляем лайки на твитах
+    like1 = likes_table.insert().values(
+        tweet_id=tweet1.id, tweet_created_at=tweet1.created_at, user_id=user2.id
+    )
+    like2 = likes_table.insert().values(
+        tweet_id=tweet2.id, tweet_created_at=tweet2.created_at, user_id=user1.id
+    )
+    like3 = likes_table.insert().values(
+        tweet_id=tweet3.id, tweet_created_at=tweet3.created_at, user_id=user2.id
+    )
+    # Выполняем запросы на добавление лайков
+    await session.execute(like1)
+    await session.execute(like2)
+    await session.execute(like3)
+    await session.commit()
+    print("Начальные данные успешно созданы.")
+
+
+async def seed() -> None:
+    async with async_session() as session:
+        await create_initial_data(session)
+
+
+def main() -> None:
+    argparse.ArgumentParser(
+        description="Создает начальные данные (два пользователя, твиты, изображения)."
+    ).parse_args()
+    asyncio.run(seed())
+
+
+if __name__ == "__main__":
+    main()
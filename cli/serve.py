@@ -0,0 +1,109 @@
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_workers(workers: int) -> int:
+    """
+    Определяет количество процессов приложения.
+
+    Args:
+        workers (int): Запрошенное количество процессов; 0 - по числу ядер.
+
+    Returns:
+        int: Количество процессов, не меньше одного.
+    """
+    if workers > 0:
+        return workers
+    # В контейнере процессу могут быть доступны не все ядра машины
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def prepare_metrics_dir(workers: int) -> None:
+    """
+    Готовит каталог prometheus_client для нескольких процессов.
+
+    Значения метрик каждого процесса хранятся в файлах этого каталога, а /metrics
+    агрегирует их. Файлы предыдущего запуска удаляются, иначе счетчики
+    завершившихся процессов попадут в новые значения. Переменная окружения
+    выставляется до запуска процессов, которые ее наследуют.
+
+    Args:
+        workers (int): Количество процессов приложения.
+    """
+    if workers == 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return
+    path = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "prometheus")
+    )
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Запускает приложение в нескольких процессах uvicorn."
+    )
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS,
+        help="количество процессов; 0 - по числу доступных ядер",
+    )
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG)
+    parser.add_argument(
+        "--keepalive", type=int, default=settings.SERVER_KEEPALIVE_SECONDS
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        help="сколько секунд ждать завершения запросов при остановке",
+    )
+    parser.add_argument(
+        "--access-log", action="store_true", help="писать журнал всех запросов"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    workers = resolve_workers(args.workers)
+    prepare_metrics_dir(workers)
+    connections = workers * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    logger.info(
+        "Процессов приложения: %s, соединений с базой данных до %s",
+        workers,
+        connections,
+    )
+    # Каждый процесс до приема запросов выполняет lifespan приложения:
+    # открывает соединения пула, подготавливает частые запросы и заполняет кэши.
+    # При SIGTERM сервер перестает принимать соединения и ждет завершения
+    # начатых запросов не дольше graceful-timeout секунд
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        backlog=args.backlog,
+        timeout_keep_alive=args.keepalive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=args.access_log,
+    )
+
+
+if __name__ == "__main__":
+    main()
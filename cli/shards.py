@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy import MetaData, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from config import settings
+from db.partitions import (
+    add_months,
+    create_partitions,
+    ensure_partitions,
+    lock_partitions,
+    month_start,
+)
+from db.sharding import (
+    EPOCH,
+    PRIMARY,
+    SEQUENCE_BITS,
+    SHARD_BITS,
+    shard_metadata,
+    shards,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Время создания твита из идентификатора (db.sharding.tweet_created_at)
+CREATED_AT = f"to_timestamp({EPOCH} + {{column}} / {1 << (SHARD_BITS + SEQUENCE_BITS)})"
+# Индексы таблиц шарда, созданных до секционирования
+LEGACY_INDEXES = {
+    "tweets": ("ix_tweets_id", "ix_tweets_user_id"),
+    "likes": ("ix_likes_user_id", "ix_likes_tweet_id"),
+}
+
+
+async def partition_legacy_tables(
+    connection: AsyncConnection, metadata: MetaData
+) -> bool:
+    """
+    Переводит твиты и лайки шарда, созданные до секционирования, в
+    секционированные таблицы.
+
+    Повторяет миграцию 0004 основной базы: старые таблицы переименовываются,
+    новые создаются по метаданным шарда с секциями от месяца EPOCH до запаса
+    вперед, строки копируются с временем создания из идентификатора твита,
+    после чего старые таблицы удаляются. Время создания прежних лайков
+    неизвестно и заполняется временем перевода.
+
+    Args:
+        connection (AsyncConnection): Соединение с открытой транзакцией.
+        metadata (MetaData): Метаданные таблиц шарда.
+
+    Returns:
+        bool: True, если таблицы были переведены.
+    """
+    kind = await connection.scalar(
+        text(
+            "SELECT relkind::text FROM pg_class WHERE relname = 'tweets' "
+            "AND relnamespace = current_schema()::regnamespace"
+        )
+    )
+    if kind != "r":
+        return False
+
+    # Последовательность, принадлежащая столбцу старой таблицы, удалилась бы
+    # вместе с ней
+    sequence = await connection.scalar(
+        text("SELECT pg_get_serial_sequence('tweets', 'id')")
+    )
+    if sequence:
+        await connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+    for table in ("likes", "tweets"):
+        await connection.execute(
+            text(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+        )
+        await connection.execute(
+            text(f"ALTER INDEX {table}_pkey RENAME TO {table}_unpartitioned_pkey")
+        )
+        for index in LEGACY_INDEXES[table]:
+            await connection.execute(text(f"DROP INDEX IF EXISTS {index}"))
+
+    tables = [metadata.tables["tweets"], metadata.tables["likes"]]
+    await connection.run_sync(metadata.create_all, tables=tables)
+    current = month_start(datetime.now(timezone.utc).date())
+    await create_partitions(
+        connection,
+        month_start(datetime.fromtimestamp(EPOCH, timezone.utc).date()),
+        add_months(current, settings.PARTITION_MONTHS_AHEAD),
+    )
+    await connection.execute(
+        text(
+            "INSERT INTO tweets (id, created_at, tweet_data, tweet_media_ids, "
+            f"user_id) SELECT id, {CREATED_AT.format(column='id')}, tweet_data, "
+            "tweet_media_ids, user_id FROM tweets_unpartitioned"
+        )
+    )
+    await connection.execute(
+        text(
+            "INSERT INTO likes (user_id, tweet_id, tweet_created_at) "
+            f"SELECT user_id, tweet_id, {CREATED_AT.format(column='tweet_id')} "
+            "FROM likes_unpartitioned"
+        )
+    )
+    await connection.execute(text("DROP TABLE likes_unpartitioned"))
+    await connection.execute(text("DROP TABLE tweets_unpartitioned"))
+    return True
+
+
+async def init_shards() -> None:
+    """
+    Создает таблицы твитов и лайков на дополнительных шардах.
+
+    Схема основной базы создается миграциями; на шардах недостающие таблицы
+    создаются по метаданным вместе с секциями ближайших месяцев, а таблицы,
+    созданные до секционирования, переводятся в секционированные, поэтому
+    повторный запуск ничего не меняет.
+    """
+    metadata = shard_metadata()
+    try:
+        for index, shard_engine in enumerate(shards.engines):
+            if index == PRIMARY:
+                continue
+            async with shard_engine.begin() as connection:
+                await lock_partitions(connection)
+                if await partition_legacy_tables(connection, metadata):
+                    logger.info("Шард %s: таблицы секционированы", index)
+                await connection.run_sync(metadata.create_all)
+                await ensure_partitions(connection, settings.PARTITION_MONTHS_AHEAD)
+            logger.info("Шард %s: схема создана", index)
+    finally:
+        await shards.dispose()
+
+
+def show_map() -> None:
+    """Выводит номера логических шардов каждой базы данных."""
+    databases: Dict[int, List[int]] = {index: [] for index in range(shards.count)}
+    for logical, database in enumerate(shards.map.assignments):
+        databases[database].append(logical)
+    print(json.dumps(databases, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Управление шардами твитов и лайков (настройки DB_SHARDS "
+        "и DB_SHARD_MAP)."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "init", help="создать или секционировать схему на дополнительных шардах"
+    )
+    commands.add_parser("map", help="показать распределение логических шардов")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "init":
+        asyncio.run(init_shards())
+    else:
+        show_map()
+
+
+if __name__ == "__main__":
+    main()
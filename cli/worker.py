@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+import logging
+
+import services.tasks  # noqa: F401  регистрирует обработчики задач
+from config import settings
+from services.jobs import JobWorker
+from services.partitions import partition_maintainer
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker(args: argparse.Namespace) -> None:
+    worker = JobWorker(batch_size=args.batch_size, poll_interval=args.poll_interval)
+    if args.once:
+        processed = await worker.run_once()
+        logger.info("Обработано задач: %s", processed)
+        return
+    await worker.start()
+    await partition_maintainer.start()
+    try:
+        while True:
+            await asyncio.sleep(args.stats_interval)
+            logger.info("Статистика фоновых задач: %s", worker.metrics.snapshot())
+    finally:
+        await partition_maintainer.stop()
+        await worker.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Воркер фоновых задач, запускаемый отдельным процессом."
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.JOBS_BATCH_SIZE)
+    parser.add_argument(
+        "--poll-interval", type=float, default=settings.JOBS_POLL_INTERVAL
+    )
+    parser.add_argument("--stats-interval", type=float, default=60.0)
+    parser.add_argument(
+        "--once", action="store_true", help="обработать одну пачку задач и выйти"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run_worker(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
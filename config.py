@@ -1,5 +1,6 @@
 import os
 from functools import lru_cache
+from typing import Dict, List
 
 from pydantic_settings import BaseSettings
 
@@ -12,6 +13,106 @@ class Settings(BaseSettings):
     DB_PASS: str
     SECRET_KEY: str
 
+    # Пул соединений с базой данных
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Размер LRU-кэша подготовленных выражений asyncpg на каждом соединении
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 256
+    # Шардирование твитов и лайков по автору: адреса дополнительных баз
+    # (postgresql+asyncpg://...), основная база - шард 0. DB_SHARD_MAP задает
+    # номер базы для каждого из 32 логических шардов; пусто - по модулю
+    DB_SHARDS: List[str] = []
+    DB_SHARD_MAP: List[int] = []
+    # Месячные секции твитов и лайков (python -m cli.partitions maintain):
+    # сколько месяцев вперед создавать и сколько последних месяцев хранить
+    # (0 - хранить все); старые секции переносятся в схему архива
+    PARTITION_MONTHS_AHEAD: int = 3
+    PARTITION_RETENTION_MONTHS: int = 0
+    PARTITION_ARCHIVE_SCHEMA: str = "archive"
+    # Как часто процессы приложения и воркеры создают секции будущих месяцев
+    # (0 - только командой python -m cli.partitions maintain)
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = 3600.0
+    # Время ожидания ответа базы данных при проверке готовности
+    READINESS_DB_TIMEOUT: float = 2.0
+
+    # Измерение времени запросов: заголовки Server-Timing и журнал медленных запросов
+    REQUEST_TIMING_ENABLED: bool = True
+    SLOW_REQUEST_THRESHOLD_MS: float = 500.0
+
+    # Сервер приложения (python -m cli.serve): 0 процессов - по числу ядер
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+
+    # Объединение одновременных одинаковых чтений: лимиты ключей и ожидающих
+    SINGLEFLIGHT_MAX_KEYS: int = 1024
+    SINGLEFLIGHT_MAX_WAITERS: int = 1000
+
+    # Кэш содержимого медиафайлов в памяти процесса
+    MEDIA_CACHE_MAX_MB: float = 64.0
+    MEDIA_CACHE_MAX_ITEM_MB: float = 4.0
+
+    # Ограничение одновременных запросов: 0 - по емкости пула соединений.
+    # Сверх лимита запросы ждут в очереди, а при ее переполнении или
+    # превышении времени ожидания получают 503 с Retry-After.
+    # Ключи лимитов маршрутов: шаблон пути или "МЕТОД шаблон"
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 0
+    ADMISSION_QUEUE_SIZE: int = 100
+    ADMISSION_QUEUE_TIMEOUT: float = 1.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    ADMISSION_ROUTE_LIMITS: Dict[str, int] = {"POST /api/medias": 4}
+
+    # Крайний срок обработки запроса: транзакции получают statement_timeout
+    # по оставшемуся времени, а обработчик отменяется по истечении срока или
+    # при отключении клиента. Ключи сроков маршрутов: шаблон пути или
+    # "МЕТОД шаблон"; 0 - без ограничения
+    REQUEST_DEADLINE_ENABLED: bool = True
+    REQUEST_DEADLINE_SECONDS: float = 10.0
+    REQUEST_DEADLINE_ROUTE_TIMEOUTS: Dict[str, float] = {"POST /api/medias": 30.0}
+
+    # Максимальное количество идентификаторов в пакетных запросах
+    BATCH_MAX_IDS: int = 100
+
+    # Сбор метрик для эндпоинта /metrics
+    METRICS_ENABLED: bool = True
+
+    # Профилирование отдельных запросов: запрос профилируется, если передан
+    # заголовок X-Profile-Token с PROFILING_TOKEN или по случайной выборке
+    # с долей PROFILING_SAMPLE_RATE. Формат - speedscope или collapsed,
+    # в каталоге хранится не больше PROFILING_MAX_FILES профилей
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL: float = 0.001
+    PROFILING_DIR: str = "profiles"
+    PROFILING_FORMAT: str = "speedscope"
+    PROFILING_MAX_FILES: int = 100
+
+    # Окно и гранулярность подсчета трендовых хэштегов
+    TRENDING_WINDOW_MINUTES: int = 60
+    TRENDING_BUCKET_SECONDS: int = 60
+    TRENDING_REFRESH_SECONDS: float = 5.0
+
+    # Потоковая доставка событий (Server-Sent Events)
+    SSE_QUEUE_SIZE: int = 100
+    SSE_MAX_CONNECTIONS: int = 1000
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_RETRY_AFTER_SECONDS: int = 5
+
+    # Фоновые задачи: запуск воркера внутри процесса приложения и параметры опроса
+    JOBS_IN_PROCESS: bool = True
+    JOBS_BATCH_SIZE: int = 10
+    JOBS_POLL_INTERVAL: float = 0.5
+    JOBS_LOCK_TIMEOUT_SECONDS: int = 300
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_BACKOFF_BASE_SECONDS: float = 2.0
+    JOBS_BACKOFF_MAX_SECONDS: float = 600.0
+
     class Config:
         env_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
 
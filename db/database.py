@@ -1,14 +1,83 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
+from .deadlines import set_statement_timeout
+from .query_stats import request_stats
 
 DATABASE_URL = (
     f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASS}@{settings.DB_HOST}:"
     f"{settings.DB_PORT}/{settings.DB_NAME}"
 )
+# Адрес для прямых подключений asyncpg (LISTEN/NOTIFY, COPY)
+ASYNCPG_DSN = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, учитывающий время ожидания соединения в статистике запроса."""
+
+    def _do_get(self):
+        stats = request_stats.get()
+        if stats is None:
+            return super()._do_get()
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            stats.pool_wait += perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if request_stats.get() is not None:
+        context.query_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_stats.get()
+    started = getattr(context, "query_started", None)
+    if stats is not None and started is not None:
+        stats.record_query(statement, perf_counter() - started)
+
+
+def make_engine(url: str) -> AsyncEngine:
+    """
+    Создает движок с настройками пула и учетом запросов в статистике запроса.
+
+    Args:
+        url (str): Адрес базы данных postgresql+asyncpg://.
+
+    Returns:
+        AsyncEngine: Движок базы данных.
+    """
+    new_engine = create_async_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        # Диалект asyncpg хранит подготовленные выражения каждого соединения
+        # в LRU-кэше по тексту запроса; текст берется из кэша компиляции
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+        },
+    )
+    event.listen(
+        new_engine.sync_engine, "before_cursor_execute", _before_cursor_execute
+    )
+    event.listen(new_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    return new_engine
+
+
+engine = make_engine(DATABASE_URL)
+
+# Крайний срок HTTP-запроса ограничивает время выражений каждой транзакции
+# сессий основной базы и шардов
+event.listen(Session, "after_begin", set_statement_timeout)
 
-engine = create_async_engine(DATABASE_URL)
 
 # Создание асинхронной сессии
 async_session = sessionmaker(
@@ -16,8 +85,3 @@ async_session = sessionmaker(
 )
 
 Base = declarative_base()
-
-
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
@@ -1,15 +1,212 @@
-from typing import List, Optional
+import heapq
+import json
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
 
 from fastapi import HTTPException
-from sqlalchemy import LargeBinary
+from sqlalchemy import (
+    ARRAY,
+    BigInteger,
+    DateTime,
+    Integer,
+    LargeBinary,
+    Row,
+    Select,
+    Sequence,
+    Text,
+    any_,
+    bindparam,
+    case,
+    column,
+    func,
+    lambda_stmt,
+    literal,
+    table,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 from sqlalchemy_utils.types.encrypted.encrypted_type import AesEngine, EncryptedType
 
+from services.broadcaster import EVENTS_CHANNEL
+from services.entities import extract_hashtags, extract_mentions, normalize_tag
+from services.jobs import enqueue
 from .database import settings
-from .models import Media, Tweet, User, likes_table, followers
+from .models import (
+    Media,
+    Tweet,
+    User,
+    likes_table,
+    feed_version_seq,
+    followers,
+    follows_version_seq,
+    tweet_mentions,
+    tweet_tags,
+)
+from .sharding import (
+    shards,
+    tweet_created_at,
+    tweet_created_at_expression,
+    tweet_id_expression,
+    user_shard,
+)
+
+# Шифрование ключа API детерминировано, поэтому объект типа создается один раз
+_api_key_cipher = EncryptedType(LargeBinary, settings.SECRET_KEY, AesEngine, "pkcs5")
+
+# Запросы к счетчикам изменений не имеют параметров и строятся один раз
+# для каждой последовательности
+_version_queries: Dict[str, Select] = {}
+_next_version_queries: Dict[str, Select] = {}
+
+
+def _version_query(sequence: Sequence) -> Select:
+    query = _version_queries.get(sequence.name)
+    if query is None:
+        # До первого nextval last_value уже равно 1, а is_called - false,
+        # и первое увеличение снова дает 1: без поправки ETag не изменился бы
+        query = select(
+            case((column("is_called"), column("last_value")), else_=0)
+        ).select_from(table(sequence.name))
+        _version_queries[sequence.name] = query
+    return query
+
+
+def _next_version_query(sequence: Sequence) -> Select:
+    query = _next_version_queries.get(sequence.name)
+    if query is None:
+        query = _next_version_queries[sequence.name] = select(sequence.next_value())
+    return query
+
+
+# Твиты и лайки хранятся на шардах без таблицы users, поэтому имена
+# пользователей загружаются из основной базы отдельным запросом
+_tweet_columns = (Tweet.id, Tweet.tweet_data, Tweet.tweet_media_ids, Tweet.user_id)
+
+# Идентификаторы передаются массивом (= ANY), а не списком IN: текст запроса
+# не зависит от размера страницы, и asyncpg использует одно подготовленное
+# выражение вместо выражения на каждую длину списка. Время создания твитов
+# (ключ секционирования) передается вторым массивом, чтобы читались только
+# секции их месяцев
+_tweet_ids = bindparam("tweet_ids", type_=ARRAY(BigInteger))
+_tweet_times = bindparam("tweet_times", type_=ARRAY(DateTime(timezone=True)))
+_tweets_by_ids_query = select(*_tweet_columns).where(
+    Tweet.id == any_(_tweet_ids), Tweet.created_at == any_(_tweet_times)
+)
+_likes_for_tweets_query = select(likes_table.c.tweet_id, likes_table.c.user_id).where(
+    likes_table.c.tweet_id == any_(_tweet_ids),
+    likes_table.c.tweet_created_at == any_(_tweet_times),
+)
+_user_names_query = select(User.id, User.name).where(
+    User.id == any_(bindparam("user_ids", type_=ARRAY(Integer)))
+)
+
+
+async def notify_event(db: AsyncSession, event: dict) -> None:
+    """
+    Публикует событие для потоковых подписчиков через Postgres NOTIFY.
+
+    Уведомление отправляется в транзакции вызывающего кода и доставляется
+    всем процессам приложения только после ее фиксации.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        event (dict): Событие с обязательным полем type.
+    """
+    await db.execute(
+        select(func.pg_notify(EVENTS_CHANNEL, json.dumps(event, separators=(",", ":"))))
+    )
+
+
+async def notify_events(db: AsyncSession, events: List[dict]) -> None:
+    """
+    Публикует несколько событий одним запросом.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        events (List[dict]): События с обязательным полем type.
+    """
+    if not events:
+        return
+    payloads = (
+        func.unnest(
+            bindparam(
+                "payloads",
+                [json.dumps(event, separators=(",", ":")) for event in events],
+                type_=ARRAY(Text),
+            )
+        )
+        .table_valued("payload")
+        .render_derived()
+    )
+    await db.execute(
+        select(func.pg_notify(EVENTS_CHANNEL, payloads.c.payload)).select_from(payloads)
+    )
+
+
+async def bump_version(db: AsyncSession, sequence: Sequence) -> None:
+    """
+    Увеличивает счетчик изменений ресурса после фиксации записи.
+
+    Счетчик увеличивается только после commit: иначе клиент мог бы получить
+    новый ETag вместе с еще не зафиксированными старыми данными и затем
+    получать 304 для устаревшего ответа. nextval не откатывается, поэтому
+    лишнее увеличение приводит только к одному полному ответу.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        sequence (Sequence): Последовательность-счетчик.
+    """
+    await db.execute(_next_version_query(sequence))
+    await db.commit()
+
+
+async def get_version(db: AsyncSession, sequence: Sequence) -> int:
+    """
+    Читает текущее значение счетчика изменений без его увеличения.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        sequence (Sequence): Последовательность-счетчик.
+
+    Returns:
+        int: Текущее значение счетчика, 0 - если он еще не увеличивался.
+    """
+    result = await db.execute(_version_query(sequence))
+    return result.scalar_one()
+
+
+def _tweet_keys(tweet_ids: List[int]) -> dict:
+    """Параметры запросов по массиву идентификаторов твитов."""
+    return {
+        "tweet_ids": tweet_ids,
+        "tweet_times": list({tweet_created_at(tweet_id) for tweet_id in tweet_ids}),
+    }
+
+
+def _requested_ids(name: str, ids: List[int], item_type=Integer):
+    """
+    Формирует CTE с запрошенными идентификаторами для пакетных операций.
+
+    Идентификаторы передаются одним параметром-массивом, поэтому текст
+    запроса не зависит от их количества.
+
+    Args:
+        name (str): Имя CTE и его столбца.
+        ids (List[int]): Идентификаторы без повторов.
+        item_type: Тип идентификаторов.
+
+    Returns:
+        CTE: Запрошенные идентификаторы в столбце id.
+    """
+    return (
+        select(
+            func.unnest(bindparam(f"{name}_ids", ids, type_=ARRAY(item_type))).label(
+                "id"
+            )
+        )
+    ).cte(name)
 
 
 async def get_user_by_api(api_key: str, db: AsyncSession) -> User:
@@ -26,12 +223,13 @@ async def get_user_by_api(api_key: str, db: AsyncSession) -> User:
     Raises:
         HTTPException: Если пользователь не найден.
     """
-    encrypted_api_key = EncryptedType(
-        LargeBinary, settings.SECRET_KEY, AesEngine, "pkcs5"
-    ).process_bind_param(api_key, None)
+    encrypted_api_key = _api_key_cipher.process_bind_param(api_key, None)
     try:
+        # Частые запросы оформлены как lambda_stmt: SQLAlchemy не строит
+        # выражение заново, а берет скомпилированный запрос из кэша по коду
+        # лямбды и подставляет значения замыкания как параметры
         result = await db.execute(
-            select(User).filter(User.api_key == encrypted_api_key)
+            lambda_stmt(lambda: select(User).where(User.api_key == encrypted_api_key))
         )
         user = result.scalar_one()
         return user
@@ -77,13 +275,66 @@ async def create_tweet(
         int: Идентификатор созданного твита.
     """
     tweet_media_ids = tweet_media_ids or []
-    tweet = Tweet(
-        user_id=user_id, tweet_data=tweet_data, tweet_media_ids=tweet_media_ids
-    )
-    db.add(tweet)
-    await db.commit()
-    await db.refresh(tweet)
-    return tweet.id
+    async with shards.session(db, shards.map.for_user(user_id)) as shard_db:
+        result = await shard_db.execute(
+            insert(Tweet)
+            .values(
+                id=tweet_id_expression(user_shard(user_id)),
+                created_at=tweet_created_at_expression(),
+                user_id=user_id,
+                tweet_data=tweet_data,
+                tweet_media_ids=tweet_media_ids,
+            )
+            .returning(Tweet.id)
+        )
+        tweet_id = result.scalar_one()
+        # Индексация хэштегов и упоминаний выполняется фоновой задачей
+        await enqueue(db, "tweet.index_entities", {"tweet_id": tweet_id})
+        await notify_event(
+            db, {"type": "tweet_created", "tweet_id": tweet_id, "user_id": user_id}
+        )
+        # Твит на шарде фиксируется раньше задачи и события, которые на него
+        # ссылаются; без дополнительных шардов это одна транзакция
+        await shard_db.commit()
+        await db.commit()
+    await bump_version(db, feed_version_seq)
+    return tweet_id
+
+
+async def index_tweet_entities(
+    db: AsyncSession, tweet_id: int, tweet_data: str
+) -> None:
+    """
+    Сохраняет хэштеги и упоминания твита в таблицы tweet_tags и tweet_mentions.
+
+    Изменения не фиксируются: функция выполняется в транзакции вызывающего кода.
+    Повторный вызов для того же твита не создает дубликатов.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        tweet_id (int): Идентификатор твита.
+        tweet_data (str): Текст твита.
+    """
+    tags = extract_hashtags(tweet_data)
+    if tags:
+        await db.execute(
+            insert(tweet_tags).on_conflict_do_nothing(),
+            [{"tag": tag, "tweet_id": tweet_id} for tag in tags],
+        )
+
+    mentions = extract_mentions(tweet_data)
+    if mentions:
+        # Имена разрешаются в идентификаторы одним INSERT ... SELECT
+        await db.execute(
+            insert(tweet_mentions)
+            .from_select(
+                ["user_id", "tweet_id"],
+                select(User.id, literal(tweet_id)).where(
+                    func.lower(User.name).in_(mentions)
+                ),
+            )
+            .on_conflict_do_nothing()
+        )
 
 
 async def delete_tweet(db: AsyncSession, tweet_id: int, user_id: int) -> None:
@@ -98,16 +349,39 @@ async def delete_tweet(db: AsyncSession, tweet_id: int, user_id: int) -> None:
     Raises:
         HTTPException: Если пользователь не имеет права удалять твит.
     """
-    result = await db.execute(select(Tweet).filter(Tweet.id == tweet_id))
-    tweet = result.scalar_one_or_none()
-
-    if not tweet or tweet.user_id != user_id:
-        raise HTTPException(
-            status_code=403, detail="You are not allowed to delete this tweet"
+    created_at = tweet_created_at(tweet_id)
+    async with shards.session(db, shards.map.for_tweet(tweet_id)) as shard_db:
+        result = await shard_db.execute(
+            lambda_stmt(
+                lambda: select(Tweet.user_id).where(
+                    Tweet.id == tweet_id, Tweet.created_at == created_at
+                )
+            )
         )
-
-    await db.delete(tweet)
-    await db.commit()
+        if result.scalar_one_or_none() != user_id:
+            raise HTTPException(
+                status_code=403, detail="You are not allowed to delete this tweet"
+            )
+
+        await shard_db.execute(
+            likes_table.delete().where(
+                likes_table.c.tweet_id == tweet_id,
+                likes_table.c.tweet_created_at == created_at,
+            )
+        )
+        await shard_db.execute(
+            Tweet.__table__.delete().where(
+                Tweet.id == tweet_id, Tweet.created_at == created_at
+            )
+        )
+        await db.execute(tweet_tags.delete().where(tweet_tags.c.tweet_id == tweet_id))
+        await db.execute(
+            tweet_mentions.delete().where(tweet_mentions.c.tweet_id == tweet_id)
+        )
+        await notify_event(db, {"type": "tweet_deleted", "tweet_id": tweet_id})
+        await shard_db.commit()
+        await db.commit()
+    await bump_version(db, feed_version_seq)
 
 
 async def like_tweet(db: AsyncSession, tweet_id: int, user_id: int) -> None:
@@ -119,8 +393,20 @@ async def like_tweet(db: AsyncSession, tweet_id: int, user_id: int) -> None:
         tweet_id (int): Идентификатор твита.
         user_id (int): Идентификатор пользователя.
     """
-    await db.execute(likes_table.insert().values(tweet_id=tweet_id, user_id=user_id))
-    await db.commit()
+    async with shards.session(db, shards.map.for_tweet(tweet_id)) as shard_db:
+        await shard_db.execute(
+            likes_table.insert().values(
+                tweet_id=tweet_id,
+                tweet_created_at=tweet_created_at(tweet_id),
+                user_id=user_id,
+            )
+        )
+        await notify_event(
+            db, {"type": "like", "tweet_id": tweet_id, "user_id": user_id, "delta": 1}
+        )
+        await shard_db.commit()
+        await db.commit()
+    await bump_version(db, feed_version_seq)
 
 
 async def unlike_tweet(db: AsyncSession, tweet_id: int, user_id: int) -> None:
@@ -132,12 +418,23 @@ async def unlike_tweet(db: AsyncSession, tweet_id: int, user_id: int) -> None:
         tweet_id (int): Идентификатор твита.
         user_id (int): Идентификатор пользователя.
     """
-    await db.execute(
-        likes_table.delete().where(
-            (likes_table.c.tweet_id == tweet_id) & (likes_table.c.user_id == user_id)
+    async with shards.session(db, shards.map.for_tweet(tweet_id)) as shard_db:
+        result = await shard_db.execute(
+            likes_table.delete().where(
+                (likes_table.c.tweet_id == tweet_id)
+                & (likes_table.c.tweet_created_at == tweet_created_at(tweet_id))
+                & (likes_table.c.user_id == user_id)
+            )
         )
-    )
-    await db.commit()
+        if result.rowcount > 0:
+            await notify_event(
+                db,
+                {"type": "like", "tweet_id": tweet_id, "user_id": user_id, "delta": -1},
+            )
+        await shard_db.commit()
+        await db.commit()
+    if result.rowcount > 0:
+        await bump_version(db, feed_version_seq)
 
 
 async def is_tweet_owner(db: AsyncSession, tweet_id: int, user_id: int) -> bool:
@@ -152,13 +449,39 @@ async def is_tweet_owner(db: AsyncSession, tweet_id: int, user_id: int) -> bool:
     Returns:
         bool: Возвращает True, если пользователь является владельцем твита, иначе False.
     """
-    result = await db.execute(
-        select(Tweet).filter(Tweet.id == tweet_id, Tweet.user_id == user_id)
-    )
-    tweet = result.first()
+    created_at = tweet_created_at(tweet_id)
+    async with shards.session(db, shards.map.for_tweet(tweet_id)) as shard_db:
+        result = await shard_db.execute(
+            lambda_stmt(
+                lambda: select(Tweet.id).where(
+                    Tweet.id == tweet_id,
+                    Tweet.created_at == created_at,
+                    Tweet.user_id == user_id,
+                )
+            )
+        )
+        tweet = result.first()
     return tweet is not None
 
 
+async def _get_user_names(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, str]:
+    """
+    Получает имена пользователей из основной базы одним запросом.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия основной базы.
+        user_ids (Iterable[int]): Идентификаторы пользователей.
+
+    Returns:
+        Dict[int, str]: Имена по идентификатору пользователя.
+    """
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    result = await db.execute(_user_names_query, {"user_ids": user_ids})
+    return dict(result.all())
+
+
 async def get_likes_for_tweet(db: AsyncSession, tweet_id: int) -> List[dict]:
     """
     Получает список пользователей, которые поставили лайк твиту.
@@ -170,37 +493,93 @@ async def get_likes_for_tweet(db: AsyncSession, tweet_id: int) -> List[dict]:
     Returns:
         List[dict]: Список словарей, содержащих информацию о пользователях.
     """
-    result = await db.execute(
-        select(User.id, User.name)
-        .select_from(likes_table)
-        .join(User, User.id == likes_table.c.user_id)
-        .where(likes_table.c.tweet_id == tweet_id)
-    )
-    likes = [{"user_id": user_id, "name": name} for (user_id, name) in result]
+    created_at = tweet_created_at(tweet_id)
+    async with shards.session(db, shards.map.for_tweet(tweet_id)) as shard_db:
+        result = await shard_db.execute(
+            lambda_stmt(
+                lambda: select(likes_table.c.user_id).where(
+                    likes_table.c.tweet_id == tweet_id,
+                    likes_table.c.tweet_created_at == created_at,
+                )
+            )
+        )
+        user_ids = result.scalars().all()
+    names = await _get_user_names(db, user_ids)
+    likes = [
+        {"user_id": user_id, "name": names[user_id]}
+        for user_id in user_ids
+        if user_id in names
+    ]
     return likes
 
 
-async def get_tweet_feed(db: AsyncSession) -> List[dict]:
+async def _load_likes(db: AsyncSession, tweet_ids: List[int]) -> List[Row]:
     """
-    Получает ленту твитов с информацией о лайках и вложениях.
+    Загружает лайки твитов с их шардов.
 
     Args:
-        db (AsyncSession): Асинхронная сессия базы данных.
+        db (AsyncSession): Асинхронная сессия основной базы.
+        tweet_ids (List[int]): Идентификаторы твитов.
+
+    Returns:
+        List[Row]: Строки (tweet_id, user_id).
+    """
+
+    async def load(session: AsyncSession, ids: List[int]) -> List[Row]:
+        result = await session.execute(_likes_for_tweets_query, _tweet_keys(ids))
+        return result.all()
+
+    pages = await shards.gather_groups(db, shards.map.group_tweets(tweet_ids), load)
+    return [like for page in pages for like in page]
+
+
+async def _load_tweets(db: AsyncSession, tweet_ids: List[int]) -> List[Row]:
+    """
+    Загружает твиты по идентификаторам с их шардов.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия основной базы.
+        tweet_ids (List[int]): Идентификаторы твитов.
+
+    Returns:
+        List[Row]: Найденные твиты в порядке tweet_ids.
+    """
+
+    async def load(session: AsyncSession, ids: List[int]) -> List[Row]:
+        result = await session.execute(_tweets_by_ids_query, _tweet_keys(ids))
+        return result.all()
+
+    pages = await shards.gather_groups(db, shards.map.group_tweets(tweet_ids), load)
+    tweets = {tweet.id: tweet for page in pages for tweet in page}
+    return [tweets[tweet_id] for tweet_id in tweet_ids if tweet_id in tweets]
+
+
+async def _serialize_tweets(db: AsyncSession, tweets: List[Row]) -> List[dict]:
+    """
+    Преобразует твиты в словари ответа API.
+
+    Лайки загружаются одним запросом на шард, а имена авторов и
+    пользователей, поставивших лайки, - одним запросом к основной базе.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия основной базы.
+        tweets (List[Row]): Строки твитов (id, tweet_data, tweet_media_ids, user_id).
 
     Returns:
         List[dict]: Список словарей, содержащих информацию о твитах.
     """
-    result = await db.execute(
-        select(Tweet)
-        .options(selectinload(Tweet.user))
-        .order_by(Tweet.id.desc())
-        .limit(50)
+    likes: Dict[int, List[int]] = {tweet.id: [] for tweet in tweets}
+    if likes:
+        for tweet_id, user_id in await _load_likes(db, list(likes)):
+            likes[tweet_id].append(user_id)
+    names = await _get_user_names(
+        db,
+        [tweet.user_id for tweet in tweets]
+        + [user_id for user_ids in likes.values() for user_id in user_ids],
     )
-    tweets = result.scalars().all()
+
     tweet_list = []
     for tweet in tweets:
-        likes = await get_likes_for_tweet(db, tweet.id)
-
         attachments = []
         if tweet.tweet_media_ids:
             for media_id in tweet.tweet_media_ids:
@@ -211,9 +590,11 @@ async def get_tweet_feed(db: AsyncSession) -> List[dict]:
             "id": tweet.id,
             "content": tweet.tweet_data,
             "attachments": attachments,
-            "author": {"id": tweet.user.id, "name": tweet.user.name},
+            "author": {"id": tweet.user_id, "name": names.get(tweet.user_id)},
             "likes": [
-                {"user_id": like["user_id"], "name": like["name"]} for like in likes
+                {"user_id": user_id, "name": names[user_id]}
+                for user_id in likes[tweet.id]
+                if user_id in names
             ],
         }
         tweet_list.append(tweet_dict)
@@ -221,6 +602,96 @@ async def get_tweet_feed(db: AsyncSession) -> List[dict]:
     return tweet_list
 
 
+async def get_tweet_feed(
+    db: AsyncSession, before_id: Optional[int] = None, limit: int = 50
+) -> List[dict]:
+    """
+    Получает ленту твитов с информацией о лайках и вложениях.
+
+    Каждый шард возвращает до limit последних твитов с id меньше курсора,
+    а страница составляется из первых limit твитов объединения по убыванию id.
+    Время создания не убывает вместе с id, поэтому сортировка по
+    (created_at, id) дает тот же порядок, но позволяет читать секции
+    от последней к первой и останавливаться на заполненной странице, а
+    курсор отсекает секции месяцев после него.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        before_id (Optional[int]): Курсор: вернуть твиты с id меньше указанного.
+        limit (int): Максимальное количество твитов.
+
+    Returns:
+        List[dict]: Список словарей, содержащих информацию о твитах.
+    """
+
+    async def load(session: AsyncSession) -> List[Row]:
+        query = lambda_stmt(lambda: select(*_tweet_columns))
+        # Условие добавляется отдельной лямбдой: ветвление внутри лямбды
+        # не попадает в ключ кэша
+        if before_id is not None:
+            before_time = tweet_created_at(before_id)
+            query += lambda q: q.where(
+                Tweet.id < before_id, Tweet.created_at <= before_time
+            )
+        query += lambda q: q.order_by(Tweet.created_at.desc(), Tweet.id.desc()).limit(
+            limit
+        )
+        result = await session.execute(query)
+        return result.all()
+
+    pages = await shards.gather(db, load)
+    tweets = heapq.merge(*pages, key=lambda tweet: tweet.id, reverse=True)
+    return await _serialize_tweets(db, list(islice(tweets, limit)))
+
+
+async def get_tag_timeline(
+    db: AsyncSession, tag: str, before_id: Optional[int] = None, limit: int = 20
+) -> List[dict]:
+    """
+    Получает твиты с указанным хэштегом по убыванию идентификатора.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        tag (str): Хэштег с символом '#' или без него.
+        before_id (Optional[int]): Курсор: вернуть твиты с id меньше указанного.
+        limit (int): Максимальное количество твитов.
+
+    Returns:
+        List[dict]: Список словарей, содержащих информацию о твитах.
+    """
+    query = select(tweet_tags.c.tweet_id).where(tweet_tags.c.tag == normalize_tag(tag))
+    if before_id is not None:
+        query = query.where(tweet_tags.c.tweet_id < before_id)
+    result = await db.execute(query.order_by(tweet_tags.c.tweet_id.desc()).limit(limit))
+    tweets = await _load_tweets(db, result.scalars().all())
+    return await _serialize_tweets(db, tweets)
+
+
+async def get_mentions_timeline(
+    db: AsyncSession, user_id: int, before_id: Optional[int] = None, limit: int = 20
+) -> List[dict]:
+    """
+    Получает твиты, в которых упоминается пользователь.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        user_id (int): Идентификатор упомянутого пользователя.
+        before_id (Optional[int]): Курсор: вернуть твиты с id меньше указанного.
+        limit (int): Максимальное количество твитов.
+
+    Returns:
+        List[dict]: Список словарей, содержащих информацию о твитах.
+    """
+    query = select(tweet_mentions.c.tweet_id).where(tweet_mentions.c.user_id == user_id)
+    if before_id is not None:
+        query = query.where(tweet_mentions.c.tweet_id < before_id)
+    result = await db.execute(
+        query.order_by(tweet_mentions.c.tweet_id.desc()).limit(limit)
+    )
+    tweets = await _load_tweets(db, result.scalars().all())
+    return await _serialize_tweets(db, tweets)
+
+
 async def get_media_handler(db: AsyncSession, media_id: int) -> Media:
     """
     Получает медиафайл по идентификатору.
@@ -232,7 +703,9 @@ async def get_media_handler(db: AsyncSession, media_id: int) -> Media:
     Returns:
         Media: Объект медиафайла, если он найден, иначе None.
     """
-    result = await db.execute(select(Media).filter(Media.id == media_id))
+    result = await db.execute(
+        lambda_stmt(lambda: select(Media).where(Media.id == media_id))
+    )
     media = result.scalar_one_or_none()
     return media
 
@@ -249,9 +722,11 @@ async def get_followers(user_id: int, db: AsyncSession) -> List[dict]:
         List[dict]: Список словарей, содержащих идентификаторы и имена подписчиков.
     """
     result = await db.execute(
-        select(User)
-        .join(followers, User.id == followers.c.follower_id)
-        .where(followers.c.followed_id == user_id)
+        lambda_stmt(
+            lambda: select(User)
+            .join(followers, User.id == followers.c.follower_id)
+            .where(followers.c.followed_id == user_id)
+        )
     )
     followers_list = [
         {"id": follower.id, "name": follower.name}
@@ -272,9 +747,11 @@ async def get_following(user_id: int, db: AsyncSession) -> List[dict]:
         List[dict]: Список словарей, содержащих идентификаторы и имена подписок.
     """
     result = await db.execute(
-        select(User)
-        .join(followers, User.id == followers.c.followed_id)
-        .where(followers.c.follower_id == user_id)
+        lambda_stmt(
+            lambda: select(User)
+            .join(followers, User.id == followers.c.followed_id)
+            .where(followers.c.follower_id == user_id)
+        )
     )
     following_list = [
         {"id": following.id, "name": following.name}
@@ -294,10 +771,209 @@ async def get_user_by_id(user_id: int, db: AsyncSession) -> User:
     Returns:
         User: Объект пользователя, если он найден, иначе None.
     """
-    result = await db.execute(select(User).where(User.id == user_id))
+    result = await db.execute(
+        lambda_stmt(lambda: select(User).where(User.id == user_id))
+    )
     return result.scalar_one_or_none()
 
 
+async def get_users_summary(db: AsyncSession, user_ids: List[int]) -> List[dict]:
+    """
+    Получает пользователей с количеством подписчиков и подписок одним запросом.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        user_ids (List[int]): Идентификаторы пользователей.
+
+    Returns:
+        List[dict]: Найденные пользователи в порядке запроса.
+    """
+    followers_count = (
+        select(func.count())
+        .where(followers.c.followed_id == User.id)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    following_count = (
+        select(func.count())
+        .where(followers.c.follower_id == User.id)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(User.id, User.name, followers_count, following_count).where(
+            User.id.in_(user_ids)
+        )
+    )
+    users = {
+        user_id: {
+            "id": user_id,
+            "name": name,
+            "followers_count": followers_total,
+            "following_count": following_total,
+        }
+        for user_id, name, followers_total, following_total in result
+    }
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+
+async def get_media_info(db: AsyncSession, media_ids: List[int]) -> List[dict]:
+    """
+    Получает метаданные медиафайлов без загрузки их содержимого.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        media_ids (List[int]): Идентификаторы медиафайлов.
+
+    Returns:
+        List[dict]: Найденные медиафайлы в порядке запроса.
+    """
+    # octet_length читает размер из заголовка значения, не распаковывая его
+    result = await db.execute(
+        select(Media.id, Media.filename, func.octet_length(Media.file_data)).where(
+            Media.id.in_(media_ids)
+        )
+    )
+    medias = {
+        media_id: {
+            "id": media_id,
+            "filename": filename,
+            "size": size or 0,
+            "url": f"/api/media/{media_id}",
+        }
+        for media_id, filename, size in result
+    }
+    return [medias[media_id] for media_id in media_ids if media_id in medias]
+
+
+async def like_tweets(
+    db: AsyncSession, user_id: int, tweet_ids: List[int]
+) -> List[dict]:
+    """
+    Ставит лайки нескольким твитам, выполняя один запрос на шард.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        user_id (int): Идентификатор пользователя.
+        tweet_ids (List[int]): Идентификаторы твитов без повторов.
+
+    Returns:
+        List[dict]: Результат для каждого твита: liked, already_liked
+        или not_found.
+    """
+
+    async def like(session: AsyncSession, ids: List[int]) -> List[Row]:
+        requested = _requested_ids("requested", ids, BigInteger)
+        # Твиты ищутся только в секциях месяцев запрошенных идентификаторов
+        tweets = (
+            select(Tweet.id, Tweet.created_at)
+            .where(
+                Tweet.created_at
+                == any_(bindparam("tweet_times", type_=ARRAY(DateTime(timezone=True))))
+            )
+            .subquery("tweets")
+        )
+        inserted = (
+            insert(likes_table)
+            .from_select(
+                ["user_id", "tweet_id", "tweet_created_at"],
+                select(literal(user_id), tweets.c.id, tweets.c.created_at).join(
+                    requested, requested.c.id == tweets.c.id
+                ),
+            )
+            .on_conflict_do_nothing()
+            .returning(likes_table.c.tweet_id)
+            .cte("inserted")
+        )
+        result = await session.execute(
+            select(
+                requested.c.id,
+                tweets.c.id.is_not(None),
+                inserted.c.tweet_id.is_not(None),
+            )
+            .select_from(requested)
+            .outerjoin(tweets, tweets.c.id == requested.c.id)
+            .outerjoin(inserted, inserted.c.tweet_id == requested.c.id),
+            {"tweet_times": _tweet_keys(ids)["tweet_times"]},
+        )
+        rows = result.all()
+        if session is not db:
+            await session.commit()
+        return rows
+
+    pages = await shards.gather_groups(db, shards.map.group_tweets(tweet_ids), like)
+    statuses = {}
+    for tweet_id, exists, liked in (row for page in pages for row in page):
+        if liked:
+            statuses[tweet_id] = "liked"
+        else:
+            statuses[tweet_id] = "already_liked" if exists else "not_found"
+    events = [
+        {"type": "like", "tweet_id": tweet_id, "user_id": user_id, "delta": 1}
+        for tweet_id in tweet_ids
+        if statuses[tweet_id] == "liked"
+    ]
+    await notify_events(db, events)
+    await db.commit()
+    if events:
+        await bump_version(db, feed_version_seq)
+    return [{"id": tweet_id, "status": statuses[tweet_id]} for tweet_id in tweet_ids]
+
+
+async def follow_users(
+    db: AsyncSession, follower_id: int, user_ids: List[int]
+) -> List[dict]:
+    """
+    Подписывает пользователя на нескольких пользователей одним запросом.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        follower_id (int): Идентификатор пользователя, который подписывается.
+        user_ids (List[int]): Идентификаторы пользователей без повторов.
+
+    Returns:
+        List[dict]: Результат для каждого пользователя: followed,
+        already_following, not_found или self.
+    """
+    requested = _requested_ids("requested", user_ids)
+    inserted = (
+        insert(followers)
+        .from_select(
+            ["follower_id", "followed_id"],
+            select(literal(follower_id), User.id)
+            .join(requested, requested.c.id == User.id)
+            .where(User.id != follower_id),
+        )
+        .on_conflict_do_nothing()
+        .returning(followers.c.followed_id)
+        .cte("inserted")
+    )
+    result = await db.execute(
+        select(
+            requested.c.id,
+            User.id.is_not(None),
+            inserted.c.followed_id.is_not(None),
+        )
+        .select_from(requested)
+        .outerjoin(User, User.id == requested.c.id)
+        .outerjoin(inserted, inserted.c.followed_id == requested.c.id)
+    )
+    statuses = {}
+    for user_id, exists, followed in result:
+        if followed:
+            statuses[user_id] = "followed"
+        elif not exists:
+            statuses[user_id] = "not_found"
+        else:
+            statuses[user_id] = (
+                "self" if user_id == follower_id else "already_following"
+            )
+    await db.commit()
+    if "followed" in statuses.values():
+        await bump_version(db, follows_version_seq)
+    return [{"id": user_id, "status": statuses[user_id]} for user_id in user_ids]
+
+
 # Функция для добавления подписки на пользователя
 async def follow_user(follower_id: int, followed_id: int, db: AsyncSession) -> bool:
     """
@@ -317,11 +993,12 @@ async def follow_user(follower_id: int, followed_id: int, db: AsyncSession) -> b
     try:
         await db.execute(new_follow)
         await db.commit()
-        return True
     except Exception as e:
         # Обработка возможных исключений, например, если подписка уже существует
         await db.rollback()
         return False
+    await bump_version(db, follows_version_seq)
+    return True
 
 
 # Функция для удаления подписки на пользователя
@@ -344,97 +1021,9 @@ async def unfollow_user(follower_id: int, followed_id: int, db: AsyncSession) ->
     result = await db.execute(unfollow)
     if result.rowcount > 0:
         await db.commit()
+        await bump_version(db, follows_version_seq)
         return True
     else:
         # Если подписка не найдена
         await db.rollback()
         return False
-
-
-async def create_initial_data(session: AsyncSession) -> None:
-    """
-     Создает начальные данные в базе данных, включая пользователей, твиты, медиафайлы,
-     подписчиков и лайки для тестирования.
-
-    Эта функция создает начальный набор пользователей, твитов и медиафайлов,
-    если в базе данных еще нет данных. Если данные уже существуют, функция
-    прерывает свою работу.
-
-    Args:
-        session (AsyncSession): Асинхронная сессия базы данных для выполнения операций.
-
-    """
-    # Проверка на наличие данных
-    existing_user = await session.execute(select(User))
-    if existing_user.scalars().first():
-        print("База данных уже содержит данные. Процесс инициализации прерван.")
-        return
-
-        # Создаем пользователей
-    encrypted_api_key1 = EncryptedType(
-        LargeBinary, settings.SECRET_KEY, AesEngine, "pkcs5"
-    ).process_bind_param("test", None)
-    encrypted_api_key2 = EncryptedType(
-        LargeBinary, settings.SECRET_KEY, AesEngine, "pkcs5"
-    ).process_bind_param("test_2", None)
-    user1 = User(name="test", api_key=encrypted_api_key1)
-    user2 = User(name="User2", api_key=encrypted_api_key2)
-    session.add(user1)
-    session.add(user2)
-    await session.commit()
-
-    # Создаем твиты
-    tweet1 = Tweet(tweet_data="Hello, World! This is tweet 1", user_id=user1.id)
-    tweet2 = Tweet(tweet_data="This is tweet 2", user_id=user2.id)
-    tweet3 = Tweet(tweet_data="Another day, another tweet!", user_id=user1.id)
-    session.add(tweet1)
-    session.add(tweet2)
-    session.add(tweet3)
-    await session.commit()
-
-    # Читаем и добавляем изображения
-    with open("images/image_1.jpg", "rb") as file:
-        binary_data_1 = file.read()
-        media1 = Media(filename="image1.jpg", file_data=binary_data_1)
-        session.add(media1)
-
-    with open("images/image_2.jpg", "rb") as file:
-        binary_data_2 = file.read()
-        media2 = Media(filename="image2.jpg", file_data=binary_data_2)
-        session.add(media2)
-
-    with open("images/image_3.jpg", "rb") as file:
-        binary_data_3 = file.read()
-        media3 = Media(filename="image3.jpg", file_data=binary_data_3)
-        session.add(media3)
-
-    await session.commit()
-
-    # Обновляем твиты с ID медиа
-    tweet1.tweet_media_ids = [media1.id]
-    tweet2.tweet_media_ids = [media2.id]
-    tweet3.tweet_media_ids = [media3.id]
-    await session.commit()
-
-    # Добавляем подписчиков
-    user1_follow_user2 = followers.insert().values(
-        follower_id=user1.id, followed_id=user2.id
-    )
-    user2_follow_user1 = followers.insert().values(
-        follower_id=user2.id, followed_id=user1.id
-    )
-    # Выполняем запросы на добавление подписчиков
-    await session.execute(user1_follow_user2)
-    await session.execute(user2_follow_user1)
-    await session.commit()
-
-    # Добавляем лайки на твитах
-    like1 = likes_table.insert().values(tweet_id=tweet1.id, user_id=user2.id)
-    like2 = likes_table.insert().values(tweet_id=tweet2.id, user_id=user1.id)
-    like3 = likes_table.insert().values(tweet_id=tweet3.id, user_id=user2.id)
-    # Выполняем запросы на добавление лайков
-    await session.execute(like1)
-    await session.execute(like2)
-    await session.execute(like3)
-    await session.commit()
-    print("Начальные данные успешно созданы.")
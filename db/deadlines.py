@@ -0,0 +1,42 @@
+import asyncio
+import math
+from contextvars import ContextVar
+from typing import Optional
+
+# Код ошибки Postgres query_canceled: выражение отменено по statement_timeout
+# или запросом отмены от клиента
+QUERY_CANCELED = "57014"
+
+# Крайний срок текущего HTTP-запроса по часам цикла событий; None вне
+# запросов и для маршрутов без ограничения времени
+request_deadline: ContextVar[Optional[float]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+def remaining_time() -> Optional[float]:
+    """Возвращает время до крайнего срока запроса в секундах или None."""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+
+def set_statement_timeout(session, transaction, connection) -> None:
+    """
+    Ограничивает время выражений транзакции оставшимся временем запроса.
+
+    Обработчик события after_begin сессий: SET LOCAL действует до конца
+    транзакции, поэтому соединение возвращается в пул без ограничения,
+    а Postgres сам прерывает выражение, даже если клиент уже отключился.
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return
+    timeout_ms = max(math.ceil(remaining * 1000), 1)
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
+
+def is_statement_timeout(exc: BaseException) -> bool:
+    """Проверяет, что ошибка базы данных вызвана отменой выражения."""
+    return getattr(getattr(exc, "orig", None), "sqlstate", None) == QUERY_CANCELED
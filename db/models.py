@@ -8,18 +8,52 @@ from sqlalchemy import (
     ARRAY,
     LargeBinary,
     BLOB,
+    BigInteger,
+    DateTime,
+    ForeignKeyConstraint,
+    Index,
+    PrimaryKeyConstraint,
+    Sequence,
+    Text,
+    func,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy_utils import EncryptedType
 from sqlalchemy_utils.types.encrypted.encrypted_type import AesEngine
 
 from db.database import Base, settings
 
+
+class ApiKeyType(EncryptedType):
+    """
+    Тип зашифрованного ключа API с поддержкой кэша компиляции.
+
+    SQLAlchemy читает cache_ok только из словаря самого класса, а в
+    EncryptedType этот атрибут унаследован, поэтому запросы со сравнением
+    по ключу API не кэшировались (SAWarning о cache_ok). Параметры типа
+    задаются при объявлении столбца и не меняются.
+    """
+
+    cache_ok = True
+
+
+# Лайки секционируются по месяцу создания твита: лайки твита находятся
+# в секции того же месяца, что и сам твит, и архивируются вместе с ним
+# (см. db.partitions)
 likes_table = Table(
     "likes",
     Base.metadata,
     Column("user_id", ForeignKey("users.id"), primary_key=True, index=True),
-    Column("tweet_id", ForeignKey("tweets.id"), primary_key=True, index=True),
+    Column("tweet_id", BigInteger, primary_key=True, index=True),
+    Column("tweet_created_at", DateTime(timezone=True), primary_key=True),
+    Column(
+        "created_at", DateTime(timezone=True), server_default=func.now(), nullable=False
+    ),
+    ForeignKeyConstraint(
+        ["tweet_id", "tweet_created_at"], ["tweets.id", "tweets.created_at"]
+    ),
+    postgresql_partition_by="RANGE (tweet_created_at)",
 )
 
 followers = Table(
@@ -29,6 +63,40 @@ followers = Table(
     Column("followed_id", ForeignKey("users.id"), primary_key=True, index=True),
 )
 
+# Счетчики изменений для ETag: увеличиваются после фиксации записей,
+# влияющих на ленту (твиты, лайки) и на профили (подписки)
+feed_version_seq = Sequence("feed_version_seq", metadata=Base.metadata)
+follows_version_seq = Sequence("follows_version_seq", metadata=Base.metadata)
+
+# Счетчик в младших битах идентификаторов твитов (см. db.sharding)
+tweet_id_seq = Sequence("tweets_id_seq", metadata=Base.metadata)
+
+# Инвертированный индекс хэштегов: первичный ключ (tag, tweet_id) позволяет
+# читать ленту по тегу одним проходом по индексу в порядке убывания id.
+# Индексы хэштегов и упоминаний общие для всех шардов и хранятся в основной
+# базе, поэтому внешнего ключа на tweets нет
+tweet_tags = Table(
+    "tweet_tags",
+    Base.metadata,
+    Column("tag", String(length=100), primary_key=True),
+    Column("tweet_id", BigInteger, primary_key=True, index=True),
+    Column(
+        "created_at",
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        index=True,
+    ),
+)
+
+# Упоминания пользователей в твитах
+tweet_mentions = Table(
+    "tweet_mentions",
+    Base.metadata,
+    Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("tweet_id", BigInteger, primary_key=True, index=True),
+)
+
 
 class User(Base):
     """Модель для хранения информации о пользователях."""
@@ -36,7 +104,7 @@ class User(Base):
     __tablename__ = "users"
     id: int = Column(Integer, primary_key=True, index=True, autoincrement=True)
     api_key: BLOB = Column(
-        EncryptedType(String, settings.SECRET_KEY, AesEngine, "pkcs5"), unique=True
+        ApiKeyType(String, settings.SECRET_KEY, AesEngine, "pkcs5"), unique=True
     )
     name: str = Column(String(length=50))
 
@@ -64,12 +132,21 @@ class User(Base):
         back_populates="followed",
     )
 
+    __table_args__ = (
+        # Поиск упоминаемых пользователей по имени без учета регистра
+        Index("ix_users_name_lower", func.lower(name)),
+    )
+
 
 class Tweet(Base):
     """Модель для хранения информации о твитах."""
 
     __tablename__ = "tweets"
-    id: int = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    # Идентификатор формируется при вставке (db.sharding.tweet_id_expression)
+    id: int = Column(BigInteger, nullable=False, autoincrement=False)
+    # Время создания совпадает со временем из идентификатора
+    # (db.sharding.tweet_created_at), поэтому по id твита известна его секция
+    created_at = Column(DateTime(timezone=True), nullable=False)
     tweet_data: str = Column(String(length=10000))
     tweet_media_ids: List[int] = Column(ARRAY(Integer), nullable=True)
     user_id: int = Column(Integer, ForeignKey("users.id"), index=True)
@@ -80,6 +157,16 @@ class Tweet(Base):
     # Отношение твитов к лайкам
     liked_by = relationship("User", secondary=likes_table, back_populates="likes")
 
+    __table_args__ = (
+        # Ключ секционирования входит в первичный ключ. Порядок (created_at, id)
+        # совпадает с порядком ленты, поэтому ее страница читается с конца
+        # индекса последних секций
+        PrimaryKeyConstraint("created_at", "id", name="tweets_pkey"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    # Внутри приложения твит однозначно определяется идентификатором
+    __mapper_args__ = {"primary_key": [id]}
+
 
 class Media(Base):
     """Модель для хранения изображений."""
@@ -88,3 +175,31 @@ class Media(Base):
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String)
     file_data = Column(LargeBinary)
+
+
+class Job(Base):
+    """Модель для хранения фоновых задач, выполняемых после записи."""
+
+    __tablename__ = "jobs"
+    id: int = Column(BigInteger, primary_key=True, autoincrement=True)
+    kind: str = Column(String(length=100), nullable=False)
+    payload: dict = Column(JSONB, nullable=False, default=dict)
+    # queued - ожидает выполнения, running - взята воркером, failed - попытки исчерпаны
+    status: str = Column(String(length=20), nullable=False, default="queued")
+    attempts: int = Column(Integer, nullable=False, default=0)
+    max_attempts: int = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error: str = Column(Text, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (
+        # Частичный индекс содержит только незавершенные задачи
+        Index(
+            "ix_jobs_pending",
+            "run_at",
+            postgresql_where=status.in_(("queued", "running")),
+        ),
+    )
@@ -0,0 +1,260 @@
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from .sharding import EPOCH, LEGACY_ID_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# Секционированные таблицы и их ключи в порядке создания секций: секция
+# лайков ссылается на твиты, поэтому при архивации порядок обратный
+PARTITIONED_TABLES = (
+    ("tweets", "created_at"),
+    ("likes", "tweet_created_at"),
+)
+PARTITION_NAME = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+# Ключ рекомендательной блокировки обслуживания секций
+MAINTENANCE_LOCK_KEY = 0x70617274
+# Месяц EPOCH: сюда попадают все твиты, созданные до перехода на
+# идентификаторы с временем создания (id меньше LEGACY_ID_LIMIT)
+LEGACY_MONTH = datetime.fromtimestamp(EPOCH, timezone.utc).date().replace(day=1)
+
+
+class Partition(NamedTuple):
+    """Месячная секция таблицы."""
+
+    table: str
+    name: str
+    month: date
+
+
+def month_start(moment: date) -> date:
+    """Возвращает первый день месяца."""
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """
+    Сдвигает первый день месяца на указанное количество месяцев.
+
+    Args:
+        month (date): Первый день месяца.
+        months (int): Количество месяцев, может быть отрицательным.
+
+    Returns:
+        date: Первый день полученного месяца.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Возвращает имя секции таблицы за месяц, например tweets_p2024_01."""
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_ddl(table: str, month: date) -> str:
+    """
+    Формирует команду создания секции таблицы за месяц.
+
+    Границы задаются в UTC, поэтому не зависят от часового пояса сессии.
+
+    Args:
+        table (str): Секционированная таблица.
+        month (date): Первый день месяца.
+
+    Returns:
+        str: Команда CREATE TABLE ... PARTITION OF.
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+        f"PARTITION OF {table} FOR VALUES "
+        f"FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+
+
+async def list_partitions(connection: AsyncConnection) -> List[Partition]:
+    """
+    Возвращает месячные секции твитов и лайков текущей схемы.
+
+    Args:
+        connection (AsyncConnection): Соединение с базой данных.
+
+    Returns:
+        List[Partition]: Секции, упорядоченные по таблице и месяцу.
+    """
+    result = await connection.execute(
+        text(
+            "SELECT parent.relname, child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relnamespace = current_schema()::regnamespace "
+            "AND parent.relname = ANY(:tables)"
+        ),
+        {"tables": [table for table, _ in PARTITIONED_TABLES]},
+    )
+    partitions = []
+    for table, name in result.all():
+        match = PARTITION_NAME.match(name)
+        if match and match["table"] == table:
+            month = date(int(match["year"]), int(match["month"]), 1)
+            partitions.append(Partition(table, name, month))
+    return sorted(partitions, key=lambda partition: (partition.table, partition.month))
+
+
+async def lock_partitions(connection: AsyncConnection) -> None:
+    """
+    Захватывает блокировку обслуживания секций до конца транзакции.
+
+    Секции создают процессы приложения, воркеры и команды обслуживания;
+    одновременные CREATE TABLE ... PARTITION OF одной секции завершились бы
+    ошибкой, поэтому обслуживание в каждой базе выполняется по очереди.
+
+    Args:
+        connection (AsyncConnection): Соединение с открытой транзакцией.
+    """
+    await connection.execute(
+        text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+    )
+
+
+async def create_partitions(
+    connection: AsyncConnection, first: date, last: date
+) -> List[str]:
+    """
+    Создает недостающие секции твитов и лайков за месяцы с first по last.
+
+    Args:
+        connection (AsyncConnection): Соединение с базой данных.
+        first (date): Первый месяц.
+        last (date): Последний месяц включительно.
+
+    Returns:
+        List[str]: Имена созданных секций.
+    """
+    existing = {partition.name for partition in await list_partitions(connection)}
+    created = []
+    month = month_start(first)
+    while month <= last:
+        for table, _ in PARTITIONED_TABLES:
+            if partition_name(table, month) not in existing:
+                await connection.execute(text(partition_ddl(table, month)))
+                created.append(partition_name(table, month))
+        month = add_months(month, 1)
+    return created
+
+
+async def ensure_partitions(
+    connection: AsyncConnection, months_ahead: int, today: Optional[date] = None
+) -> List[str]:
+    """
+    Создает секции текущего месяца и months_ahead следующих.
+
+    Вставка твита в месяц без секции завершается ошибкой, поэтому функция
+    периодически вызывается процессами приложения и воркерами
+    (services.partitions) и командой python -m cli.partitions maintain.
+
+    Args:
+        connection (AsyncConnection): Соединение с базой данных.
+        months_ahead (int): Количество месяцев вперед.
+        today (Optional[date]): Текущая дата, по умолчанию - сегодня (UTC).
+
+    Returns:
+        List[str]: Имена созданных секций.
+    """
+    current = month_start(today or datetime.now(timezone.utc).date())
+    return await create_partitions(
+        connection, current, add_months(current, months_ahead)
+    )
+
+
+async def archive_partitions(
+    connection: AsyncConnection,
+    before: date,
+    schema: str,
+    drop: bool = False,
+    include_legacy: bool = False,
+) -> List[str]:
+    """
+    Отсоединяет секции твитов и лайков за месяцы раньше before.
+
+    Отсоединенные секции переносятся в схему архива, где их можно читать
+    или выгрузить, либо удаляются при drop. Твиты из архива не попадают
+    в ленты и поиск по хэштегам. Отсоединение ненадолго блокирует таблицу,
+    поэтому команду лучше выполнять при низкой нагрузке.
+
+    Все твиты со старыми идентификаторами, независимо от настоящей даты
+    создания, лежат в секции LEGACY_MONTH. Пока в ней есть такие твиты,
+    секции этого месяца пропускаются, если не задан include_legacy.
+
+    Args:
+        connection (AsyncConnection): Соединение с базой данных.
+        before (date): Первый месяц, который остается в таблицах.
+        schema (str): Схема для отсоединенных секций.
+        drop (bool): Удалить секции вместо переноса в архив.
+        include_legacy (bool): Отсоединять секции LEGACY_MONTH вместе
+            с твитами со старыми идентификаторами.
+
+    Returns:
+        List[str]: Имена отсоединенных секций.
+    """
+    partitions = [
+        partition
+        for partition in await list_partitions(connection)
+        if partition.month < month_start(before)
+    ]
+    legacy_tweets = partition_name(PARTITIONED_TABLES[0][0], LEGACY_MONTH)
+    if not include_legacy and any(
+        partition.name == legacy_tweets for partition in partitions
+    ):
+        has_legacy = await connection.scalar(
+            text(f"SELECT EXISTS (SELECT 1 FROM {legacy_tweets} WHERE id < :limit)"),
+            {"limit": LEGACY_ID_LIMIT},
+        )
+        if has_legacy:
+            logger.warning(
+                "Секции за %s содержат твиты со старыми идентификаторами "
+                "и не отсоединяются без include_legacy",
+                f"{LEGACY_MONTH:%Y-%m}",
+            )
+            partitions = [
+                partition for partition in partitions if partition.month != LEGACY_MONTH
+            ]
+    order = {table: index for index, (table, _) in enumerate(PARTITIONED_TABLES)}
+    # Лайки отсоединяются раньше твитов, на которые они ссылаются
+    partitions.sort(key=lambda partition: (partition.month, -order[partition.table]))
+    if partitions and not drop:
+        await connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+
+    archived = []
+    for partition in partitions:
+        await connection.execute(
+            text(f"ALTER TABLE {partition.table} DETACH PARTITION {partition.name}")
+        )
+        # Отсоединенная секция лайков сохраняет внешний ключ на твиты и
+        # помешала бы отсоединить секцию твитов того же месяца
+        foreign_keys = await connection.execute(
+            text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = CAST(:name AS regclass) AND contype = 'f' "
+                "AND confrelid = CAST(:parent AS regclass)"
+            ),
+            {"name": partition.name, "parent": PARTITIONED_TABLES[0][0]},
+        )
+        for (constraint,) in foreign_keys.all():
+            await connection.execute(
+                text(f'ALTER TABLE {partition.name} DROP CONSTRAINT "{constraint}"')
+            )
+        if drop:
+            await connection.execute(text(f"DROP TABLE {partition.name}"))
+        else:
+            await connection.execute(
+                text(f'ALTER TABLE {partition.name} SET SCHEMA "{schema}"')
+            )
+        archived.append(partition.name)
+    return archived
@@ -0,0 +1,29 @@
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+# Сколько запросов сохранять для журнала медленных запросов
+MAX_RECORDED_STATEMENTS = 50
+
+
+class QueryStats:
+    """Статистика обращений к базе данных в рамках одного HTTP-запроса."""
+
+    __slots__ = ("queries", "db_time", "pool_wait", "statements")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.statements: List[Tuple[str, float]] = []
+
+    def record_query(self, statement: str, duration: float) -> None:
+        self.queries += 1
+        self.db_time += duration
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements.append((statement, duration))
+
+
+# Статистика текущего запроса; None вне HTTP-запросов (фоновые задачи и т.п.)
+request_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "request_stats", default=None
+)
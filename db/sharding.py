@@ -0,0 +1,322 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from sqlalchemy import BigInteger, MetaData, cast, extract, func
+from sqlalchemy import Sequence as SqlSequence
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql.elements import ColumnElement
+
+from config import settings
+from .database import async_session, engine, make_engine
+from .models import Tweet, likes_table, tweet_id_seq
+
+T = TypeVar("T")
+
+# Идентификатор твита занимает 53 бита и точно представляется числом
+# JavaScript: секунды от EPOCH (32 бита) | логический шард (5 бит) |
+# счетчик (16 бит). Идентификаторы упорядочены по времени во всех шардах,
+# поэтому курсор before_id общий для всей ленты
+EPOCH = 1704067200  # 2024-01-01 00:00:00 UTC
+SHARD_BITS = 5
+SEQUENCE_BITS = 16
+LOGICAL_SHARDS = 1 << SHARD_BITS
+# Твиты, созданные до перехода на такие идентификаторы, имеют id меньше 2**31
+# и хранятся в основной базе
+LEGACY_ID_LIMIT = 1 << 31
+PRIMARY = 0
+
+
+def make_tweet_id(seconds: int, shard: int, sequence: int) -> int:
+    """
+    Собирает идентификатор твита из частей.
+
+    Args:
+        seconds (int): Секунды от EPOCH.
+        shard (int): Логический шард автора.
+        sequence (int): Значение счетчика, используются младшие 16 бит.
+
+    Returns:
+        int: Идентификатор твита.
+    """
+    return (
+        (seconds << (SHARD_BITS + SEQUENCE_BITS))
+        | (shard << SEQUENCE_BITS)
+        | (sequence & ((1 << SEQUENCE_BITS) - 1))
+    )
+
+
+def parse_tweet_id(tweet_id: int) -> Tuple[int, int, int]:
+    """
+    Разбирает идентификатор твита на части.
+
+    Args:
+        tweet_id (int): Идентификатор твита.
+
+    Returns:
+        Tuple[int, int, int]: Секунды от EPOCH, логический шард и счетчик.
+    """
+    return (
+        tweet_id >> (SHARD_BITS + SEQUENCE_BITS),
+        (tweet_id >> SEQUENCE_BITS) & (LOGICAL_SHARDS - 1),
+        tweet_id & ((1 << SEQUENCE_BITS) - 1),
+    )
+
+
+def tweet_created_at(tweet_id: int) -> datetime:
+    """
+    Возвращает время создания твита, записанное в его идентификаторе.
+
+    Значение совпадает со столбцом tweets.created_at и определяет секцию
+    твита и его лайков. Твиты с id меньше LEGACY_ID_LIMIT относятся
+    к первым минутам EPOCH.
+
+    Args:
+        tweet_id (int): Идентификатор твита.
+
+    Returns:
+        datetime: Время создания с точностью до секунды (UTC).
+    """
+    return datetime.fromtimestamp(EPOCH + parse_tweet_id(tweet_id)[0], timezone.utc)
+
+
+def user_shard(user_id: int) -> int:
+    """Возвращает логический шард твитов пользователя."""
+    return user_id % LOGICAL_SHARDS
+
+
+def _insert_seconds() -> ColumnElement:
+    # Время начала выражения одинаково во всех его вызовах, поэтому
+    # идентификатор и created_at одной вставки вычисляются из одной секунды
+    return (
+        cast(func.floor(extract("epoch", func.statement_timestamp())), BigInteger)
+        - EPOCH
+    )
+
+
+def tweet_id_expression(shard: int) -> ColumnElement:
+    """
+    Формирует SQL-выражение нового идентификатора твита.
+
+    Время берется из часов базы данных, а счетчик - из последовательности
+    шарда, поэтому идентификаторы уникальны для всех процессов приложения,
+    пока в одну базу вставляется не более 65536 твитов в секунду.
+
+    Args:
+        shard (int): Логический шард автора.
+
+    Returns:
+        ColumnElement: Выражение для значения столбца tweets.id.
+    """
+    seconds = _insert_seconds()
+    # Части не пересекаются по битам, поэтому сдвиги и OR заменены
+    # умножением и сложением, определенными для bigint и integer
+    return (
+        seconds * (1 << (SHARD_BITS + SEQUENCE_BITS))
+        + (shard << SEQUENCE_BITS)
+        + tweet_id_seq.next_value() % (1 << SEQUENCE_BITS)
+    )
+
+
+def tweet_created_at_expression() -> ColumnElement:
+    """
+    Формирует SQL-выражение времени создания твита для той же вставки,
+    что и tweet_id_expression.
+
+    Returns:
+        ColumnElement: Выражение для значения столбца tweets.created_at.
+    """
+    return func.to_timestamp(_insert_seconds() + EPOCH)
+
+
+class ShardMap:
+    """
+    Соответствие логических шардов физическим базам данных.
+
+    Логический шард автора входит в идентификатор твита, поэтому твит
+    находится без обращения к каталогу, а при добавлении баз достаточно
+    перенести данные логических шардов и изменить карту.
+    """
+
+    def __init__(
+        self, databases: int, assignments: Optional[Sequence[int]] = None
+    ) -> None:
+        if assignments:
+            if len(assignments) != LOGICAL_SHARDS:
+                raise ValueError(
+                    f"Карта шардов должна содержать {LOGICAL_SHARDS} элемента"
+                )
+            if any(not 0 <= database < databases for database in assignments):
+                raise ValueError("Карта шардов ссылается на несуществующую базу")
+            self.assignments = list(assignments)
+        else:
+            self.assignments = [shard % databases for shard in range(LOGICAL_SHARDS)]
+        self.databases = databases
+
+    def for_user(self, user_id: int) -> int:
+        """Возвращает номер базы с твитами пользователя."""
+        return self.assignments[user_shard(user_id)]
+
+    def for_tweet(self, tweet_id: int) -> int:
+        """Возвращает номер базы, в которой хранится твит и его лайки."""
+        if tweet_id < LEGACY_ID_LIMIT:
+            return PRIMARY
+        return self.assignments[parse_tweet_id(tweet_id)[1]]
+
+    def group_tweets(self, tweet_ids: Iterable[int]) -> Dict[int, List[int]]:
+        """
+        Группирует идентификаторы твитов по базам данных.
+
+        Args:
+            tweet_ids (Iterable[int]): Идентификаторы твитов.
+
+        Returns:
+            Dict[int, List[int]]: Идентификаторы по номеру базы в исходном порядке.
+        """
+        groups: Dict[int, List[int]] = {}
+        for tweet_id in tweet_ids:
+            groups.setdefault(self.for_tweet(tweet_id), []).append(tweet_id)
+        return groups
+
+
+class ShardRouter:
+    """
+    Движки и сессии шардов твитов и лайков.
+
+    Шард 0 - основная база с пользователями, подписками и медиафайлами;
+    для него используется сессия вызывающего кода, поэтому без
+    дополнительных шардов запросы выполняются так же, как раньше.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str] = (),
+        assignments: Optional[Sequence[int]] = None,
+    ) -> None:
+        self.engines: List[AsyncEngine] = [engine]
+        self.sessions = [async_session]
+        for url in urls:
+            shard_engine = make_engine(url)
+            self.engines.append(shard_engine)
+            self.sessions.append(
+                sessionmaker(
+                    bind=shard_engine,
+                    class_=AsyncSession,
+                    expire_on_commit=False,
+                    autoflush=False,
+                )
+            )
+        self.map = ShardMap(len(self.engines), assignments)
+
+    @property
+    def count(self) -> int:
+        return len(self.engines)
+
+    @asynccontextmanager
+    async def session(
+        self, db: AsyncSession, shard: int
+    ) -> AsyncIterator[AsyncSession]:
+        """
+        Открывает сессию шарда.
+
+        Args:
+            db (AsyncSession): Сессия основной базы вызывающего кода.
+            shard (int): Номер базы.
+
+        Yields:
+            AsyncSession: Сессия db для основной базы или новая сессия шарда.
+        """
+        if shard == PRIMARY:
+            yield db
+            return
+        async with self.sessions[shard]() as session:
+            yield session
+
+    async def gather(
+        self, db: AsyncSession, load: Callable[[AsyncSession], Awaitable[T]]
+    ) -> List[T]:
+        """
+        Выполняет загрузку на всех шардах одновременно.
+
+        Args:
+            db (AsyncSession): Сессия основной базы вызывающего кода.
+            load (Callable): Загрузка, получающая сессию шарда.
+
+        Returns:
+            List[T]: Результаты в порядке номеров баз.
+        """
+        return await self.gather_groups(
+            db, {shard: None for shard in range(self.count)}, lambda s, _: load(s)
+        )
+
+    async def gather_groups(
+        self,
+        db: AsyncSession,
+        groups: Dict[int, T],
+        load: Callable[[AsyncSession, T], Awaitable],
+    ) -> list:
+        """
+        Выполняет загрузку на указанных шардах одновременно.
+
+        Args:
+            db (AsyncSession): Сессия основной базы вызывающего кода.
+            groups (Dict[int, T]): Аргумент загрузки для каждого номера базы.
+            load (Callable): Загрузка, получающая сессию шарда и аргумент.
+
+        Returns:
+            list: Результаты в порядке groups.
+        """
+
+        async def run(shard: int, argument: T):
+            async with self.session(db, shard) as session:
+                return await load(session, argument)
+
+        return list(
+            await asyncio.gather(
+                *(run(shard, argument) for shard, argument in groups.items())
+            )
+        )
+
+    async def dispose(self) -> None:
+        """Закрывает пулы дополнительных шардов."""
+        for shard_engine in self.engines[1:]:
+            await shard_engine.dispose()
+
+
+def shard_metadata() -> MetaData:
+    """
+    Схема дополнительного шарда: твиты, лайки и счетчик идентификаторов.
+
+    Пользователи хранятся только в основной базе, поэтому внешние ключи
+    на users в схему шарда не входят.
+
+    Returns:
+        MetaData: Метаданные таблиц шарда.
+    """
+    metadata = MetaData()
+    SqlSequence(tweet_id_seq.name, metadata=metadata)
+    for table in (Tweet.__table__, likes_table):
+        shard_table = table.to_metadata(metadata)
+        for constraint in list(shard_table.foreign_key_constraints):
+            if constraint.elements[0].target_fullname.startswith("users."):
+                shard_table.constraints.discard(constraint)
+                for element in constraint.elements:
+                    element.parent.foreign_keys.discard(element)
+                    shard_table.foreign_keys.discard(element)
+    return metadata
+
+
+shards = ShardRouter(settings.DB_SHARDS, settings.DB_SHARD_MAP)
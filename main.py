@@ -1,32 +1,101 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse
 from httpx import AsyncClient, ASGITransport
-from starlette.staticfiles import StaticFiles
 
-from db.database import init_db, async_session
-from db.db_handlers import create_initial_data
+from config import settings
+from db.database import engine
+from db.sharding import shards
+from middleware.admission import AdmissionMiddleware
+from middleware.deadline import DeadlineMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.profiling import ProfilingMiddleware
+from middleware.static import PrecompressedStaticFiles
+from middleware.timing import RequestTimingMiddleware
 from routes.tweets_routes import router as tweets_routes
 from routes.users_routes import router as users_routes
 from routes.medias_routes import router as medias_routes
+from routes.stream_routes import router as stream_routes
+from routes.service_routes import router as service_routes
+from routes.profiling_routes import router as profiling_routes
+from services.broadcaster import event_bridge
+from services.jobs import job_worker
+from services.metrics import mark_process_dead
+from services.partitions import partition_maintainer
+from services.profiler import profile_store
+from services.warmup import warm_up
+import services.tasks  # noqa: F401  регистрирует обработчики фоновых задач
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Схема создается миграциями (alembic upgrade head), а начальные данные -
+    # командой python -m cli.seed, поэтому запуск процесса только прогревает
+    # пул соединений и кэши
+    await warm_up(engine, settings.DB_POOL_SIZE)
+    await event_bridge.start()
+    if settings.JOBS_IN_PROCESS:
+        await job_worker.start()
+    await partition_maintainer.start()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    await partition_maintainer.stop()
+    await job_worker.stop()
+    await event_bridge.stop()
+    await shards.dispose()
+    await engine.dispose()
+    mark_process_dead()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
+app.state.ready = False
 client = AsyncClient(transport=ASGITransport(app=app))
 app.include_router(tweets_routes)
 app.include_router(users_routes)
 app.include_router(medias_routes)
+app.include_router(stream_routes)
+app.include_router(service_routes)
+if settings.PROFILING_ENABLED:
+    app.include_router(profiling_routes)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-
-async def fill_database():
-    async with async_session() as session:
-        await create_initial_data(session)
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 
-
-@app.on_event("startup")
-async def startup_event():
-    await init_db()
-    await fill_database()
+if settings.REQUEST_DEADLINE_ENABLED:
+    # Внутри ограничения одновременных запросов: время в очереди ограничено
+    # ее собственным тайм-аутом и не расходует срок обработчика
+    app.add_middleware(
+        DeadlineMiddleware,
+        timeout=settings.REQUEST_DEADLINE_SECONDS,
+        route_timeouts=settings.REQUEST_DEADLINE_ROUTE_TIMEOUTS,
+    )
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        max_concurrency=settings.ADMISSION_MAX_CONCURRENCY
+        or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+        queue_size=settings.ADMISSION_QUEUE_SIZE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+        route_limits=settings.ADMISSION_ROUTE_LIMITS,
+    )
+if settings.REQUEST_TIMING_ENABLED:
+    app.add_middleware(
+        RequestTimingMiddleware, slow_threshold_ms=settings.SLOW_REQUEST_THRESHOLD_MS
+    )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.PROFILING_ENABLED:
+    # Самый внешний слой: в профиль попадает работа остальных middleware
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        token=settings.PROFILING_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        interval=settings.PROFILING_INTERVAL,
+        output_format=settings.PROFILING_FORMAT,
+    )
 
 
 @app.exception_handler(HTTPException)
@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import itertools
+import json
+from typing import Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from services.media_cache import media_cache
+from services.metrics import ADMISSION_QUEUED, ADMISSION_REJECTED
+from .routing import RouteTemplates
+
+# Приоритеты очереди: меньшее значение обслуживается раньше
+PRIORITY_READ = 0
+PRIORITY_WRITE = 1
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Потоки событий, служебные эндпоинты и статика не используют пул
+# соединений или держат запрос открытым долго, поэтому не ограничиваются
+BYPASS_PREFIXES = ("/api/stream", "/health", "/metrics", "/static")
+MEDIA_ROUTE = "/api/media/{media_id}"
+
+
+class Overloaded(Exception):
+    """Запрос не может быть принят из-за перегрузки."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class PriorityLimiter:
+    """
+    Ограничитель одновременных запросов с приоритетной очередью ожидания.
+
+    Освободившееся место передается ожидающему запросу с наивысшим
+    приоритетом, а среди равных - пришедшему раньше. Если очередь заполнена,
+    новый запрос вытесняет из нее последний запрос с более низким
+    приоритетом, поэтому чтения не ждут за записями.
+    """
+
+    def __init__(self, capacity: int, queue_size: int, queue_timeout: float) -> None:
+        self.capacity = capacity
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    def _remove(self, entry: Tuple[int, int, asyncio.Future]) -> None:
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            return
+        heapq.heapify(self._waiters)
+        ADMISSION_QUEUED.dec()
+
+    async def acquire(self, priority: int) -> None:
+        """
+        Занимает место, при необходимости ожидая в очереди.
+
+        Args:
+            priority (int): Приоритет запроса.
+
+        Raises:
+            Overloaded: Если очередь заполнена, запрос вытеснен из очереди
+                или время ожидания истекло.
+        """
+        if self.active < self.capacity and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            if not self._waiters:
+                raise Overloaded("queue_full")
+            lowest = max(self._waiters)
+            if lowest[0] <= priority:
+                raise Overloaded("queue_full")
+            self._remove(lowest)
+            lowest[2].set_exception(Overloaded("displaced"))
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._counter), future)
+        heapq.heappush(self._waiters, entry)
+        ADMISSION_QUEUED.inc()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._remove(entry)
+            raise Overloaded("timeout")
+        except asyncio.CancelledError:
+            self._remove(entry)
+            if future.done() and not future.cancelled() and not future.exception():
+                # Место уже было передано этому запросу: отдаем его следующему
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Освобождает место и передает его первому запросу в очереди."""
+        while self._waiters:
+            entry = heapq.heappop(self._waiters)
+            ADMISSION_QUEUED.dec()
+            if not entry[2].done():
+                entry[2].set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    """
+    Ограничивает число одновременно обрабатываемых запросов.
+
+    Общий лимит по умолчанию равен емкости пула соединений, поэтому запросы
+    ждут не соединение в пуле, а место в ограниченной очереди, и при перегрузке
+    сразу получают 503 с Retry-After, вместо того чтобы дождаться тайм-аута
+    клиента после выполнения работы. Отдельные маршруты, например загрузка
+    медиафайлов, дополнительно ограничиваются своими лимитами; ключ лимита -
+    шаблон пути или метод и шаблон через пробел.
+
+    Чтения имеют приоритет над записями. Медиафайлы из кэша отдаются
+    без ограничений, так как не обращаются к базе данных.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: int,
+        queue_size: int,
+        queue_timeout: float,
+        retry_after: int,
+        route_limits: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.app = app
+        self.routes = RouteTemplates()
+        self.retry_after = retry_after
+        self.limiter = PriorityLimiter(max_concurrency, queue_size, queue_timeout)
+        self.route_limiters = {
+            route: PriorityLimiter(limit, queue_size, queue_timeout)
+            for route, limit in (route_limits or {}).items()
+        }
+
+    def _bypass(self, scope: Scope, route: str, path_params: dict) -> bool:
+        if scope["path"].startswith(BYPASS_PREFIXES):
+            return True
+        if route == MEDIA_ROUTE:
+            try:
+                return media_cache.contains(int(path_params["media_id"]))
+            except (KeyError, ValueError):
+                return False
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route, path_params = self.routes.match(scope)
+        if self._bypass(scope, route, path_params):
+            await self.app(scope, receive, send)
+            return
+
+        priority = PRIORITY_READ if scope["method"] in READ_METHODS else PRIORITY_WRITE
+        route_limiter = self.route_limiters.get(
+            f"{scope['method']} {route}"
+        ) or self.route_limiters.get(route)
+        acquired = []
+        try:
+            for limiter in (route_limiter, self.limiter):
+                if limiter is not None:
+                    await limiter.acquire(priority)
+                    acquired.append(limiter)
+        except Overloaded as exc:
+            for limiter in acquired:
+                limiter.release()
+            ADMISSION_REJECTED.labels(route, exc.reason).inc()
+            await self._reject(send)
+            return
+        except BaseException:
+            for limiter in acquired:
+                limiter.release()
+            raise
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in acquired:
+                limiter.release()
+
+    async def _reject(self, send: Send) -> None:
+        body = json.dumps(
+            {
+                "result": "false",
+                "error_type": "Overloaded",
+                "error_message": "Server is overloaded, retry later",
+            }
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
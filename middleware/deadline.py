@@ -0,0 +1,176 @@
+import asyncio
+from typing import Callable, Dict, Optional
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from db.deadlines import is_statement_timeout, request_deadline
+from services.metrics import REQUESTS_CANCELLED
+from .routing import RouteTemplates
+
+# Потоки событий держат запрос открытым долго, а служебные эндпоинты
+# и статика не обращаются к базе данных
+BYPASS_PREFIXES = ("/api/stream", "/health", "/metrics", "/static")
+
+
+class ClientWatcher:
+    """
+    Следит за отключением клиента во время обработки запроса.
+
+    Пока приложение читает тело запроса, сообщения передаются ему напрямую.
+    После тела единственное возможное сообщение - http.disconnect, поэтому
+    дальше receive читается фоновой задачей, которая сообщает об отключении
+    и передает сообщение приложению, если оно его ждет.
+    """
+
+    def __init__(self, receive: Receive, on_disconnect: Callable[[], None]) -> None:
+        self._receive = receive
+        self._on_disconnect = on_disconnect
+        self._queue: "asyncio.Queue[Message]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self.disconnected = False
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _watch(self) -> None:
+        while True:
+            message = await self._receive()
+            self._queue.put_nowait(message)
+            if message["type"] == "http.disconnect":
+                self.disconnected = True
+                self._on_disconnect()
+                return
+
+    async def receive(self) -> Message:
+        if self._task is not None:
+            return await self._queue.get()
+        message = await self._receive()
+        if message["type"] == "http.request" and not message.get("more_body", False):
+            self.start()
+        elif message["type"] == "http.disconnect":
+            self.disconnected = True
+        return message
+
+
+def _has_body(scope: Scope) -> bool:
+    headers = Headers(scope=scope)
+    return "transfer-encoding" in headers or headers.get("content-length", "0") != "0"
+
+
+class DeadlineMiddleware:
+    """
+    Ограничивает время обработки запроса крайним сроком маршрута.
+
+    Крайний срок записывается в контекст запроса, и каждая транзакция
+    сессий получает statement_timeout по оставшемуся времени
+    (db.deadlines). Обработчик выполняется отдельной задачей: когда срок
+    истекает или клиент отключается, задача отменяется вместе с ожидающим
+    запросом asyncpg, который отправляет Postgres запрос отмены, и
+    соединение возвращается в пул. Клиент получает ошибку 504 через
+    обработчик HTTPException приложения, если ответ еще не начат.
+
+    Ключ срока маршрута - шаблон пути или метод и шаблон через пробел;
+    срок 0 отключает ограничение.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        timeout: float,
+        route_timeouts: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.app = app
+        self.routes = RouteTemplates()
+        self.timeout = timeout
+        self.route_timeouts = route_timeouts or {}
+
+    def _timeout(self, scope: Scope, route: str) -> float:
+        for key in (f"{scope['method']} {route}", route):
+            if key in self.route_timeouts:
+                return self.route_timeouts[key]
+        return self.timeout
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(BYPASS_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        route, _ = self.routes.match(scope)
+        timeout = self._timeout(scope, route)
+        if timeout <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+        response_complete = False
+
+        async def send_with_state(message: Message) -> None:
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body":
+                response_complete = not message.get("more_body", False)
+            await send(message)
+
+        def on_disconnect() -> None:
+            # После ответа отключение штатное, а работа после ответа
+            # (фоновые задачи Starlette) не прерывается
+            if not response_complete:
+                task.cancel()
+
+        watcher = ClientWatcher(receive, on_disconnect)
+        if not _has_body(scope):
+            watcher.start()
+        token = request_deadline.set(asyncio.get_running_loop().time() + timeout)
+        try:
+            # Задача копирует контекст с крайним сроком
+            task: "asyncio.Task[None]" = asyncio.create_task(
+                self.app(scope, watcher.receive, send_with_state)
+            )
+        finally:
+            request_deadline.reset(token)
+
+        reason = None
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if not done and not response_complete:
+                reason = "deadline"
+                task.cancel()
+            await task
+        except asyncio.CancelledError:
+            if reason is None and watcher.disconnected:
+                reason = "disconnect"
+            if reason is None:
+                task.cancel()
+                raise
+        except Exception as exc:
+            if not is_statement_timeout(exc):
+                raise
+            reason = "deadline"
+        except BaseException:
+            task.cancel()
+            raise
+        finally:
+            watcher.stop()
+
+        if reason is None:
+            return
+        REQUESTS_CANCELLED.labels(route, reason).inc()
+        if reason == "deadline" and not response_started:
+            await self._timeout_response(scope, receive, send)
+
+    async def _timeout_response(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        exc = HTTPException(status_code=504, detail="Request deadline exceeded")
+        handlers = scope["app"].exception_handlers
+        handler = next(handlers[cls] for cls in type(exc).__mro__ if cls in handlers)
+        response = await handler(Request(scope, receive), exc)
+        await response(scope, receive, send)
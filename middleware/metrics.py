@@ -0,0 +1,67 @@
+from time import perf_counter
+from typing import Dict, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from db.database import engine
+from services.metrics import (
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+    RESPONSE_SIZE,
+    update_pool_gauges,
+)
+from .routing import RouteTemplates
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики HTTP-запросов для эндпоинта /metrics.
+
+    Метки содержат шаблон маршрута, а не сырой путь. Дочерние метрики
+    кэшируются по набору меток, чтобы не разбирать метки на каждом запросе.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.routes = RouteTemplates()
+        self._children: Dict[Tuple[str, str, int], tuple] = {}
+
+    def _metrics_for(self, method: str, route: str, status: int) -> tuple:
+        key = (method, route, status)
+        children = self._children.get(key)
+        if children is None:
+            children = (
+                REQUEST_LATENCY.labels(method, route, str(status)),
+                RESPONSE_SIZE.labels(method, route),
+            )
+            self._children[key] = children
+        return children
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            latency, size = self._metrics_for(
+                scope["method"], self.routes.resolve(scope), status_code
+            )
+            latency.observe(perf_counter() - started)
+            size.observe(response_size)
+            update_pool_gauges(engine.pool)
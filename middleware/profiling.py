@@ -0,0 +1,90 @@
+import asyncio
+import hmac
+import logging
+import random
+from typing import Optional
+
+from pyinstrument import Profiler
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.profiler import FORMATS, ProfileStore
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "x-profile-token"
+# Загрузка профилей сама по себе не профилируется
+BYPASS_PREFIXES = ("/api/admin/profiles", "/metrics", "/health")
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует отдельные запросы и сохраняет профили в каталог.
+
+    Запрос профилируется, если в заголовке X-Profile-Token передан токен
+    или он попал в случайную выборку с долей sample_rate. Используется
+    сэмплирующий профилировщик pyinstrument в асинхронном режиме, поэтому
+    в профиль попадает только код этого запроса, а не других задач цикла
+    событий. Одновременно профилируется не больше одного запроса; имя
+    профиля возвращается в заголовке X-Profile-Id.
+
+    Middleware подключается только при PROFILING_ENABLED, так что
+    без профилирования запросы через него не проходят.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: ProfileStore,
+        token: str,
+        sample_rate: float,
+        interval: float,
+        output_format: str,
+    ) -> None:
+        if output_format not in FORMATS:
+            raise ValueError(f"Неизвестный формат профиля: {output_format}")
+        self.app = app
+        self.store = store
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.output_format = output_format
+        self.active = False
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if self.active or scope["path"].startswith(BYPASS_PREFIXES):
+            return False
+        if self.token:
+            token: Optional[str] = Headers(scope=scope).get(PROFILE_TOKEN_HEADER)
+            if token is not None and hmac.compare_digest(token.encode(), self.token):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = self.store.new_name(scope["method"], scope["path"])
+        filename = name + FORMATS[self.output_format]
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", filename)
+            await send(message)
+
+        self.active = True
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session = profiler.stop()
+            self.active = False
+            try:
+                # Рендеринг и запись выполняются вне цикла событий
+                await asyncio.to_thread(
+                    self.store.save, name, session, self.output_format
+                )
+            except Exception:
+                logger.exception("Не удалось сохранить профиль %s", filename)
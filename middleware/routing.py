@@ -0,0 +1,73 @@
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.routing import Match, Mount, Route
+from starlette.types import Scope
+
+# Метка для запросов, не сопоставленных ни одному маршруту: сырые пути
+# в метках привели бы к неограниченному числу временных рядов
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RouteTemplates:
+    """
+    Определяет шаблон маршрута (/api/tweets/{tweet_id}/likes) для запроса.
+
+    После маршрутизации Starlette записывает в scope обработчик найденного
+    маршрута, поэтому шаблон находится поиском в словаре без повторного
+    сопоставления пути с регулярными выражениями.
+    """
+
+    def __init__(self) -> None:
+        self._by_endpoint: Optional[Dict[Any, str]] = None
+
+    def _build(self, app) -> Dict[Any, str]:
+        templates: Dict[Any, str] = {}
+        for route in app.routes:
+            if isinstance(route, Route):
+                templates[route.endpoint] = route.path
+            elif isinstance(route, Mount):
+                templates[route.app] = route.path
+        return templates
+
+    def resolve(self, scope: Scope) -> str:
+        """
+        Возвращает шаблон маршрута обработанного запроса.
+
+        Args:
+            scope (Scope): ASGI scope запроса после маршрутизации.
+
+        Returns:
+            str: Шаблон пути или UNMATCHED_ROUTE.
+        """
+        if self._by_endpoint is None:
+            self._by_endpoint = self._build(scope["app"])
+        return self._by_endpoint.get(scope.get("endpoint"), UNMATCHED_ROUTE)
+
+    def match(self, scope: Scope) -> Tuple[str, Dict[str, Any]]:
+        """
+        Сопоставляет запрос маршрутам до маршрутизации Starlette.
+
+        Используется middleware, которому шаблон нужен до вызова обработчика.
+
+        Args:
+            scope (Scope): ASGI scope запроса.
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: Шаблон пути (или UNMATCHED_ROUTE)
+            и параметры пути.
+        """
+        if self._by_endpoint is None:
+            self._by_endpoint = self._build(scope["app"])
+        matched = None
+        for route in scope["app"].routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                matched = child_scope
+                break
+            if match == Match.PARTIAL and matched is None:
+                # Путь совпал, но метод нет: маршрутизатор вернет 405
+                matched = child_scope
+        if matched is None:
+            return UNMATCHED_ROUTE, {}
+        template = self._by_endpoint.get(matched.get("endpoint"), UNMATCHED_ROUTE)
+        return template, matched.get("path_params", {})
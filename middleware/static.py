@@ -0,0 +1,137 @@
+import mimetypes
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# Предварительно сжатые копии в порядке предпочтения и их расширения
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Имена вида app.7c9275be.js: при изменении содержимого меняется хэш,
+# поэтому такие файлы можно кэшировать навсегда
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[a-z0-9]+$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+DEFAULT_CACHE = "public, max-age=3600"
+
+
+def accepted_encodings(header: str) -> List[str]:
+    """
+    Разбирает заголовок Accept-Encoding.
+
+    Args:
+        header (str): Значение заголовка.
+
+    Returns:
+        List[str]: Кодировки, которые клиент принимает (q > 0).
+    """
+    encodings = []
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            encodings.append(name.strip().lower())
+    return encodings
+
+
+def cache_control(path: str) -> str:
+    """
+    Выбирает политику кэширования файла по его имени.
+
+    Args:
+        path (str): Путь к файлу.
+
+    Returns:
+        str: Значение заголовка Cache-Control.
+    """
+    name = os.path.basename(path)
+    if name.endswith(".html"):
+        # index.html ссылается на файлы с новыми хэшами после каждой сборки
+        return REVALIDATE_CACHE
+    if HASHED_NAME.search(name):
+        return IMMUTABLE_CACHE
+    return DEFAULT_CACHE
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles, отдающий заранее сжатые копии файлов (.br, .gz).
+
+    Сжатые копии создаются командой python -m cli.compress_static при сборке,
+    поэтому во время запроса файлы не сжимаются. Копия используется, только
+    если она не старше исходного файла. Ответы получают заголовок
+    Cache-Control в зависимости от имени файла.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Статические файлы не меняются во время работы процесса, поэтому
+        # наличие сжатых копий проверяется один раз для каждого файла
+        self._variants: Dict[str, List[Tuple[str, str, os.stat_result]]] = {}
+
+    def _find_variants(
+        self, full_path: str, stat_result: os.stat_result
+    ) -> List[Tuple[str, str, os.stat_result]]:
+        variants = self._variants.get(full_path)
+        if variants is None:
+            variants = []
+            for encoding, extension in ENCODINGS:
+                try:
+                    variant_stat = os.stat(full_path + extension)
+                except OSError:
+                    continue
+                if variant_stat.st_mtime >= stat_result.st_mtime:
+                    variants.append((encoding, full_path + extension, variant_stat))
+            self._variants[full_path] = variants
+        return variants
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        full_path = os.fspath(full_path)
+        request_headers = Headers(scope=scope)
+        headers = {"Cache-Control": cache_control(full_path)}
+        variants = self._find_variants(full_path, stat_result)
+        selected: Optional[Tuple[str, str, os.stat_result]] = None
+        if variants:
+            headers["Vary"] = "Accept-Encoding"
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            selected = next(
+                (variant for variant in variants if variant[0] in accepted), None
+            )
+
+        if selected is None:
+            response = FileResponse(
+                full_path, status_code=status_code, stat_result=stat_result
+            )
+        else:
+            encoding, variant_path, variant_stat = selected
+            headers["Content-Encoding"] = encoding
+            media_type, _ = mimetypes.guess_type(full_path)
+            # ETag вычисляется по сжатой копии и отличается от ETag
+            # несжатого файла, как и положено для разных представлений
+            response = FileResponse(
+                variant_path,
+                status_code=status_code,
+                stat_result=variant_stat,
+                media_type=media_type or "application/octet-stream",
+            )
+        response.headers.update(headers)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
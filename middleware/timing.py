@@ -0,0 +1,90 @@
+import json
+import logging
+from time import perf_counter
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from db.query_stats import QueryStats, request_stats
+
+logger = logging.getLogger("request_timing")
+
+
+def server_timing(stats: QueryStats, handler_time: float) -> str:
+    """
+    Формирует значение заголовка Server-Timing.
+
+    Args:
+        stats (QueryStats): Статистика обращений к базе данных.
+        handler_time (float): Время обработки запроса в секундах.
+
+    Returns:
+        str: Значение заголовка с метриками app, db и pool в миллисекундах.
+    """
+    return (
+        f"app;dur={handler_time * 1000:.2f}, "
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+        f"pool;dur={stats.pool_wait * 1000:.2f}"
+    )
+
+
+class RequestTimingMiddleware:
+    """
+    Собирает статистику запросов к базе данных для каждого HTTP-запроса.
+
+    Количество запросов, время в базе данных, ожидание соединения из пула и
+    общее время обработки возвращаются в заголовке Server-Timing и пишутся
+    в журнал одной JSON-строкой. Для запросов дольше slow_threshold_ms
+    в журнал дополнительно попадает список выполненных SQL-запросов.
+    """
+
+    def __init__(self, app: ASGIApp, slow_threshold_ms: float) -> None:
+        self.app = app
+        self.slow_threshold = slow_threshold_ms / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = request_stats.set(stats)
+        started = perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", server_timing(stats, perf_counter() - started)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
+            self._log(scope, status_code, stats, perf_counter() - started)
+
+    def _log(
+        self, scope: Scope, status_code: int, stats: QueryStats, duration: float
+    ) -> None:
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 2),
+            "db_ms": round(stats.db_time * 1000, 2),
+            "queries": stats.queries,
+            "pool_wait_ms": round(stats.pool_wait * 1000, 2),
+        }
+        if duration >= self.slow_threshold:
+            record["statements"] = [
+                {"sql": statement, "ms": round(elapsed * 1000, 2)}
+                for statement, elapsed in stats.statements
+            ]
+            logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,42 @@
+from fastapi import Request, Response
+
+
+def make_etag(resource: str, version: int) -> str:
+    """
+    Формирует слабый ETag ресурса по значению счетчика изменений.
+
+    Args:
+        resource (str): Имя ресурса.
+        version (int): Значение счетчика изменений.
+
+    Returns:
+        str: Значение заголовка ETag.
+    """
+    return f'W/"{resource}-{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match запроса (слабое сравнение).
+
+    Args:
+        request (Request): Запрос.
+        etag (str): Текущий ETag ресурса.
+
+    Returns:
+        bool: True, если у клиента актуальная версия ресурса.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == current
+        for candidate in header.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
@@ -1,9 +1,11 @@
-from typing import AsyncGenerator
-from fastapi import Header, HTTPException, Depends
+import hmac
+from typing import AsyncGenerator, List, Optional
+from fastapi import Header, HTTPException, Depends, Query
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+from config import settings
 from db.database import async_session
 from db.db_handlers import get_user_by_api
 
@@ -20,3 +22,56 @@ async def api_key_dependency(
     if not user:
         raise HTTPException(status_code=401, detail="Invalid API key")
     return api_key
+
+
+async def stream_api_key_dependency(
+    api_key: Optional[str] = Header(None),
+    api_key_query: Optional[str] = Query(None, alias="api_key"),
+    db: AsyncSession = Depends(get_db),
+):
+    # EventSource в браузере не умеет передавать заголовки,
+    # поэтому для потоковых маршрутов ключ можно передать в строке запроса
+    key = api_key or api_key_query
+    if not key:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    await get_user_by_api(key, db)
+    return key
+
+
+async def profiling_token_dependency(
+    profile_token: str = Header(..., alias="X-Profile-Token")
+) -> None:
+    # Профили содержат пути и имена функций приложения, поэтому доступны
+    # только по токену профилирования
+    if not settings.PROFILING_TOKEN or not hmac.compare_digest(
+        profile_token.encode(), settings.PROFILING_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+def ids_query(
+    ids: str = Query(..., description="Идентификаторы через запятую")
+) -> List[int]:
+    """
+    Разбирает список идентификаторов пакетного запроса.
+
+    Args:
+        ids (str): Идентификаторы через запятую.
+
+    Returns:
+        List[int]: Идентификаторы без повторов в порядке запроса.
+
+    Raises:
+        HTTPException: Если список пуст, длиннее BATCH_MAX_IDS
+            или содержит не числа.
+    """
+    try:
+        parsed = list(dict.fromkeys(int(item) for item in ids.split(",") if item))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be integers")
+    if not parsed or len(parsed) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"ids must contain from 1 to {settings.BATCH_MAX_IDS} items",
+        )
+    return parsed
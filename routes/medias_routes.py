@@ -1,13 +1,36 @@
+from functools import partial
+from typing import List, Optional
+
 from fastapi import APIRouter, Depends, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import StreamingResponse
-from io import BytesIO
+from fastapi.responses import Response
 from db import db_handlers
-from schemas.responses import MediaResponseModel
-from .dependencies import get_db, api_key_dependency
+from db.database import async_session
+from schemas.responses import MediaResponseModel, MediasResponseModel
+from services.broadcaster import broadcaster
+from services.media_cache import CachedMedia, media_cache
+from services.metrics import MEDIA_BYTES_SERVED
+from services.singleflight import SingleFlight
+from .dependencies import get_db, api_key_dependency, ids_query
 
 router = APIRouter(prefix="/api")
 
+media_flight = SingleFlight("media")
+# Удаление медиафайла в любом процессе сбрасывает его запись в кэше
+broadcaster.add_listener(media_cache.on_event)
+
+# Содержимое по идентификатору не меняется, поэтому ответ кэшируется навсегда
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+async def load_media(media_id: int) -> Optional[CachedMedia]:
+    generation = media_cache.generation
+    async with async_session() as session:
+        media = await db_handlers.get_media_handler(session, media_id)
+    if media is None:
+        return None
+    return media_cache.put(media.id, media.filename, media.file_data, generation)
+
 
 @router.post(
     "/medias",
@@ -29,19 +52,44 @@ async def upload_media(
     return {"result": True, "media_id": media_id}
 
 
+@router.get(
+    "/medias",
+    response_model=MediasResponseModel,
+    tags=["media"],
+    summary="Получить сведения о медиафайлах",
+    description="Возвращает имена, размеры и ссылки медиафайлов по списку идентификаторов без их содержимого.",
+)
+async def get_medias_info(
+    ids: List[int] = Depends(ids_query), db: AsyncSession = Depends(get_db)
+):
+    medias = await db_handlers.get_media_info(db, ids)
+    found = {media["id"] for media in medias}
+    missing = [media_id for media_id in ids if media_id not in found]
+    return {"result": True, "medias": medias, "missing": missing}
+
+
 @router.get(
     "/media/{media_id}",
     tags=["media"],
     summary="Получить медиафайл",
     description="Предоставляет медиафайл для скачивания по его идентификатору, если он существует.",
 )
-async def get_media(media_id: int, db: AsyncSession = Depends(get_db)):
-    media = await db_handlers.get_media_handler(db, media_id)
+async def get_media(media_id: int):
+    # Популярные файлы отдаются из памяти без обращения к пулу соединений,
+    # а одновременные промахи по одному файлу выполняют один SQL-запрос
+    media = media_cache.get(media_id)
+    if media is None:
+        media = await media_flight.do(media_id, partial(load_media, media_id))
     if media:
-        return StreamingResponse(
-            BytesIO(media.file_data),
+        MEDIA_BYTES_SERVED.inc(len(media.data))
+        # Тело отдается одним блоком без копирования байтов
+        return Response(
+            media.data,
             media_type="application/octet-stream",
-            headers={"Content-Disposition": f"attachment; filename={media.filename}"},
+            headers={
+                "Content-Disposition": f"attachment; filename={media.filename}",
+                "Cache-Control": MEDIA_CACHE_CONTROL,
+            },
         )
     else:
         return {"error": "Media not found"}
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from schemas.responses import ProfilesResponseModel
+from services.profiler import profile_store
+from .dependencies import profiling_token_dependency
+
+router = APIRouter(
+    prefix="/api/admin/profiles",
+    dependencies=[Depends(profiling_token_dependency)],
+)
+
+
+@router.get(
+    "",
+    response_model=ProfilesResponseModel,
+    tags=["admin"],
+    summary="Список профилей запросов",
+    description="Возвращает сохраненные профили запросов, начиная с последнего.",
+)
+async def list_profiles():
+    return {"result": True, "profiles": profile_store.list()}
+
+
+@router.get(
+    "/{name}",
+    tags=["admin"],
+    summary="Скачать профиль запроса",
+    description="Возвращает файл профиля в формате speedscope или свернутых стеков.",
+)
+async def download_profile(name: str):
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/json" if name.endswith(".json") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=name)
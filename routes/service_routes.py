@@ -0,0 +1,51 @@
+import asyncio
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import text
+
+from config import settings
+from db.sharding import shards
+from services.metrics import METRICS_CONTENT_TYPE, render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@router.get(
+    "/health/live",
+    tags=["service"],
+    summary="Проверка жизнеспособности",
+    description="Отвечает, пока процесс способен обрабатывать запросы.",
+)
+async def liveness():
+    return {"status": "ok"}
+
+
+@router.get(
+    "/health/ready",
+    tags=["service"],
+    summary="Проверка готовности",
+    description="Отвечает 200 после прогрева процесса, если базы данных доступны.",
+)
+async def readiness(request: Request):
+    if not request.app.state.ready:
+        return JSONResponse({"status": "starting"}, status_code=503)
+
+    async def ping(shard_engine) -> None:
+        async with shard_engine.connect() as connection:
+            await asyncio.wait_for(
+                connection.execute(text("SELECT 1")),
+                timeout=settings.READINESS_DB_TIMEOUT,
+            )
+
+    try:
+        # Основная база и все шарды твитов проверяются одновременно
+        await asyncio.gather(*(ping(shard_engine) for shard_engine in shards.engines))
+    except Exception:
+        return JSONResponse({"status": "database unavailable"}, status_code=503)
+    return {"status": "ok"}
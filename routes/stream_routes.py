@@ -0,0 +1,82 @@
+import asyncio
+import json
+from typing import AsyncGenerator
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from config import settings
+from services.broadcaster import Subscription, broadcaster
+from services.metrics import SSE_CONNECTIONS
+from .dependencies import stream_api_key_dependency
+
+router = APIRouter(prefix="/api")
+
+
+def format_event(event: dict) -> str:
+    """
+    Форматирует событие в кадр протокола Server-Sent Events.
+
+    Args:
+        event (dict): Событие с обязательным полем type.
+
+    Returns:
+        str: Кадр SSE с именем события и JSON-данными.
+    """
+    data = json.dumps(event, separators=(",", ":"))
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+
+async def event_stream(subscription: Subscription) -> AsyncGenerator[str, None]:
+    SSE_CONNECTIONS.inc()
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Комментарий SSE не дает прокси закрыть простаивающее соединение
+                yield ": ping\n\n"
+                continue
+            if subscription.overflowed:
+                # Клиент отстал и пропустил события: просим перечитать ленту
+                # и закрываем поток, браузер переподключится сам
+                yield format_event({"type": "resync"})
+                break
+            yield format_event(event)
+    finally:
+        SSE_CONNECTIONS.dec()
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get(
+    "/stream",
+    dependencies=[Depends(stream_api_key_dependency)],
+    tags=["stream"],
+    summary="Поток событий ленты",
+    description="Передает новые твиты, удаления и изменения лайков в формате Server-Sent Events.",
+)
+async def stream_events():
+    subscription = broadcaster.subscribe()
+    if subscription is None:
+        # Обработчик HTTPException приложения отвечает статусом 200, а клиенту
+        # и прокси нужен настоящий 503, чтобы повторить подключение позже
+        return JSONResponse(
+            {
+                "result": "false",
+                "error_type": "Overloaded",
+                "error_message": "Too many stream connections",
+            },
+            status_code=503,
+            headers={"Retry-After": str(settings.SSE_RETRY_AFTER_SECONDS)},
+        )
+    # Если клиент отключится до начала потока, генератор не запустится и
+    # не снимет подписку, поэтому ее снимает фоновая задача ответа
+    return StreamingResponse(
+        event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(broadcaster.unsubscribe, subscription),
+    )
@@ -1,13 +1,48 @@
-from fastapi import APIRouter, Depends
+from functools import partial
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import db_handlers
-from schemas.responses import TweetsResponseModel, TweetResponseModel
-from schemas.schemas import TweetCreateRequest
+from db.database import async_session
+from db.models import feed_version_seq
+from schemas.responses import (
+    BulkResponseModel,
+    TrendingResponseModel,
+    TweetsResponseModel,
+    TweetResponseModel,
+)
+from schemas.schemas import BulkLikeRequest, TweetCreateRequest
+from services.singleflight import SingleFlight
+from services.trending import trending_tags
+from .conditional import etag_matches, make_etag, not_modified
 from .dependencies import api_key_dependency, get_db
 
 router = APIRouter(prefix="/api/tweets")
 
+feed_flight = SingleFlight("feed")
+
+
+async def load_feed(before_id: Optional[int], limit: int) -> List[dict]:
+    async with async_session() as session:
+        return await db_handlers.get_tweet_feed(session, before_id, limit)
+
+
+def tweets_page(tweets: List[dict], limit: int) -> dict:
+    """
+    Формирует страницу ленты с курсором для запроса следующей страницы.
+
+    Args:
+        tweets (List[dict]): Твиты страницы по убыванию идентификатора.
+        limit (int): Запрошенный размер страницы.
+
+    Returns:
+        dict: Ответ со списком твитов и курсором next_cursor.
+    """
+    next_cursor = tweets[-1]["id"] if len(tweets) == limit else None
+    return {"result": True, "tweets": tweets, "next_cursor": next_cursor}
+
 
 @router.get(
     "/",
@@ -17,9 +52,64 @@ router = APIRouter(prefix="/api/tweets")
     summary="Получить список твитов",
     description="Получает список всех твитов в ленте.",
 )
-async def get_tweets(db: AsyncSession = Depends(get_db)):
-    tweets = await db_handlers.get_tweet_feed(db)
-    return {"result": True, "tweets": tweets}
+async def get_tweets(
+    request: Request,
+    response: Response,
+    before_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    # Счетчик читается до загрузки ленты: запись, зафиксированная между
+    # чтениями, даст новые данные со старым ETag, но не наоборот
+    version = await db_handlers.get_version(db, feed_version_seq)
+    # Сессия запроса нужна только для проверки ключа и счетчика: ее соединение
+    # возвращается в пул, пока запрос ждет загрузку ленты
+    await db.close()
+    etag = make_etag("feed", version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    # Лента одинакова для всех пользователей, поэтому одновременные запросы
+    # одной страницы выполняют одну загрузку. Версия входит в ключ, чтобы
+    # не присоединиться к загрузке, начатой до последнего изменения
+    tweets = await feed_flight.do(
+        (version, before_id, limit), partial(load_feed, before_id, limit)
+    )
+    response.headers["ETag"] = etag
+    return tweets_page(tweets, limit)
+
+
+@router.get(
+    "/trending",
+    dependencies=[Depends(api_key_dependency)],
+    response_model=TrendingResponseModel,
+    tags=["tweets"],
+    summary="Получить популярные хэштеги",
+    description="Возвращает самые популярные хэштеги за скользящее временное окно.",
+)
+async def get_trending_tags(
+    limit: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_db)
+):
+    await trending_tags.refresh(db)
+    tags = [{"tag": tag, "count": count} for tag, count in trending_tags.top(limit)]
+    return {"result": True, "tags": tags}
+
+
+@router.get(
+    "/tags/{tag}",
+    dependencies=[Depends(api_key_dependency)],
+    response_model=TweetsResponseModel,
+    tags=["tweets"],
+    summary="Получить твиты по хэштегу",
+    description="Получает постраничный список твитов с указанным хэштегом.",
+)
+async def get_tag_timeline(
+    tag: str,
+    before_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    tweets = await db_handlers.get_tag_timeline(db, tag, before_id, limit)
+    return tweets_page(tweets, limit)
 
 
 @router.post(
@@ -41,6 +131,24 @@ async def create_tweet(
     return {"result": True, "tweet_id": tweet_id}
 
 
+@router.post(
+    "/likes",
+    response_model=BulkResponseModel,
+    tags=["tweets"],
+    summary="Поставить лайки нескольким твитам",
+    description="Добавляет лайки к твитам из списка и возвращает результат для каждого твита.",
+)
+async def like_tweets(
+    like_request: BulkLikeRequest,
+    api_key: str = Depends(api_key_dependency),
+    db: AsyncSession = Depends(get_db),
+):
+    user = await db_handlers.get_user_by_api(api_key, db)
+    tweet_ids = list(dict.fromkeys(like_request.tweet_ids))
+    results = await db_handlers.like_tweets(db, user.id, tweet_ids)
+    return {"result": True, "results": results}
+
+
 @router.delete(
     "/{tweet_id}",
     tags=["tweets"],
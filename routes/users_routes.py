@@ -1,13 +1,76 @@
-from fastapi import APIRouter, Depends
+from functools import partial
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import db_handlers
+from db.database import async_session
 from db.db_handlers import get_user_by_api
-from schemas.responses import UserResponseModel
-from .dependencies import get_db, api_key_dependency
+from db.models import follows_version_seq
+from schemas.responses import (
+    BulkResponseModel,
+    TweetsResponseModel,
+    UserResponseModel,
+    UsersResponseModel,
+)
+from schemas.schemas import BulkFollowRequest
+from services.singleflight import SingleFlight
+from .conditional import etag_matches, make_etag, not_modified
+from .dependencies import get_db, api_key_dependency, ids_query
+from .tweets_routes import tweets_page
 
 router = APIRouter(prefix="/api/users")
 
+profile_flight = SingleFlight("profile")
+
+
+async def load_profile(user_id: int) -> Optional[dict]:
+    async with async_session() as session:
+        user = await db_handlers.get_user_by_id(user_id, session)
+        if not user:
+            return None
+        return {
+            "id": user.id,
+            "name": user.name,
+            "followers": await db_handlers.get_followers(user_id, session),
+            "following": await db_handlers.get_following(user_id, session),
+        }
+
+
+@router.get(
+    "",
+    response_model=UsersResponseModel,
+    tags=["users"],
+    summary="Получить нескольких пользователей",
+    description="Получает имена и количество подписчиков и подписок пользователей по списку идентификаторов.",
+)
+async def get_users(
+    ids: List[int] = Depends(ids_query), db: AsyncSession = Depends(get_db)
+):
+    users = await db_handlers.get_users_summary(db, ids)
+    found = {user["id"] for user in users}
+    missing = [user_id for user_id in ids if user_id not in found]
+    return {"result": True, "users": users, "missing": missing}
+
+
+@router.post(
+    "/follow",
+    response_model=BulkResponseModel,
+    tags=["users"],
+    summary="Подписаться на нескольких пользователей",
+    description="Подписывает текущего пользователя на пользователей из списка и возвращает результат для каждого.",
+)
+async def follow_users(
+    follow_request: BulkFollowRequest,
+    api_key: str = Depends(api_key_dependency),
+    db: AsyncSession = Depends(get_db),
+):
+    user = await get_user_by_api(api_key, db)
+    user_ids = list(dict.fromkeys(follow_request.user_ids))
+    results = await db_handlers.follow_users(db, user.id, user_ids)
+    return {"result": True, "results": results}
+
 
 @router.get(
     "/me",
@@ -40,21 +103,42 @@ async def get_current_user(
     summary="Получить профиль пользователя",
     description="Отображает профиль пользователя по его уникальному идентификатору.",
 )
-async def get_user_profile(user_id: int, db: AsyncSession = Depends(get_db)):
-    user = await db_handlers.get_user_by_id(user_id, db)
-    if not user:
+async def get_user_profile(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    version = await db_handlers.get_version(db, follows_version_seq)
+    await db.close()
+    etag = make_etag("profile", version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    profile = await profile_flight.do(
+        (version, user_id), partial(load_profile, user_id)
+    )
+    response.headers["ETag"] = etag
+    if not profile:
         return {"result": False, "message": "User not found"}
-    followers = await db_handlers.get_followers(user_id, db)
-    following = await db_handlers.get_following(user_id, db)
-    return {
-        "result": "true",
-        "user": {
-            "id": user.id,
-            "name": user.name,
-            "followers": followers,
-            "following": following,
-        },
-    }
+    return {"result": "true", "user": profile}
+
+
+@router.get(
+    "/{user_id}/mentions",
+    dependencies=[Depends(api_key_dependency)],
+    response_model=TweetsResponseModel,
+    tags=["users"],
+    summary="Получить упоминания пользователя",
+    description="Получает постраничный список твитов, в которых упоминается пользователь.",
+)
+async def get_user_mentions(
+    user_id: int,
+    before_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    tweets = await db_handlers.get_mentions_timeline(db, user_id, before_id, limit)
+    return tweets_page(tweets, limit)
 
 
 @router.post(
@@ -24,6 +24,17 @@ class TweetModel(BaseModel):
 class TweetsResponseModel(BaseModel):
     result: bool
     tweets: List[TweetModel]
+    next_cursor: Optional[int] = None
+
+
+class TrendingTagModel(BaseModel):
+    tag: str
+    count: int
+
+
+class TrendingResponseModel(BaseModel):
+    result: bool
+    tags: List[TrendingTagModel]
 
 
 class TweetResponseModel(BaseModel):
@@ -51,3 +62,50 @@ class UserResponseModel(BaseModel):
 class MediaResponseModel(BaseModel):
     result: bool
     media_id: int
+
+
+class UserSummaryModel(BaseModel):
+    id: int
+    name: str
+    followers_count: int
+    following_count: int
+
+
+class UsersResponseModel(BaseModel):
+    result: bool
+    users: List[UserSummaryModel]
+    missing: List[int]
+
+
+class MediaInfoModel(BaseModel):
+    id: int
+    filename: Optional[str] = None
+    size: int
+    url: str
+
+
+class MediasResponseModel(BaseModel):
+    result: bool
+    medias: List[MediaInfoModel]
+    missing: List[int]
+
+
+class BulkItemResultModel(BaseModel):
+    id: int
+    status: str
+
+
+class BulkResponseModel(BaseModel):
+    result: bool
+    results: List[BulkItemResultModel]
+
+
+class ProfileModel(BaseModel):
+    name: str
+    size: int
+    created_at: float
+
+
+class ProfilesResponseModel(BaseModel):
+    result: bool
+    profiles: List[ProfileModel]
@@ -1,7 +1,17 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
+from config import settings
+
 
 class TweetCreateRequest(BaseModel):
     tweet_data: str
     tweet_media_ids: Optional[List[int]] = []
+
+
+class BulkLikeRequest(BaseModel):
+    tweet_ids: List[int] = Field(..., min_length=1, max_length=settings.BATCH_MAX_IDS)
+
+
+class BulkFollowRequest(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=settings.BATCH_MAX_IDS)
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+from typing import Callable, List, Optional, Set
+
+import asyncpg
+
+from config import settings
+from db.database import ASYNCPG_DSN
+
+logger = logging.getLogger(__name__)
+
+# Канал Postgres, через который процессы приложения обмениваются событиями
+EVENTS_CHANNEL = "tweet_events"
+
+
+class Subscription:
+    """Подписка одного клиента с ограниченной очередью событий."""
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Выставляется, если клиент не успевал читать события и часть из них
+        # была отброшена: такому клиенту нужно перечитать ленту целиком
+        self.overflowed = False
+
+
+class Broadcaster:
+    """
+    Рассылает события всем подписчикам текущего процесса.
+
+    Публикация никогда не блокируется: если очередь подписчика заполнена,
+    новые события для него отбрасываются, а подписка помечается как
+    переполненная, поэтому медленные клиенты не расходуют память сверх
+    queue_size событий.
+    """
+
+    def __init__(self, queue_size: int, max_subscribers: int) -> None:
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Set[Subscription] = set()
+        self._listeners: List[Callable[[dict], None]] = []
+
+    def subscribe(self) -> Optional[Subscription]:
+        """
+        Создает новую подписку.
+
+        Returns:
+            Optional[Subscription]: Подписка или None, если достигнут лимит подписчиков.
+        """
+        if len(self._subscribers) >= self.max_subscribers:
+            return None
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """
+        Регистрирует обработчик событий внутри процесса, например сброс кэша.
+
+        Обработчик вызывается синхронно при публикации и не должен блокировать.
+
+        Args:
+            listener (Callable[[dict], None]): Функция, принимающая событие.
+        """
+        self._listeners.append(listener)
+
+    def publish(self, event: dict) -> None:
+        """
+        Передает событие всем подписчикам процесса.
+
+        Args:
+            event (dict): Событие с обязательным полем type.
+        """
+        for listener in self._listeners:
+            listener(event)
+        for subscription in self._subscribers:
+            if subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+
+
+class PostgresEventBridge:
+    """
+    Доставляет события из канала Postgres LISTEN/NOTIFY в локальный Broadcaster.
+
+    Обработчики БД публикуют события через pg_notify внутри своей транзакции,
+    поэтому событие получают все процессы приложения и только после фиксации
+    изменений. При потере соединения мост переподключается.
+    """
+
+    def __init__(self, broadcaster: Broadcaster, dsn: str) -> None:
+        self.broadcaster = broadcaster
+        self.dsn = dsn
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Некорректное событие в канале %s: %r", channel, payload)
+            return
+        self.broadcaster.publish(event)
+
+    async def _listen(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("Не удалось подключиться к каналу событий: %s", exc)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            delay = 1.0
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(EVENTS_CHANNEL, self._on_notify)
+                # Клиенты могли пропустить события, пока соединения не было
+                self.broadcaster.publish({"type": "resync"})
+                await closed.wait()
+            finally:
+                await connection.close()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+broadcaster = Broadcaster(
+    queue_size=settings.SSE_QUEUE_SIZE, max_subscribers=settings.SSE_MAX_CONNECTIONS
+)
+event_bridge = PostgresEventBridge(broadcaster, ASYNCPG_DSN)
@@ -0,0 +1,58 @@
+import re
+from typing import Dict, List
+
+HASHTAG_MAX_LENGTH = 100
+MENTION_MAX_LENGTH = 50
+
+# Тег или упоминание должны начинаться с начала строки или после не-словесного
+# символа, чтобы адреса вида user@example.com не считались упоминаниями
+_HASHTAG_RE = re.compile(r"(?<!\w)#(\w+)")
+_MENTION_RE = re.compile(r"(?<!\w)@(\w+)")
+
+
+def _unique_lowered(matches: List[str], max_length: int) -> List[str]:
+    seen: Dict[str, None] = {}
+    for match in matches:
+        value = match.lower()
+        if len(value) <= max_length:
+            seen.setdefault(value, None)
+    return list(seen)
+
+
+def normalize_tag(tag: str) -> str:
+    """
+    Приводит хэштег к виду, в котором он хранится в индексе.
+
+    Args:
+        tag (str): Хэштег с символом '#' или без него.
+
+    Returns:
+        str: Хэштег в нижнем регистре без ведущего '#'.
+    """
+    return tag.lstrip("#").lower()
+
+
+def extract_hashtags(text: str) -> List[str]:
+    """
+    Извлекает уникальные хэштеги из текста твита в порядке появления.
+
+    Args:
+        text (str): Текст твита.
+
+    Returns:
+        List[str]: Список хэштегов в нижнем регистре без символа '#'.
+    """
+    return _unique_lowered(_HASHTAG_RE.findall(text or ""), HASHTAG_MAX_LENGTH)
+
+
+def extract_mentions(text: str) -> List[str]:
+    """
+    Извлекает уникальные упоминания пользователей из текста твита.
+
+    Args:
+        text (str): Текст твита.
+
+    Returns:
+        List[str]: Список имен пользователей в нижнем регистре без символа '@'.
+    """
+    return _unique_lowered(_MENTION_RE.findall(text or ""), MENTION_MAX_LENGTH)
@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, delete, func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from config import settings
+from db.database import async_session
+from db.models import Job
+from .metrics import JOB_DURATION, JOBS_PROCESSED
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, dict], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """
+    Регистрирует обработчик фоновой задачи указанного типа.
+
+    Обработчик получает собственную сессию базы данных и полезную нагрузку
+    задачи. Фиксация транзакции выполняется воркером после успешного вызова.
+    Задача может быть выполнена повторно, поэтому обработчик должен быть
+    идемпотентным.
+
+    Args:
+        kind (str): Тип задачи.
+    """
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        _handlers[kind] = handler
+        return handler
+
+    return decorator
+
+
+async def enqueue(
+    db: AsyncSession, kind: str, payload: dict, delay_seconds: float = 0
+) -> None:
+    """
+    Ставит задачу в очередь в транзакции вызывающего кода.
+
+    Задача фиксируется атомарно вместе с основной записью, поэтому она не
+    теряется при сбое процесса и не выполняется, если запись откатилась.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        kind (str): Тип задачи.
+        payload (dict): Полезная нагрузка задачи, сериализуемая в JSON.
+        delay_seconds (float): Задержка перед первым запуском.
+    """
+    job_row = Job(kind=kind, payload=payload, max_attempts=settings.JOBS_MAX_ATTEMPTS)
+    if delay_seconds:
+        job_row.run_at = func.now() + timedelta(seconds=delay_seconds)
+    db.add(job_row)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """
+    Вычисляет задержку перед повторной попыткой.
+
+    Args:
+        attempts (int): Количество уже выполненных попыток.
+
+    Returns:
+        float: Экспоненциальная задержка со случайным разбросом.
+    """
+    delay = settings.JOBS_BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    delay = min(delay, settings.JOBS_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobMetrics:
+    """Счетчики работы воркера фоновых задач в текущем процессе."""
+
+    def __init__(self) -> None:
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+
+    def snapshot(self) -> dict:
+        processed = self.succeeded + self.retried + self.failed
+        return {
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_seconds": self.total_seconds / processed if processed else 0.0,
+        }
+
+
+class JobWorker:
+    """
+    Воркер, забирающий задачи из таблицы jobs.
+
+    Задачи выбираются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+    несколько воркеров (в процессах приложения или отдельных процессах)
+    не получают одну и ту же задачу. Задачи, взятые упавшим воркером,
+    снова становятся доступными после JOBS_LOCK_TIMEOUT_SECONDS, а если
+    попытки исчерпаны, помечаются как failed.
+    """
+
+    def __init__(
+        self,
+        session_factory=async_session,
+        batch_size: int = settings.JOBS_BATCH_SIZE,
+        poll_interval: float = settings.JOBS_POLL_INTERVAL,
+        lock_timeout: int = settings.JOBS_LOCK_TIMEOUT_SECONDS,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.metrics = JobMetrics()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _claim(self) -> List[Job]:
+        async with self.session_factory() as session:
+            stale = func.now() - timedelta(seconds=self.lock_timeout)
+            result = await session.execute(
+                select(Job)
+                .where(
+                    or_(
+                        and_(Job.status == "queued", Job.run_at <= func.now()),
+                        and_(Job.status == "running", Job.locked_at < stale),
+                    )
+                )
+                .order_by(Job.run_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            jobs = []
+            for job_row in result.scalars().all():
+                if job_row.status == "running" and (
+                    job_row.attempts >= job_row.max_attempts
+                ):
+                    # Задача, которая каждый раз роняет воркер, не должна
+                    # повторяться бесконечно
+                    job_row.status = "failed"
+                    job_row.locked_at = None
+                    job_row.last_error = "Worker lock expired"
+                    self.metrics.failed += 1
+                    JOBS_PROCESSED.labels(job_row.kind, "failed").inc()
+                    logger.error(
+                        "Задача %s (%s) не выполнена: воркер не завершил ее "
+                        "за %s попыток",
+                        job_row.id,
+                        job_row.kind,
+                        job_row.attempts,
+                    )
+                    continue
+                job_row.status = "running"
+                job_row.locked_at = func.now()
+                job_row.attempts += 1
+                jobs.append(job_row)
+            await session.commit()
+            return jobs
+
+    async def _process(self, job_row: Job) -> None:
+        started = time.perf_counter()
+        handler = _handlers.get(job_row.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"Unknown job kind: {job_row.kind}")
+            async with self.session_factory() as session:
+                await handler(session, job_row.payload)
+                await session.commit()
+        except Exception as exc:
+            result = await self._fail(job_row, exc, retry=handler is not None)
+        else:
+            async with self.session_factory() as session:
+                await session.execute(delete(Job).where(Job.id == job_row.id))
+                await session.commit()
+            self.metrics.succeeded += 1
+            result = "succeeded"
+        elapsed = time.perf_counter() - started
+        self.metrics.total_seconds += elapsed
+        JOBS_PROCESSED.labels(job_row.kind, result).inc()
+        JOB_DURATION.labels(job_row.kind).observe(elapsed)
+
+    async def _fail(self, job_row: Job, exc: Exception, retry: bool) -> str:
+        error = f"{type(exc).__name__}: {exc}"
+        values: dict = {"locked_at": None, "last_error": error}
+        if retry and job_row.attempts < job_row.max_attempts:
+            delay = backoff_seconds(job_row.attempts)
+            values.update(status="queued", run_at=func.now() + timedelta(seconds=delay))
+            self.metrics.retried += 1
+            result = "retried"
+            logger.warning(
+                "Задача %s (%s) завершилась ошибкой, повтор через %.1f с: %s",
+                job_row.id,
+                job_row.kind,
+                delay,
+                error,
+            )
+        else:
+            values["status"] = "failed"
+            self.metrics.failed += 1
+            result = "failed"
+            logger.error(
+                "Задача %s (%s) не выполнена: %s", job_row.id, job_row.kind, error
+            )
+        async with self.session_factory() as session:
+            await session.execute(
+                update(Job).where(Job.id == job_row.id).values(**values)
+            )
+            await session.commit()
+        return result
+
+    async def run_once(self) -> int:
+        """
+        Забирает и выполняет одну пачку задач.
+
+        Returns:
+            int: Количество обработанных задач.
+        """
+        jobs = await self._claim()
+        for job_row in jobs:
+            await self._process(job_row)
+        return len(jobs)
+
+    async def run(self) -> None:
+        """Выполняет задачи, пока воркер не будет остановлен."""
+        while True:
+            try:
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка при выборке фоновых задач")
+                processed = 0
+            if processed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def queue_depth(db: AsyncSession) -> Dict[str, int]:
+    """
+    Возвращает количество задач в очереди по статусам.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+
+    Returns:
+        Dict[str, int]: Количество задач для каждого статуса.
+    """
+    result = await db.execute(select(Job.status, func.count()).group_by(Job.status))
+    return {status: count for status, count in result}
+
+
+job_worker = JobWorker()
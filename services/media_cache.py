@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from config import settings
+from .metrics import CACHE_BYTES, CACHE_EVICTIONS, record_cache
+
+MB = 1024 * 1024
+
+
+class CachedMedia(NamedTuple):
+    filename: str
+    data: bytes
+
+
+class MediaCache:
+    """
+    LRU-кэш содержимого медиафайлов с ограничением по объему.
+
+    Медиафайлы не изменяются после загрузки, поэтому запись остается
+    актуальной, пока файл не удален. При превышении max_bytes вытесняются
+    давно не запрошенные файлы, а файлы крупнее max_item_bytes не кэшируются,
+    чтобы один большой файл не вытеснял множество популярных.
+    """
+
+    def __init__(self, max_bytes: int, max_item_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._entries: "OrderedDict[int, CachedMedia]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Увеличивается при каждом сбросе: загрузка, начатая до сброса,
+        # не должна вернуть в кэш удаленный файл
+        self.generation = 0
+
+    def get(self, media_id: int) -> Optional[CachedMedia]:
+        """
+        Возвращает медиафайл из кэша.
+
+        Args:
+            media_id (int): Идентификатор медиафайла.
+
+        Returns:
+            Optional[CachedMedia]: Имя и содержимое файла или None.
+        """
+        entry = self._entries.get(media_id)
+        if entry is None:
+            self.misses += 1
+        else:
+            self._entries.move_to_end(media_id)
+            self.hits += 1
+        record_cache("media", entry is not None)
+        return entry
+
+    def contains(self, media_id: int) -> bool:
+        """Проверяет наличие файла в кэше, не меняя порядок и статистику."""
+        return media_id in self._entries
+
+    def put(
+        self, media_id: int, filename: str, data: bytes, generation: int
+    ) -> CachedMedia:
+        """
+        Добавляет медиафайл в кэш, вытесняя давно не запрошенные.
+
+        Args:
+            media_id (int): Идентификатор медиафайла.
+            filename (str): Имя файла.
+            data (bytes): Содержимое файла.
+            generation (int): Значение generation до начала загрузки из базы.
+
+        Returns:
+            CachedMedia: Запись, даже если она не была сохранена в кэше.
+        """
+        entry = CachedMedia(filename, data)
+        if len(data) > self.max_item_bytes or generation != self.generation:
+            return entry
+        previous = self._entries.pop(media_id, None)
+        if previous is not None:
+            self.size -= len(previous.data)
+        self._entries[media_id] = entry
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.data)
+            self.evictions += 1
+            CACHE_EVICTIONS.labels("media").inc()
+        CACHE_BYTES.labels("media").set(self.size)
+        return entry
+
+    def invalidate(self, media_id: int) -> None:
+        self.generation += 1
+        entry = self._entries.pop(media_id, None)
+        if entry is not None:
+            self.size -= len(entry.data)
+            CACHE_BYTES.labels("media").set(self.size)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self.size = 0
+        CACHE_BYTES.labels("media").set(0)
+
+    def on_event(self, event: dict) -> None:
+        """
+        Сбрасывает записи по событиям из канала Postgres.
+
+        Args:
+            event (dict): Событие с обязательным полем type.
+        """
+        if event["type"] == "media_deleted":
+            self.invalidate(event["media_id"])
+        elif event["type"] == "resync":
+            # Пока канала не было, удаления могли быть пропущены
+            self.clear()
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+media_cache = MediaCache(
+    max_bytes=int(settings.MEDIA_CACHE_MAX_MB * MB),
+    max_item_bytes=int(settings.MEDIA_CACHE_MAX_ITEM_MB * MB),
+)
@@ -0,0 +1,139 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# При запуске нескольких процессов uvicorn prometheus_client хранит значения
+# в файлах каталога PROMETHEUS_MULTIPROC_DIR, а /metrics агрегирует их.
+# Режим должен быть включен до импорта модуля, поэтому переменную окружения
+# выставляет лаунчер перед запуском воркеров.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Размер тела HTTP-ответа",
+    ["method", "route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Количество обрабатываемых HTTP-запросов",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Размер пула соединений", multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Количество соединений, выданных из пула",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Количество соединений сверх размера пула",
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Обращения к кэшам приложения",
+    ["cache", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "cache_evictions_total", "Вытеснения из кэшей приложения", ["cache"]
+)
+CACHE_BYTES = Gauge(
+    "cache_bytes",
+    "Объем данных в кэшах приложения",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Запросы, отклоненные при перегрузке",
+    ["route", "reason"],
+)
+ADMISSION_QUEUED = Gauge(
+    "admission_queued",
+    "Количество запросов в очереди на обработку",
+    multiprocess_mode="livesum",
+)
+REQUESTS_CANCELLED = Counter(
+    "http_requests_cancelled_total",
+    "Запросы, прерванные по крайнему сроку или отключению клиента",
+    ["route", "reason"],
+)
+MEDIA_BYTES_SERVED = Counter(
+    "media_bytes_served_total", "Объем отданных медиафайлов в байтах"
+)
+SSE_CONNECTIONS = Gauge(
+    "sse_connections",
+    "Количество открытых потоков событий",
+    multiprocess_mode="livesum",
+)
+JOBS_PROCESSED = Counter(
+    "jobs_processed_total",
+    "Обработанные фоновые задачи",
+    ["kind", "result"],
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds", "Время выполнения фоновой задачи", ["kind"]
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Учитывает обращение к кэшу для расчета доли попаданий.
+
+    Args:
+        cache (str): Имя кэша.
+        hit (bool): Было ли значение найдено в кэше.
+    """
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def update_pool_gauges(pool) -> None:
+    """
+    Обновляет метрики пула соединений текущего процесса.
+
+    Args:
+        pool: Пул соединений движка SQLAlchemy.
+    """
+    DB_POOL_SIZE.set(pool.size())
+    DB_POOL_CHECKED_OUT.set(pool.checkedout())
+    DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+
+def render_metrics() -> bytes:
+    """
+    Формирует метрики в текстовом формате Prometheus.
+
+    Returns:
+        bytes: Метрики всех процессов приложения.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead() -> None:
+    """Удаляет значения live-метрик завершающегося процесса."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from config import settings
+from db.partitions import ensure_partitions, lock_partitions
+from db.sharding import ShardRouter, shards
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintainer:
+    """
+    Периодически создает секции твитов и лайков будущих месяцев.
+
+    Секции по умолчанию нет, поэтому без обслуживания вставки начнут
+    завершаться ошибкой, когда истечет запас months_ahead. Обслуживание
+    выполняется в процессах приложения и воркерах, так что долго работающий
+    контейнер не зависит от команды при запуске. Архивация старых секций
+    блокирует таблицы и остается за python -m cli.partitions maintain.
+    """
+
+    def __init__(
+        self,
+        router: ShardRouter = shards,
+        months_ahead: int = settings.PARTITION_MONTHS_AHEAD,
+        interval: float = settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+    ) -> None:
+        self.router = router
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> Dict[int, List[str]]:
+        """
+        Создает недостающие секции в основной базе и на всех шардах.
+
+        Returns:
+            Dict[int, List[str]]: Имена созданных секций по номерам шардов;
+                шарды без новых секций не попадают в результат.
+        """
+        created = {}
+        for index, shard_engine in enumerate(self.router.engines):
+            async with shard_engine.begin() as connection:
+                await lock_partitions(connection)
+                names = await ensure_partitions(connection, self.months_ahead)
+            if names:
+                logger.info("Шард %s: созданы секции %s", index, names)
+                created[index] = names
+        return created
+
+    async def run(self) -> None:
+        """Обслуживает секции, пока задача не будет остановлена."""
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка при создании секций")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+partition_maintainer = PartitionMaintainer()
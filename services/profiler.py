@@ -0,0 +1,145 @@
+import os
+import re
+import time
+from typing import List, Optional
+
+from pyinstrument.frame import Frame
+from pyinstrument.renderers import SpeedscopeRenderer
+from pyinstrument.session import Session
+
+from config import settings
+
+# Форматы результатов: профиль для https://www.speedscope.app и свернутые
+# стеки для flamegraph.pl и других построителей флеймграфов
+FORMATS = {
+    "speedscope": ".speedscope.json",
+    "collapsed": ".collapsed.txt",
+}
+PROFILE_NAME = re.compile(r"^[\w.-]+$")
+
+
+def _frame_name(frame: Frame) -> str:
+    return f"{frame.function} ({frame.file_path_short}:{frame.line_no})"
+
+
+def render_collapsed(session: Session) -> str:
+    """
+    Преобразует профиль в свернутые стеки.
+
+    Каждая строка - стек вызовов через ';' и собственное время последнего
+    кадра в микросекундах.
+
+    Args:
+        session (Session): Профиль pyinstrument.
+
+    Returns:
+        str: Свернутые стеки, по одному на строку.
+    """
+    lines: List[str] = []
+
+    def walk(frame: Frame, stack: str) -> None:
+        stack = f"{stack};{_frame_name(frame)}" if stack else _frame_name(frame)
+        self_time = frame.time - sum(child.time for child in frame.children)
+        if self_time > 0:
+            lines.append(f"{stack} {round(self_time * 1_000_000)}")
+        for child in frame.children:
+            walk(child, stack)
+
+    root = session.root_frame()
+    if root is not None:
+        walk(root, "")
+    return "\n".join(lines) + "\n"
+
+
+class ProfileStore:
+    """
+    Каталог с профилями запросов.
+
+    Хранятся только max_files последних профилей, чтобы включенное
+    профилирование не заполнило диск.
+    """
+
+    def __init__(self, directory: str, max_files: int) -> None:
+        self.directory = directory
+        self.max_files = max_files
+
+    def new_name(self, method: str, path: str) -> str:
+        """
+        Формирует имя файла профиля запроса без расширения.
+
+        Args:
+            method (str): HTTP-метод.
+            path (str): Путь запроса.
+
+        Returns:
+            str: Имя, уникальное в пределах процесса.
+        """
+        slug = re.sub(r"[^\w]+", "_", path).strip("_") or "root"
+        return f"{time.time_ns()}-{os.getpid()}-{method}-{slug[:80]}"
+
+    def save(self, name: str, session: Session, output_format: str) -> str:
+        """
+        Сохраняет профиль и удаляет самые старые профили сверх лимита.
+
+        Args:
+            name (str): Имя, полученное из new_name.
+            session (Session): Профиль pyinstrument.
+            output_format (str): speedscope или collapsed.
+
+        Returns:
+            str: Имя сохраненного файла.
+        """
+        if output_format == "collapsed":
+            content = render_collapsed(session)
+        else:
+            content = SpeedscopeRenderer().render(session)
+        filename = name + FORMATS[output_format]
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, filename), "w") as file:
+            file.write(content)
+        for profile in self.list()[self.max_files :]:
+            try:
+                os.remove(os.path.join(self.directory, profile["name"]))
+            except FileNotFoundError:
+                pass
+        return filename
+
+    def list(self) -> List[dict]:
+        """
+        Возвращает сохраненные профили, начиная с последнего.
+
+        Returns:
+            List[dict]: Имя, размер и время создания каждого профиля.
+        """
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return []
+        profiles = [
+            {
+                "name": entry.name,
+                "size": entry.stat().st_size,
+                "created_at": entry.stat().st_mtime,
+            }
+            for entry in entries
+            if entry.is_file() and entry.name.endswith(tuple(FORMATS.values()))
+        ]
+        return sorted(profiles, key=lambda profile: profile["name"], reverse=True)
+
+    def path(self, name: str) -> Optional[str]:
+        """
+        Возвращает путь к профилю по имени.
+
+        Args:
+            name (str): Имя файла профиля.
+
+        Returns:
+            Optional[str]: Путь к файлу или None, если профиля нет.
+        """
+        if not PROFILE_NAME.match(name) or not name.endswith(tuple(FORMATS.values())):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from config import settings
+from .metrics import record_cache
+
+T = TypeVar("T")
+
+
+class _Call:
+    """Выполняющийся вызов и количество ожидающих его запросов."""
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 1
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые чтения в один вызов.
+
+    Первый запрос по ключу запускает загрузку в отдельной задаче, а запросы,
+    пришедшие до ее завершения, ждут ту же задачу и получают тот же результат
+    или то же исключение. Результат не кэшируется: следующий запрос после
+    завершения снова обращается к базе данных.
+
+    Задача ожидается через asyncio.shield, поэтому отключение клиента,
+    запустившего загрузку, не отменяет ее для остальных. По этой же причине
+    загрузка должна открывать собственную сессию, а не использовать сессию
+    запроса, которая закрывается вместе с ним.
+
+    Количество ключей и ожидающих на ключ ограничено: сверх лимитов запрос
+    выполняет загрузку самостоятельно, без объединения.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_keys: int = settings.SINGLEFLIGHT_MAX_KEYS,
+        max_waiters: int = settings.SINGLEFLIGHT_MAX_WAITERS,
+    ) -> None:
+        self.name = name
+        self.max_keys = max_keys
+        self.max_waiters = max_waiters
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            # Исключение уже получено ожидающими или никому не нужно;
+            # чтение подавляет предупреждение asyncio о непрочитанной ошибке
+            call.task.exception()
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет загрузку или присоединяется к уже выполняющейся.
+
+        Args:
+            key (Hashable): Ключ чтения, например идентификатор медиафайла.
+            load (Callable[[], Awaitable[T]]): Функция загрузки.
+
+        Returns:
+            T: Результат загрузки.
+
+        Raises:
+            Exception: Исключение, возникшее при загрузке.
+        """
+        call = self._calls.get(key)
+        if call is not None and call.waiters < self.max_waiters:
+            call.waiters += 1
+            record_cache(f"singleflight_{self.name}", True)
+            return await asyncio.shield(call.task)
+
+        record_cache(f"singleflight_{self.name}", False)
+        if call is not None or len(self._calls) >= self.max_keys:
+            return await load()
+
+        # Задача наследует контекст запроса, поэтому ее SQL-запросы
+        # учитываются в Server-Timing запроса, запустившего загрузку
+        call = _Call(asyncio.create_task(load()))
+        self._calls[key] = call
+        call.task.add_done_callback(lambda _: self._forget(key, call))
+        return await asyncio.shield(call.task)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,31 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from db import db_handlers
+from db.models import Tweet
+from db.sharding import shards, tweet_created_at
+from .jobs import job
+
+
+@job("tweet.index_entities")
+async def index_tweet_entities(db: AsyncSession, payload: dict) -> None:
+    """
+    Индексирует хэштеги и упоминания созданного твита.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия базы данных.
+        payload (dict): Полезная нагрузка задачи с ключом tweet_id.
+    """
+    tweet_id = payload["tweet_id"]
+    # Твит читается с его шарда, а индексы пишутся в основную базу
+    async with shards.session(db, shards.map.for_tweet(tweet_id)) as shard_db:
+        result = await shard_db.execute(
+            select(Tweet.tweet_data).where(
+                Tweet.id == tweet_id, Tweet.created_at == tweet_created_at(tweet_id)
+            )
+        )
+        tweet_data = result.scalar_one_or_none()
+    if tweet_data is None:
+        # Твит удален до выполнения задачи
+        return
+    await db_handlers.index_tweet_entities(db, tweet_id, tweet_data)
@@ -0,0 +1,123 @@
+import asyncio
+import heapq
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from config import settings
+from db.models import tweet_tags
+
+
+class TrendingTags:
+    """
+    Счетчик популярных хэштегов в скользящем временном окне.
+
+    Окно разбито на корзины фиксированной длины. Новые теги добавляются
+    в текущую корзину и в общий счетчик, а при сдвиге окна устаревшие корзины
+    вычитаются из общего счетчика, поэтому запрос топа не требует агрегации
+    по всей таблице tweet_tags.
+    """
+
+    def __init__(
+        self, window_seconds: int, bucket_seconds: int, refresh_seconds: float
+    ) -> None:
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.refresh_seconds = refresh_seconds
+        self._buckets: Deque[Tuple[int, Counter]] = deque()
+        self._totals: Counter = Counter()
+        self._cursor: Optional[datetime] = None
+        self._last_refresh = 0.0
+        # Блокировка привязывается к циклу событий (в Python 3.9 - при
+        # создании), а счетчик создается при импорте, до запуска цикла
+        # сервера, поэтому блокировка создается для текущего цикла при
+        # обновлении
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def add(self, tag: str, timestamp: float) -> None:
+        """
+        Учитывает одно использование хэштега.
+
+        Args:
+            tag (str): Нормализованный хэштег.
+            timestamp (float): Время использования (Unix time).
+        """
+        bucket = int(timestamp // self.bucket_seconds)
+        if self._buckets and self._buckets[-1][0] >= bucket:
+            # Запоздавшие записи попадают в последнюю корзину
+            self._buckets[-1][1][tag] += 1
+        else:
+            self._buckets.append((bucket, Counter({tag: 1})))
+        self._totals[tag] += 1
+
+    def _expire(self, now: float) -> None:
+        oldest = int((now - self.window_seconds) // self.bucket_seconds)
+        while self._buckets and self._buckets[0][0] <= oldest:
+            _, counts = self._buckets.popleft()
+            self._totals.subtract(counts)
+            for tag, count in counts.items():
+                if self._totals[tag] <= 0:
+                    del self._totals[tag]
+
+    def _loop_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """
+        Догружает из базы данных теги, появившиеся после предыдущего обновления.
+
+        Запрос выполняется не чаще, чем раз в refresh_seconds, и читает только
+        новые строки, поэтому счетчик остается согласованным между несколькими
+        процессами приложения. Строки из транзакций, зафиксированных позже
+        более новых, могут быть пропущены: для рейтинга это допустимо.
+
+        Args:
+            db (AsyncSession): Асинхронная сессия базы данных.
+        """
+        if time.monotonic() - self._last_refresh < self.refresh_seconds:
+            return
+        async with self._loop_lock():
+            if time.monotonic() - self._last_refresh < self.refresh_seconds:
+                return
+            if self._cursor is None:
+                self._cursor = datetime.now(timezone.utc) - timedelta(
+                    seconds=self.window_seconds
+                )
+            result = await db.execute(
+                select(tweet_tags.c.tag, tweet_tags.c.created_at)
+                .where(tweet_tags.c.created_at > self._cursor)
+                .order_by(tweet_tags.c.created_at)
+            )
+            for tag, created_at in result:
+                self.add(tag, created_at.timestamp())
+                self._cursor = created_at
+            self._last_refresh = time.monotonic()
+
+    def top(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Возвращает самые популярные хэштеги текущего окна.
+
+        Args:
+            limit (int): Максимальное количество хэштегов.
+
+        Returns:
+            List[Tuple[str, int]]: Пары (хэштег, количество) по убыванию количества.
+        """
+        self._expire(time.time())
+        return heapq.nlargest(limit, self._totals.items(), key=lambda item: item[1])
+
+
+trending_tags = TrendingTags(
+    window_seconds=settings.TRENDING_WINDOW_MINUTES * 60,
+    bucket_seconds=settings.TRENDING_BUCKET_SECONDS,
+    refresh_seconds=settings.TRENDING_REFRESH_SECONDS,
+)
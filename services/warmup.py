@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from db import db_handlers
+from db.database import async_session
+from .trending import trending_tags
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_pool(engine: AsyncEngine, connections: int) -> None:
+    """
+    Открывает соединения пула заранее, чтобы первые запросы их не ждали.
+
+    Args:
+        engine (AsyncEngine): Движок базы данных.
+        connections (int): Количество соединений, которые нужно открыть.
+    """
+
+    async def touch() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    # Соединения удерживаются одновременно, иначе пул переиспользует одно
+    await asyncio.gather(*(touch() for _ in range(connections)))
+
+
+async def warm_statements(connections: int) -> None:
+    """
+    Выполняет частые запросы на каждом соединении пула.
+
+    SQLAlchemy кэширует компиляцию запросов на уровне движка, а asyncpg
+    подготавливает выражения для каждого соединения отдельно, поэтому запросы
+    выполняются в нескольких сессиях одновременно. Идентификатор 0 и пустой
+    ключ не соответствуют данным, так что запросы почти ничего не читают.
+
+    Args:
+        connections (int): Количество соединений пула.
+    """
+
+    async def run() -> None:
+        async with async_session() as session:
+            try:
+                await db_handlers.get_user_by_api("", session)
+            except HTTPException:
+                pass
+            await db_handlers.get_user_by_id(0, session)
+            await db_handlers.get_followers(0, session)
+            await db_handlers.get_following(0, session)
+            await db_handlers.get_tweet_feed(session, limit=1)
+            await db_handlers.get_media_handler(session, 0)
+
+    await asyncio.gather(*(run() for _ in range(connections)))
+
+
+async def warm_caches() -> None:
+    """Заполняет кэши процесса данными из базы."""
+    async with async_session() as session:
+        await trending_tags.refresh(session)
+
+
+async def warm_up(engine: AsyncEngine, connections: int) -> None:
+    """
+    Подготавливает процесс к приему запросов.
+
+    Args:
+        engine (AsyncEngine): Движок базы данных.
+        connections (int): Количество соединений пула, открываемых заранее.
+    """
+    started = time.perf_counter()
+    await warm_pool(engine, connections)
+    await warm_statements(connections)
+    await warm_caches()
+    logger.info("Прогрев завершен за %.3f с", time.perf_counter() - started)
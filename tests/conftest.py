@@ -9,6 +9,7 @@ from httpx import AsyncClient
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from main import app
 from schemas.schemas import TweetCreateRequest
+from services.jobs import job_worker
 
 
 @pytest.fixture(scope="session")
@@ -33,3 +34,14 @@ async def created_tweet_id():
 async def async_client() -> AsyncGenerator[AsyncClient, None]:
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
+
+
+@pytest_asyncio.fixture
+async def run_jobs():
+    """Выполняет все фоновые задачи, поставленные в очередь к моменту вызова."""
+
+    async def run():
+        while await job_worker.run_once():
+            pass
+
+    return run
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from middleware.admission import (
+    PRIORITY_READ,
+    PRIORITY_WRITE,
+    AdmissionMiddleware,
+    Overloaded,
+    PriorityLimiter,
+)
+
+
+@pytest.mark.asyncio
+async def test_reads_are_served_before_writes():
+    limiter = PriorityLimiter(capacity=1, queue_size=10, queue_timeout=1.0)
+    await limiter.acquire(PRIORITY_READ)
+    order = []
+
+    async def request(name, priority):
+        await limiter.acquire(priority)
+        order.append(name)
+        limiter.release()
+
+    tasks = [
+        asyncio.create_task(request("write", PRIORITY_WRITE)),
+        asyncio.create_task(request("read", PRIORITY_READ)),
+    ]
+    await asyncio.sleep(0)
+    limiter.release()
+    await asyncio.gather(*tasks)
+    assert order == ["read", "write"]
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_displaces_writes():
+    limiter = PriorityLimiter(capacity=1, queue_size=1, queue_timeout=1.0)
+    await limiter.acquire(PRIORITY_READ)
+    write = asyncio.create_task(limiter.acquire(PRIORITY_WRITE))
+    await asyncio.sleep(0)
+
+    with pytest.raises(Overloaded) as exc:
+        await limiter.acquire(PRIORITY_WRITE)
+    assert exc.value.reason == "queue_full"
+
+    read = asyncio.create_task(limiter.acquire(PRIORITY_READ))
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded) as exc:
+        await write
+    assert exc.value.reason == "displaced"
+    limiter.release()
+    await read
+    limiter.release()
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout():
+    limiter = PriorityLimiter(capacity=1, queue_size=1, queue_timeout=0.01)
+    await limiter.acquire(PRIORITY_READ)
+    with pytest.raises(Overloaded) as exc:
+        await limiter.acquire(PRIORITY_READ)
+    assert exc.value.reason == "timeout"
+    limiter.release()
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_overloaded_request_gets_503():
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/slow", slow), Route("/health/live", slow)])
+    app.add_middleware(
+        AdmissionMiddleware,
+        max_concurrency=1,
+        queue_size=0,
+        queue_timeout=1.0,
+        retry_after=2,
+    )
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        first = asyncio.create_task(ac.get("/slow"))
+        await asyncio.sleep(0.01)
+        rejected = await ac.get("/slow")
+        # Служебные эндпоинты не ограничиваются
+        bypassed = asyncio.create_task(ac.get("/health/live"))
+        await asyncio.sleep(0.01)
+        release.set()
+        assert (await first).status_code == 200
+        assert (await bypassed).status_code == 200
+
+    assert rejected.status_code == 503
+    assert rejected.headers["retry-after"] == "2"
+    assert rejected.json()["error_type"] == "Overloaded"
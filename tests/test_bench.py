@@ -0,0 +1,25 @@
+from bench.stats import OperationStats, percentile, queries_from_server_timing
+
+
+def test_percentile_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_queries_from_server_timing():
+    header = 'app;dur=3.10, db;dur=1.20;desc="4 queries", pool;dur=0.01'
+    assert queries_from_server_timing(header) == 4
+    assert queries_from_server_timing(None) is None
+
+
+def test_operation_summary():
+    stats = OperationStats()
+    stats.record(0.010, True, 2)
+    stats.record(0.030, False, 4)
+    summary = stats.summary(elapsed=2.0)
+    assert summary["requests"] == 2
+    assert summary["errors"] == 1
+    assert summary["rps"] == 1.0
+    assert summary["queries_per_request"] == 3.0
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from db.database import async_session, engine
+from main import http_exception_handler
+from middleware.deadline import DeadlineMiddleware
+
+
+def make_app(cancelled: list) -> FastAPI:
+    app = FastAPI()
+    app.add_exception_handler(HTTPException, http_exception_handler)
+
+    @app.get("/slow-query")
+    async def slow_query():
+        async with async_session() as session:
+            await session.execute(text("SELECT pg_sleep(5)"))
+        return {"result": True}
+
+    @app.get("/statement-timeout")
+    async def statement_timeout():
+        async with async_session() as session:
+            result = await session.execute(text("SHOW statement_timeout"))
+            return {"timeout": result.scalar_one()}
+
+    @app.get("/slow")
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return {"result": True}
+
+    app.add_middleware(
+        DeadlineMiddleware, timeout=0.3, route_timeouts={"GET /slow": 5.0}
+    )
+    return app
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_slow_query():
+    async with AsyncClient(app=make_app([]), base_url="http://test") as ac:
+        started = time.perf_counter()
+        response = await ac.get("/slow-query")
+        assert time.perf_counter() - started < 2
+        assert response.json() == {
+            "result": "false",
+            "error_type": "HTTPException",
+            "error_message": "Request deadline exceeded",
+        }
+
+        response = await ac.get("/statement-timeout")
+        timeout = response.json()["timeout"]
+        assert timeout.endswith("ms") and 0 < int(timeout[:-2]) <= 300
+    # Соединение отмененного запроса вернулось в пул
+    assert engine.pool.checkedout() == 0
+    async with async_session() as session:
+        assert (await session.execute(text("SHOW statement_timeout"))).scalar() == "0"
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_handler():
+    cancelled = []
+    app = make_app(cancelled)
+    messages = []
+
+    async def receive():
+        if not messages:
+            messages.append("request")
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(0.05)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/slow",
+        "raw_path": b"/slow",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=2)
+    assert cancelled == [True]
+    assert messages == ["request"]
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.future import select
+
+from db.database import async_session
+from db.models import Job
+from services.jobs import enqueue, job, job_worker
+
+attempts: List[int] = []
+
+
+@job("test.flaky")
+async def flaky_job(db, payload):
+    attempts.append(payload["value"])
+    if len(attempts) == 1:
+        raise RuntimeError("first attempt fails")
+
+
+async def get_job(job_id: int) -> Job:
+    async with async_session() as session:
+        result = await session.execute(select(Job).where(Job.id == job_id))
+        return result.scalar_one()
+
+
+async def run_until(job_id: int, done) -> Job:
+    """Запускает воркер, пока задача не придет в ожидаемое состояние."""
+    # Задача может оказаться не в первой пачке, если в очереди есть другие
+    for _ in range(100):
+        job_row = await get_job(job_id)
+        if done(job_row):
+            return job_row
+        await job_worker.run_once()
+    raise AssertionError(f"Задача {job_id} не обработана")
+
+
+async def delete_job(job_id: int) -> None:
+    async with async_session() as session:
+        await session.execute(delete(Job).where(Job.id == job_id))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_rescheduled():
+    async with async_session() as session:
+        await enqueue(session, "test.flaky", {"value": 1})
+        await session.commit()
+        result = await session.execute(select(Job.id).where(Job.kind == "test.flaky"))
+        job_id = result.scalar_one()
+
+    job_row = await run_until(
+        job_id, lambda row: row.attempts > 0 and row.status != "running"
+    )
+    await delete_job(job_id)
+
+    assert job_row.status == "queued"
+    assert job_row.attempts == 1
+    assert "first attempt fails" in job_row.last_error
+    assert attempts == [1]
+
+
+@pytest.mark.asyncio
+async def test_stale_job_with_exhausted_attempts_fails():
+    # Задача, чей воркер каждый раз падал, не выполняя ее до конца
+    long_ago = datetime.now(timezone.utc) - timedelta(days=1)
+    async with async_session() as session:
+        job_row = Job(
+            kind="test.flaky",
+            payload={"value": 2},
+            status="running",
+            attempts=3,
+            max_attempts=3,
+            run_at=long_ago,
+            locked_at=long_ago,
+        )
+        session.add(job_row)
+        await session.commit()
+        job_id = job_row.id
+
+    job_row = await run_until(job_id, lambda row: row.status != "running")
+    await delete_job(job_id)
+
+    assert job_row.status == "failed"
+    assert job_row.attempts == 3
+    assert 2 not in attempts
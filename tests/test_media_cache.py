@@ -0,0 +1,48 @@
+import pytest
+
+from services.media_cache import MediaCache, media_cache
+
+
+def test_lru_eviction_by_size():
+    cache = MediaCache(max_bytes=10, max_item_bytes=8)
+    cache.put(1, "a", b"1234", cache.generation)
+    cache.put(2, "b", b"1234", cache.generation)
+    assert cache.get(1) is not None
+    # Файл 2 запрашивался давнее файла 1 и вытесняется первым
+    cache.put(3, "c", b"1234", cache.generation)
+    assert cache.get(2) is None
+    assert cache.get(1).data == b"1234"
+    assert cache.stats()["evictions"] == 1
+    assert cache.size == 8
+
+
+def test_large_items_are_not_cached():
+    cache = MediaCache(max_bytes=100, max_item_bytes=4)
+    entry = cache.put(1, "a", b"12345", cache.generation)
+    assert entry.data == b"12345"
+    assert cache.get(1) is None
+
+
+def test_invalidation_wins_over_inflight_load():
+    cache = MediaCache(max_bytes=100, max_item_bytes=100)
+    generation = cache.generation
+    cache.on_event({"type": "media_deleted", "media_id": 1})
+    cache.put(1, "a", b"data", generation)
+    assert cache.get(1) is None
+
+    cache.put(2, "b", b"data", cache.generation)
+    cache.on_event({"type": "resync"})
+    assert cache.get(2) is None
+    assert cache.size == 0
+
+
+@pytest.mark.asyncio
+async def test_media_served_from_cache(async_client):
+    media_cache.invalidate(1)
+    first = await async_client.get("/api/media/1")
+    assert first.status_code == 200
+    assert "immutable" in first.headers["cache-control"]
+
+    second = await async_client.get("/api/media/1")
+    assert second.content == first.content
+    assert 'desc="0 queries"' in second.headers["server-timing"]
@@ -0,0 +1,266 @@
+import argparse
+import os
+import time
+from datetime import date, datetime, timezone
+
+import asyncpg
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+from cli import generate_data
+from cli.shards import partition_legacy_tables
+from config import settings
+from db.database import ASYNCPG_DSN, engine
+from db.partitions import (
+    LEGACY_MONTH,
+    add_months,
+    archive_partitions,
+    create_partitions,
+    list_partitions,
+    month_start,
+    partition_ddl,
+    partition_name,
+)
+from db.sharding import (
+    LEGACY_ID_LIMIT,
+    make_tweet_id,
+    parse_tweet_id,
+    shard_metadata,
+    shards,
+    tweet_created_at,
+)
+from services.partitions import PartitionMaintainer
+
+
+def test_month_arithmetic_and_partition_bounds():
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert partition_ddl("tweets", date(2024, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS tweets_p2024_12 PARTITION OF tweets "
+        "FOR VALUES FROM ('2024-12-01 00:00:00+00') TO ('2025-01-01 00:00:00+00')"
+    )
+
+
+@pytest.mark.asyncio
+async def test_created_at_matches_tweet_id(async_client):
+    response = await async_client.post(
+        "/api/tweets/", headers={"api-key": "test"}, json={"tweet_data": "Partitioned"}
+    )
+    tweet_id = response.json()["tweet_id"]
+    async with shards.engines[shards.map.for_tweet(tweet_id)].connect() as connection:
+        created_at = await connection.scalar(
+            text("SELECT created_at FROM tweets WHERE id = :id"), {"id": tweet_id}
+        )
+    assert created_at == tweet_created_at(tweet_id)
+    await async_client.delete(f"/api/tweets/{tweet_id}", headers={"api-key": "test"})
+
+
+@pytest.mark.asyncio
+async def test_archive_detaches_old_partitions():
+    old_month = datetime(2020, 1, 15, tzinfo=timezone.utc)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            assert await create_partitions(
+                connection, date(2020, 1, 1), date(2020, 1, 1)
+            ) == ["tweets_p2020_01", "likes_p2020_01"]
+            await connection.execute(
+                text(
+                    "INSERT INTO tweets (id, created_at, tweet_data, user_id) "
+                    "VALUES (7, :created_at, 'Old', 1)"
+                ),
+                {"created_at": old_month},
+            )
+            await connection.execute(
+                text(
+                    "INSERT INTO likes (user_id, tweet_id, tweet_created_at) "
+                    "VALUES (1, 7, :created_at)"
+                ),
+                {"created_at": old_month},
+            )
+
+            archived = await archive_partitions(
+                connection, date(2020, 2, 1), "test_archive"
+            )
+            assert archived == ["likes_p2020_01", "tweets_p2020_01"]
+            assert "tweets_p2020_01" not in {
+                partition.name for partition in await list_partitions(connection)
+            }
+            assert (
+                await connection.scalar(
+                    text("SELECT count(*) FROM tweets WHERE created_at = :created_at"),
+                    {"created_at": old_month},
+                )
+                == 0
+            )
+            assert (
+                await connection.scalar(
+                    text("SELECT count(*) FROM test_archive.likes_p2020_01")
+                )
+                == 1
+            )
+        finally:
+            await transaction.rollback()
+
+
+@pytest.mark.asyncio
+async def test_archive_keeps_legacy_month_unless_requested():
+    # Твит со старым идентификатором относится к первым минутам EPOCH
+    tweet_id = LEGACY_ID_LIMIT - 1
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            await create_partitions(connection, LEGACY_MONTH, LEGACY_MONTH)
+            await connection.execute(
+                text(
+                    "INSERT INTO tweets (id, created_at, tweet_data, user_id) "
+                    "VALUES (:id, :created_at, 'Legacy', 1)"
+                ),
+                {"id": tweet_id, "created_at": tweet_created_at(tweet_id)},
+            )
+            before = add_months(LEGACY_MONTH, 1)
+
+            assert await archive_partitions(connection, before, "test_archive") == []
+            assert await connection.scalar(
+                text("SELECT count(*) FROM tweets WHERE id = :id"), {"id": tweet_id}
+            )
+
+            assert await archive_partitions(
+                connection, before, "test_archive", include_legacy=True
+            ) == [
+                partition_name("likes", LEGACY_MONTH),
+                partition_name("tweets", LEGACY_MONTH),
+            ]
+            assert not await connection.scalar(
+                text("SELECT count(*) FROM tweets WHERE id = :id"), {"id": tweet_id}
+            )
+        finally:
+            await transaction.rollback()
+
+
+@pytest.mark.asyncio
+async def test_generated_data_spreads_across_partitions():
+    args = argparse.Namespace(
+        users=2,
+        tweets=200,
+        avg_follows=1,
+        avg_likes=1,
+        media=0,
+        media_bytes=0,
+        alpha=1.1,
+        seed=1,
+        days=120,
+    )
+    generator = generate_data.DataGenerator(args, end=int(time.time()) - 1)
+    # Авторы 1 и 2 относятся к разным логическим шардам
+    assert len({parse_tweet_id(tweet_id)[1] for tweet_id in generator.tweet_ids}) > 1
+
+    connection = await asyncpg.connect(ASYNCPG_DSN)
+    transaction = connection.transaction()
+    await transaction.start()
+    try:
+        await generate_data.create_partitions(connection, generator.tweet_ids)
+        await generate_data.copy_table(
+            connection,
+            "tweets",
+            ("id", "created_at", "tweet_data", "tweet_media_ids", "user_id"),
+            generator.tweets(),
+        )
+        await generate_data.copy_table(
+            connection,
+            "likes",
+            ("user_id", "tweet_id", "tweet_created_at"),
+            generator.likes(),
+        )
+        for table, key in (("tweets", "id"), ("likes", "tweet_id")):
+            partitions = await connection.fetchval(
+                f"SELECT count(DISTINCT tableoid) FROM {table} "
+                f"WHERE {key} = ANY($1::bigint[])",
+                list(generator.tweet_ids),
+            )
+            assert partitions > 1
+    finally:
+        await transaction.rollback()
+        await connection.close()
+
+
+@pytest.mark.asyncio
+async def test_maintainer_creates_future_partitions():
+    maintainer = PartitionMaintainer(months_ahead=settings.PARTITION_MONTHS_AHEAD + 1)
+    created = await maintainer.run_once()
+    try:
+        assert await maintainer.run_once() == {}
+        last = add_months(
+            month_start(datetime.now(timezone.utc).date()), maintainer.months_ahead
+        )
+        expected = {partition_name("tweets", last), partition_name("likes", last)}
+        for shard_engine in shards.engines:
+            async with shard_engine.connect() as connection:
+                names = {
+                    partition.name for partition in await list_partitions(connection)
+                }
+            assert expected <= names
+    finally:
+        # Секции удаляются на том шарде, где были созданы; секция твитов,
+        # на которую ссылается внешний ключ лайков, - только после отсоединения
+        for shard, shard_names in created.items():
+            async with shards.engines[shard].begin() as connection:
+                for table in ("likes", "tweets"):
+                    for name in shard_names:
+                        if name.startswith(table):
+                            await connection.execute(
+                                text(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                            )
+                            await connection.execute(text(f"DROP TABLE {name}"))
+
+
+@pytest.mark.asyncio
+async def test_legacy_shard_tables_are_partitioned():
+    tweet_id = make_tweet_id(40_000_000, 1, 5)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            # Схема шарда, созданная до секционирования
+            await connection.execute(text("CREATE SCHEMA legacy_shard"))
+            await connection.execute(text("SET LOCAL search_path TO legacy_shard"))
+            for statement in (
+                "CREATE TABLE tweets (id BIGINT PRIMARY KEY, "
+                "tweet_data VARCHAR(10000), tweet_media_ids INTEGER[], "
+                "user_id INTEGER)",
+                "CREATE INDEX ix_tweets_user_id ON tweets (user_id)",
+                "CREATE TABLE likes (user_id INTEGER, "
+                "tweet_id BIGINT REFERENCES tweets (id), "
+                "PRIMARY KEY (user_id, tweet_id))",
+                "CREATE INDEX ix_likes_tweet_id ON likes (tweet_id)",
+                f"INSERT INTO tweets VALUES ({tweet_id}, 'Legacy', NULL, 1)",
+                f"INSERT INTO likes VALUES (2, {tweet_id})",
+            ):
+                await connection.execute(text(statement))
+
+            assert await partition_legacy_tables(connection, shard_metadata())
+            assert not await partition_legacy_tables(connection, shard_metadata())
+            created_at = await connection.scalar(
+                text("SELECT created_at FROM tweets WHERE id = :id"), {"id": tweet_id}
+            )
+            assert created_at == tweet_created_at(tweet_id)
+            assert await connection.scalar(
+                text("SELECT tableoid::regclass::text FROM likes")
+            ) == partition_name("likes", month_start(created_at.date()))
+        finally:
+            await transaction.rollback()
+
+
+def test_autogenerate_ignores_partitions():
+    # Без alembic.ini: fileConfig из env.py перенастроил бы логирование тестов
+    root = os.path.dirname(os.path.dirname(__file__))
+    config = Config()
+    config.set_main_option("script_location", os.path.join(root, "alembic"))
+    config.set_main_option(
+        "sqlalchemy.url",
+        "postgresql+asyncpg://%(DB_USER)s:%(DB_PASS)s@%(DB_HOST)s:%(DB_PORT)s/"
+        "%(DB_NAME)s?async_fallback=True",
+    )
+    # Завершается ошибкой, если autogenerate предлагает изменения схемы
+    command.check(config)
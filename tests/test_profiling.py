@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient
+
+from config import settings
+from middleware.profiling import ProfilingMiddleware
+from routes.profiling_routes import router as profiling_routes
+from services.profiler import profile_store
+
+TOKEN = "secret"
+
+
+@pytest.fixture
+def profiling_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", TOKEN)
+    monkeypatch.setattr(profile_store, "directory", str(tmp_path))
+
+    def build(output_format="speedscope", sample_rate=0.0):
+        app = FastAPI()
+        app.include_router(profiling_routes)
+
+        @app.get("/work")
+        async def work():
+            await asyncio.sleep(0.01)
+            return {"total": sum(range(100_000))}
+
+        @app.exception_handler(HTTPException)
+        async def http_exception_handler(request, exc):
+            return JSONResponse({"result": "false", "error_message": exc.detail})
+
+        app.add_middleware(
+            ProfilingMiddleware,
+            store=profile_store,
+            token=TOKEN,
+            sample_rate=sample_rate,
+            interval=0.0001,
+            output_format=output_format,
+        )
+        return app
+
+    return build
+
+
+@pytest.mark.asyncio
+async def test_profile_is_captured_by_token(profiling_app):
+    async with AsyncClient(app=profiling_app(), base_url="http://test") as ac:
+        plain = await ac.get("/work")
+        assert "x-profile-id" not in plain.headers
+
+        response = await ac.get("/work", headers={"X-Profile-Token": TOKEN})
+        name = response.headers["x-profile-id"]
+        assert name.endswith(".speedscope.json")
+
+        listing = await ac.get(
+            "/api/admin/profiles", headers={"X-Profile-Token": TOKEN}
+        )
+        assert [profile["name"] for profile in listing.json()["profiles"]] == [name]
+
+        download = await ac.get(
+            f"/api/admin/profiles/{name}", headers={"X-Profile-Token": TOKEN}
+        )
+        assert download.status_code == 200
+        assert "speedscope" in download.json()["$schema"]
+
+
+@pytest.mark.asyncio
+async def test_collapsed_profile_by_sampling(profiling_app):
+    async with AsyncClient(
+        app=profiling_app("collapsed", sample_rate=1.0), base_url="http://test"
+    ) as ac:
+        response = await ac.get("/work")
+        name = response.headers["x-profile-id"]
+        download = await ac.get(
+            f"/api/admin/profiles/{name}", headers={"X-Profile-Token": TOKEN}
+        )
+    lines = download.text.splitlines()
+    assert lines
+    stack, weight = lines[0].rsplit(" ", 1)
+    assert stack and int(weight) > 0
+
+
+@pytest.mark.asyncio
+async def test_profiles_require_token(profiling_app):
+    async with AsyncClient(app=profiling_app(), base_url="http://test") as ac:
+        response = await ac.get("/work", headers={"X-Profile-Token": "wrong"})
+        assert "x-profile-id" not in response.headers
+
+        listing = await ac.get(
+            "/api/admin/profiles", headers={"X-Profile-Token": "wrong"}
+        )
+        assert listing.json()["error_message"] == "Invalid profiling token"
+
+        missing = await ac.get(
+            "/api/admin/profiles/..config.py", headers={"X-Profile-Token": TOKEN}
+        )
+        assert missing.json()["error_message"] == "Profile not found"
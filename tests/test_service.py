@@ -0,0 +1,34 @@
+import pytest
+
+from main import app
+
+
+@pytest.mark.asyncio
+async def test_metrics_use_route_templates(async_client):
+    await async_client.get("/api/users/1")
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert 'route="/api/users/{user_id}"' in response.text
+    assert "http_requests_in_flight" in response.text
+
+
+@pytest.mark.asyncio
+async def test_liveness(async_client):
+    response = await async_client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_readiness_before_startup(async_client):
+    # Клиент тестов не запускает lifespan, поэтому процесс не прогрет
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_readiness_after_startup(async_client):
+    async with app.router.lifespan_context(app):
+        response = await async_client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
@@ -0,0 +1,57 @@
+import pytest
+
+from db.sharding import (
+    LEGACY_ID_LIMIT,
+    LOGICAL_SHARDS,
+    PRIMARY,
+    ShardMap,
+    make_tweet_id,
+    parse_tweet_id,
+    user_shard,
+)
+
+
+def test_tweet_id_round_trip():
+    tweet_id = make_tweet_id(86_400, 7, 65_537)
+    assert parse_tweet_id(tweet_id) == (86_400, 7, 1)
+    # Идентификатор точно представляется числом JavaScript до 2160 года
+    assert make_tweet_id(2**32 - 1, LOGICAL_SHARDS - 1, 2**16 - 1) < 2**53
+
+
+def test_tweet_ids_are_ordered_by_time():
+    earlier = make_tweet_id(100_000, LOGICAL_SHARDS - 1, 2**16 - 1)
+    later = make_tweet_id(100_001, 0, 0)
+    assert LEGACY_ID_LIMIT < earlier < later
+
+
+def test_shard_map_routes_users_and_tweets():
+    shard_map = ShardMap(3)
+    tweet_id = make_tweet_id(10_000, user_shard(34), 5)
+    assert shard_map.for_user(34) == shard_map.for_tweet(tweet_id) == 34 % 32 % 3
+    # Твиты, созданные до шардирования, хранятся в основной базе
+    assert shard_map.for_tweet(12345) == PRIMARY
+    assert shard_map.group_tweets([tweet_id, 1, 2]) == {2: [tweet_id], 0: [1, 2]}
+
+
+def test_shard_map_assignments():
+    assignments = [1] * LOGICAL_SHARDS
+    assert ShardMap(2, assignments).for_user(5) == 1
+    with pytest.raises(ValueError):
+        ShardMap(2, [0, 1])
+    with pytest.raises(ValueError):
+        ShardMap(1, assignments)
+
+
+@pytest.mark.asyncio
+async def test_created_tweet_id_encodes_author_shard(async_client):
+    response = await async_client.post(
+        "/api/tweets/", headers={"api-key": "test"}, json={"tweet_data": "Sharded"}
+    )
+    tweet_id = response.json()["tweet_id"]
+    assert parse_tweet_id(tweet_id)[1] == user_shard(1)
+
+    response = await async_client.get(
+        "/api/tweets/", headers={"api-key": "test"}, params={"limit": 1}
+    )
+    assert response.json()["tweets"][0]["id"] == tweet_id
+    await async_client.delete(f"/api/tweets/{tweet_id}", headers={"api-key": "test"})
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_load():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": calls}
+
+    results = await asyncio.gather(*(flight.do("key", load) for _ in range(50)))
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+    # Результат не кэшируется после завершения загрузки
+    await flight.do("key", load)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_error_propagates_to_all_waiters():
+    flight = SingleFlight("test")
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise LookupError("boom")
+
+    results = await asyncio.gather(
+        *(flight.do("key", load) for _ in range(5)), return_exceptions=True
+    )
+    assert all(isinstance(result, LookupError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_load():
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+    assert await follower == "done"
+
+
+@pytest.mark.asyncio
+async def test_limits_bypass_coalescing():
+    flight = SingleFlight("test", max_keys=1, max_waiters=2)
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+
+    # Второй ключ и третий ожидающий первого ключа загружают данные сами
+    await asyncio.gather(
+        flight.do("a", load),
+        flight.do("a", load),
+        flight.do("a", load),
+        flight.do("b", load),
+    )
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_profile_requests(async_client):
+    responses = await asyncio.gather(
+        *(async_client.get("/api/users/1") for _ in range(10))
+    )
+    bodies = [response.json() for response in responses]
+    assert all(body == bodies[0] for body in bodies)
+    assert bodies[0]["user"]["id"] == 1
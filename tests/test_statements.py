@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import event
+
+from db import db_handlers
+from db.database import async_session, engine
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_use_compiled_cache():
+    hits = []
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        hits.append(context.cache_hit == context.dialect.CACHE_HIT)
+
+    async def run_queries():
+        async with async_session() as session:
+            await db_handlers.get_user_by_api("test", session)
+            await db_handlers.get_user_by_id(1, session)
+            await db_handlers.get_followers(1, session)
+            await db_handlers.get_likes_for_tweet(session, 1)
+            await db_handlers.get_tweet_feed(session, before_id=10**9, limit=5)
+
+    # Первый проход заполняет кэш, если тесты запущены по отдельности
+    await run_queries()
+    event.listen(engine.sync_engine, "after_cursor_execute", after_execute)
+    try:
+        await run_queries()
+    finally:
+        event.remove(engine.sync_engine, "after_cursor_execute", after_execute)
+    assert hits and all(hits)
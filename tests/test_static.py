@@ -0,0 +1,74 @@
+import gzip
+
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from cli.compress_static import compress_directory
+from middleware.static import IMMUTABLE_CACHE, PrecompressedStaticFiles
+
+SCRIPT = b"console.log('hello');\n" * 200
+
+
+@pytest.fixture
+def static_app(tmp_path):
+    (tmp_path / "app.7c9275be.js").write_bytes(SCRIPT)
+    (tmp_path / "index.html").write_bytes(b"<html></html>" * 100)
+    compress_directory(str(tmp_path))
+    return Starlette(
+        routes=[Mount("/static", PrecompressedStaticFiles(directory=str(tmp_path)))]
+    )
+
+
+@pytest.mark.asyncio
+async def test_precompressed_variant(static_app):
+    async with AsyncClient(app=static_app, base_url="http://test") as ac:
+        response = await ac.get(
+            "/static/app.7c9275be.js", headers={"accept-encoding": "gzip"}
+        )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE
+    assert "javascript" in response.headers["content-type"]
+    assert int(response.headers["content-length"]) < len(SCRIPT)
+    assert response.content == SCRIPT
+
+
+@pytest.mark.asyncio
+async def test_brotli_preferred(static_app):
+    async with AsyncClient(app=static_app, base_url="http://test") as ac:
+        response = await ac.get(
+            "/static/app.7c9275be.js", headers={"accept-encoding": "gzip, br"}
+        )
+    assert response.headers["content-encoding"] == "br"
+
+
+@pytest.mark.asyncio
+async def test_identity_and_revalidation(static_app):
+    async with AsyncClient(app=static_app, base_url="http://test") as ac:
+        response = await ac.get(
+            "/static/index.html", headers={"accept-encoding": "identity"}
+        )
+        assert "content-encoding" not in response.headers
+        assert response.headers["cache-control"] == "no-cache"
+
+        cached = await ac.get(
+            "/static/index.html",
+            headers={
+                "accept-encoding": "identity",
+                "if-none-match": response.headers["etag"],
+            },
+        )
+    assert cached.status_code == 304
+    assert cached.headers["cache-control"] == "no-cache"
+
+
+def test_stale_variant_is_replaced(tmp_path):
+    source = tmp_path / "app.js"
+    source.write_bytes(SCRIPT)
+    compress_directory(str(tmp_path))
+    source.write_bytes(SCRIPT * 2)
+    compress_directory(str(tmp_path), force=True)
+    assert gzip.decompress((tmp_path / "app.js.gz").read_bytes()) == SCRIPT * 2
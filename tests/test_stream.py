@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from main import app
+from services.broadcaster import Broadcaster, broadcaster, event_bridge
+
+
+def test_slow_subscriber_is_marked_overflowed():
+    local_broadcaster = Broadcaster(queue_size=2, max_subscribers=10)
+    subscription = local_broadcaster.subscribe()
+    for tweet_id in range(3):
+        local_broadcaster.publish({"type": "tweet_created", "tweet_id": tweet_id})
+    assert subscription.queue.qsize() == 2
+    assert subscription.overflowed is True
+
+
+def test_subscriber_limit():
+    local_broadcaster = Broadcaster(queue_size=2, max_subscribers=1)
+    assert local_broadcaster.subscribe() is not None
+    assert local_broadcaster.subscribe() is None
+
+
+@pytest.mark.asyncio
+async def test_tweet_event_delivered_through_bridge(async_client):
+    subscription = broadcaster.subscribe()
+    await event_bridge.start()
+    try:
+        event = await asyncio.wait_for(subscription.queue.get(), timeout=5)
+        assert event["type"] == "resync"
+        response = await async_client.post(
+            "/api/tweets/",
+            headers={"api-key": "test"},
+            json={"tweet_data": "Streamed tweet", "tweet_media_ids": []},
+        )
+        event = await asyncio.wait_for(subscription.queue.get(), timeout=5)
+        assert event == {
+            "type": "tweet_created",
+            "tweet_id": response.json()["tweet_id"],
+            "user_id": 1,
+        }
+    finally:
+        await event_bridge.stop()
+        broadcaster.unsubscribe(subscription)
+
+
+@pytest.mark.asyncio
+async def test_stream_limit_returns_503(async_client, monkeypatch):
+    monkeypatch.setattr(broadcaster, "max_subscribers", 0)
+    response = await async_client.get("/api/stream", headers={"api-key": "test"})
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+    assert response.json()["error_type"] == "Overloaded"
+
+
+@pytest.mark.asyncio
+async def test_stream_unsubscribes_when_client_disconnects_early():
+    subscribers = len(broadcaster._subscribers)
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        # Клиент отключается, пока отправляются заголовки ответа,
+        # до первой итерации генератора событий
+        messages.append(message)
+        await asyncio.sleep(10)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/stream",
+        "raw_path": b"/api/stream",
+        "root_path": "",
+        "query_string": b"api_key=test",
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    assert len(broadcaster._subscribers) == subscribers
@@ -1,4 +1,16 @@
+import asyncio
+
 import pytest
+from sqlalchemy import Sequence, delete, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateSequence, DropSequence
+
+from db import db_handlers
+from db.database import DATABASE_URL, async_session
+from db.models import tweet_tags
+from routes.conditional import make_etag
+from services.trending import TrendingTags, trending_tags
 
 
 @pytest.mark.asyncio
@@ -69,3 +81,175 @@ async def test_like_tweet(async_client):
     )
     assert response.status_code == 200
     assert response.json()["result"] is True
+
+
+@pytest.mark.asyncio
+async def test_tag_timeline(async_client, run_jobs):
+    tweet_request = {
+        "tweet_data": "Tagged tweet #FastAPI #fastapi",
+        "tweet_media_ids": [],
+    }
+    response = await async_client.post(
+        "/api/tweets/", headers={"api-key": "test"}, json=tweet_request
+    )
+    tweet_id = response.json()["tweet_id"]
+    await run_jobs()
+    response = await async_client.get(
+        "/api/tweets/tags/fastapi", headers={"api-key": "test"}
+    )
+    assert response.status_code == 200
+    assert response.json()["result"] is True
+    assert response.json()["tweets"][0]["id"] == tweet_id
+
+
+@pytest.mark.asyncio
+async def test_trending_tags(async_client, run_jobs, monkeypatch):
+    monkeypatch.setattr(trending_tags, "refresh_seconds", 0)
+    await async_client.post(
+        "/api/tweets/",
+        headers={"api-key": "test"},
+        json={"tweet_data": "Trending #pytest", "tweet_media_ids": []},
+    )
+    await run_jobs()
+    response = await async_client.get(
+        "/api/tweets/trending", headers={"api-key": "test"}
+    )
+    assert response.status_code == 200
+    assert response.json()["result"] is True
+    assert "pytest" in [item["tag"] for item in response.json()["tags"]]
+
+
+# Создается при импорте модуля, вне цикла событий, как trending_tags
+module_trending_tags = TrendingTags(
+    window_seconds=3600, bucket_seconds=60, refresh_seconds=0
+)
+
+
+def run_in_new_loop(coroutine):
+    # asyncio.run сбросил бы текущий цикл, общий для остальных тестов
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_trending_tags_work_across_event_loops():
+    async def record_and_count(tweet_id: int) -> int:
+        # Отдельный движок: пул соединений тоже привязан к циклу событий
+        loop_engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+        try:
+            async with loop_engine.begin() as connection:
+                await connection.execute(
+                    insert(tweet_tags).values(tag=tag_name, tweet_id=tweet_id)
+                )
+            sessions = async_sessionmaker(loop_engine)
+            async with sessions() as first, sessions() as second:
+                # Одновременные обновления ждут друг друга на блокировке
+                await asyncio.gather(
+                    module_trending_tags.refresh(first),
+                    module_trending_tags.refresh(second),
+                )
+            return dict(module_trending_tags.top(1000)).get(tag_name, 0)
+        finally:
+            await loop_engine.dispose()
+
+    tag_name = "looptest"
+    try:
+        assert run_in_new_loop(record_and_count(987_654_321)) == 1
+        assert run_in_new_loop(record_and_count(987_654_322)) == 2
+    finally:
+
+        async def cleanup() -> None:
+            loop_engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+            async with loop_engine.begin() as connection:
+                await connection.execute(
+                    delete(tweet_tags).where(tweet_tags.c.tag == tag_name)
+                )
+            await loop_engine.dispose()
+
+        run_in_new_loop(cleanup())
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header(async_client):
+    response = await async_client.get("/api/tweets/", headers={"api-key": "test"})
+    server_timing = response.headers["server-timing"]
+    assert server_timing.startswith("app;dur=")
+    assert "queries" in server_timing
+    assert 'desc="0 queries"' not in server_timing
+
+
+@pytest.mark.asyncio
+async def test_like_tweets_batch(async_client):
+    response = await async_client.post(
+        "/api/tweets/",
+        headers={"api-key": "test"},
+        json={"tweet_data": "Batch like", "tweet_media_ids": []},
+    )
+    tweet_id = response.json()["tweet_id"]
+    response = await async_client.post(
+        "/api/tweets/likes",
+        headers={"api-key": "test"},
+        json={"tweet_ids": [tweet_id, 999999, tweet_id]},
+    )
+    assert response.json()["results"] == [
+        {"id": tweet_id, "status": "liked"},
+        {"id": 999999, "status": "not_found"},
+    ]
+
+    response = await async_client.post(
+        "/api/tweets/likes", headers={"api-key": "test"}, json={"tweet_ids": [tweet_id]}
+    )
+    assert response.json()["results"] == [{"id": tweet_id, "status": "already_liked"}]
+
+
+@pytest.mark.asyncio
+async def test_get_medias_info(async_client):
+    response = await async_client.get("/api/medias", params={"ids": "1,999999"})
+    body = response.json()
+    assert body["medias"][0]["id"] == 1
+    assert body["medias"][0]["size"] > 0
+    assert body["medias"][0]["url"] == "/api/media/1"
+    assert body["missing"] == [999999]
+
+
+@pytest.mark.asyncio
+async def test_feed_conditional_request(async_client):
+    headers = {"api-key": "test"}
+    response = await async_client.get("/api/tweets/", headers=headers)
+    etag = response.headers["etag"]
+
+    response = await async_client.get(
+        "/api/tweets/", headers={**headers, "if-none-match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    # Лайк меняет ленту, и прежний ETag перестает совпадать
+    await async_client.delete("/api/tweets/2/likes", headers=headers)
+    await async_client.post("/api/tweets/2/likes", headers=headers)
+    response = await async_client.get(
+        "/api/tweets/", headers={**headers, "if-none-match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_first_version_bump_changes_etag():
+    # Как счетчики новой базы: последовательность еще не увеличивалась
+    sequence = Sequence("test_fresh_version_seq")
+    async with async_session() as session:
+        await session.execute(CreateSequence(sequence))
+        await session.commit()
+        try:
+            etag = make_etag("feed", await db_handlers.get_version(session, sequence))
+            await db_handlers.bump_version(session, sequence)
+            new_etag = make_etag(
+                "feed", await db_handlers.get_version(session, sequence)
+            )
+            assert new_etag != etag
+        finally:
+            await session.execute(DropSequence(sequence))
+            await session.commit()
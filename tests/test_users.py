@@ -49,3 +49,70 @@ async def test_unfollow_already_unfollowed_user(async_client):
     )
     assert response.status_code == 200
     assert response.json()["result"] is False
+
+
+@pytest.mark.asyncio
+async def test_get_user_mentions(async_client, run_jobs):
+    response = await async_client.post(
+        "/api/tweets/",
+        headers={"api-key": "test"},
+        json={"tweet_data": "Hello @user2", "tweet_media_ids": []},
+    )
+    tweet_id = response.json()["tweet_id"]
+    await run_jobs()
+    response = await async_client.get(
+        "/api/users/2/mentions", headers={"api-key": "test"}
+    )
+    assert response.status_code == 200
+    assert response.json()["result"] is True
+    assert response.json()["tweets"][0]["id"] == tweet_id
+
+
+@pytest.mark.asyncio
+async def test_get_users_batch(async_client):
+    response = await async_client.get("/api/users", params={"ids": "2,1,999,2"})
+    body = response.json()
+    assert body["result"] is True
+    assert [user["id"] for user in body["users"]] == [2, 1]
+    assert body["missing"] == [999]
+    assert {"followers_count", "following_count"} <= set(body["users"][0])
+
+
+@pytest.mark.asyncio
+async def test_get_users_batch_invalid_ids(async_client):
+    response = await async_client.get("/api/users", params={"ids": "1,abc"})
+    assert response.json()["result"] == "false"
+
+
+@pytest.mark.asyncio
+async def test_follow_users_batch(async_client):
+    response = await async_client.post(
+        "/api/users/follow",
+        headers={"api-key": "test"},
+        json={"user_ids": [2, 1, 999]},
+    )
+    results = {item["id"]: item["status"] for item in response.json()["results"]}
+    assert results[2] in ("followed", "already_following")
+    assert results[1] == "self"
+    assert results[999] == "not_found"
+
+    response = await async_client.post(
+        "/api/users/follow", headers={"api-key": "test"}, json={"user_ids": [2]}
+    )
+    assert response.json()["results"] == [{"id": 2, "status": "already_following"}]
+
+
+@pytest.mark.asyncio
+async def test_profile_conditional_request(async_client):
+    response = await async_client.get("/api/users/1")
+    etag = response.headers["etag"]
+
+    response = await async_client.get("/api/users/1", headers={"if-none-match": etag})
+    assert response.status_code == 304
+
+    headers = {"api-key": "test"}
+    await async_client.delete("/api/users/2/follow", headers=headers)
+    await async_client.post("/api/users/2/follow", headers=headers)
+    response = await async_client.get("/api/users/1", headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert response.json()["result"] is True